@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+多根目录并发扫描基准测试
+在临时目录下生成 1、2、4、8 个合成根目录，比较串行扫描与并发扫描的耗时。
+版本探测线程数固定，只改变扫描线程数，测得的差异来自根目录和扫描单元的并发。
+--list-ms 为每次列举目录附加的延迟，模拟机械硬盘或网络驱动器；为0时合成目录位于内存文件系统中，
+扫描几乎只受版本探测限制。
+"相对单根" 为按单个根目录的并发耗时线性外推的耗时与实际耗时之比，大于1说明多个根目录确实在并发扫描。
+
+用法:
+    python benchmarks/bench_parallel_roots.py [--probe-ms 20] [--repeat 3] [--list-ms 2] [--workers 8] [--probe-workers 4]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from src.core.env_scanner import EnvScanner
+
+# 每个根目录下生成的安装目录
+INSTALL_DIRS = [
+    'Program Files/Java/bin',
+    'Program Files/Git/cmd',
+    'Program Files/Go/bin',
+    'Program Files/nodejs',
+    'Program Files/Apache/maven-3.9/bin',
+    'Java17/bin',
+    'jdk-21/bin',
+    'Python39/Scripts',
+    'Python311/Scripts',
+    'apache-maven-3.8/bin',
+    'Gradle8/bin',
+    'xampp/php8',
+]
+
+# 每个用户目录下生成的安装目录
+PROFILE_DIRS = [
+    'AppData/Local/Programs/Python312/Scripts',
+    'AppData/Local/Programs/Microsoft VS Code/bin',
+    'AppData/Local/Programs/Java11/bin',
+    '.cargo/bin',
+]
+
+
+def build_root(root: Path, profiles: int, noise: int):
+    """生成一个合成根目录"""
+    for rel in INSTALL_DIRS:
+        (root / rel).mkdir(parents=True, exist_ok=True)
+    for i in range(profiles):
+        for rel in PROFILE_DIRS:
+            (root / 'Users' / f'user{i}' / rel).mkdir(parents=True, exist_ok=True)
+    for i in range(noise):
+        (root / f'noise{i}' / 'sub').mkdir(parents=True, exist_ok=True)
+        (root / 'Program Files' / f'Vendor{i}').mkdir(parents=True, exist_ok=True)
+
+
+def run_scan(roots, max_workers: int, probe_workers: int, probe_ms: float, list_ms: float,
+             repeat: int) -> float:
+    """运行扫描并返回最短耗时（秒）"""
+    def fake_version(tool_name, bin_path, tool_config):
+        time.sleep(probe_ms / 1000.0)
+        return "1.0.0"
+
+    best = None
+    for _ in range(repeat):
+        scanner = EnvScanner(use_index=False, use_probe_cache=False,
+                             max_workers=max_workers, probe_workers=probe_workers)
+        scanner._get_version = fake_version
+        if list_ms > 0:
+            list_subdirs = scanner._list_subdirs
+
+            def slow_list_subdirs(dir_path, list_subdirs=list_subdirs):
+                time.sleep(list_ms / 1000.0)
+                return list_subdirs(dir_path)
+            scanner._list_subdirs = slow_list_subdirs
+        start = time.perf_counter()
+        scanner.scan(roots)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多根目录并发扫描基准测试")
+    parser.add_argument('--probe-ms', type=float, default=20.0, help="模拟的单次版本探测耗时（毫秒）")
+    parser.add_argument('--list-ms', type=float, default=2.0, help="模拟的单次列举目录延迟（毫秒）")
+    parser.add_argument('--profiles', type=int, default=4, help="每个根目录的用户目录数")
+    parser.add_argument('--noise', type=int, default=200, help="每个根目录的无关目录数")
+    parser.add_argument('--repeat', type=int, default=3, help="每组重复次数，取最短耗时")
+    parser.add_argument('--workers', type=int, default=8, help="并发扫描的线程数，串行扫描使用1个线程")
+    parser.add_argument('--probe-workers', type=int, default=4, help="版本探测线程数，串行和并发扫描相同")
+    args = parser.parse_args()
+
+    base = Path(tempfile.mkdtemp(prefix='env_scan_bench_'))
+    try:
+        all_roots = []
+        for i in range(8):
+            root = base / f'root{i}'
+            build_root(root, args.profiles, args.noise)
+            all_roots.append(root)
+
+        print(f"{'根目录数':>8} {'串行(s)':>10} {'并发(s)':>10} {'加速比':>8} {'相对单根':>8}")
+        single = None
+        for count in (1, 2, 4, 8):
+            roots = all_roots[:count]
+            serial = run_scan(roots, 1, args.probe_workers, args.probe_ms, args.list_ms, args.repeat)
+            parallel = run_scan(roots, args.workers, args.probe_workers, args.probe_ms, args.list_ms,
+                                args.repeat)
+            if single is None:
+                single = parallel
+            print(f"{count:>8} {serial:>10.3f} {parallel:>10.3f} {serial / parallel:>8.2f} "
+                  f"{single * count / parallel:>8.2f}")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+扫描器基准测试
+按 scan_config.json 中的路径模式生成合成安装目录（N 个工具 × M 个版本 × K 个用户目录，外加无关目录），
+版本探测用桩函数代替，统计每次扫描的耗时、列举目录数、stat 调用数和版本探测数，结果写入 JSON 文件。
+
+用法:
+    python benchmarks/bench_scanner.py [--tools 18] [--versions 3] [--profiles 4] [--noise 200]
+                                       [--output bench_scanner.json] [--baseline 上次的结果.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from src.core.env_scanner import EnvScanner
+from src.core.scan_plan import load_scan_plan, split_path
+
+# 与扫描结果无关的常见目录
+NOISE_NAMES = ['Common Files', 'Windows Kits', 'Microsoft', 'Temp', 'Cache', 'Logs', 'Data']
+
+
+class SyscallCounter:
+    """统计 os.scandir 和 os.stat 的调用次数"""
+
+    def __init__(self):
+        self.scandir = 0
+        self.stat = 0
+        self._lock = threading.Lock()
+        self._orig_scandir = os.scandir
+        self._orig_stat = os.stat
+
+    def __enter__(self):
+        def scandir(*args, **kwargs):
+            with self._lock:
+                self.scandir += 1
+            return self._orig_scandir(*args, **kwargs)
+
+        def stat(*args, **kwargs):
+            with self._lock:
+                self.stat += 1
+            return self._orig_stat(*args, **kwargs)
+
+        os.scandir = scandir
+        os.stat = stat
+        return self
+
+    def __exit__(self, *exc):
+        os.scandir = self._orig_scandir
+        os.stat = self._orig_stat
+
+
+def instantiate(pattern: str, version: str, profile: str) -> str:
+    """把路径模式实例化为一个具体的相对路径"""
+    parts = []
+    for segment in split_path(pattern):
+        if segment == '**':
+            parts.append('nested')
+        elif segment == '*':
+            parts.append(profile)
+        else:
+            parts.append(segment.replace('*', version).replace('?', 'x'))
+    return os.path.join(*parts)
+
+
+def build_tree(root: Path, tools: int, versions: int, profiles: int, noise: int, seed: int) -> int:
+    """生成合成目录树，返回生成的安装目录数"""
+    plan = load_scan_plan()
+    rng = random.Random(seed)
+    installs = set()
+
+    for tool_name in list(plan.config)[:tools]:
+        tool_config = plan.config[tool_name]
+        for pattern in tool_config['paths']:
+            # 不含通配符的模式只能生成一个目录
+            count = versions if '*' in split_path(pattern)[-1] else 1
+            for v in range(count):
+                for k in range(profiles if 'Users' in pattern else 1):
+                    rel = instantiate(pattern, f'{v + 1}.{rng.randint(0, 9)}', f'user{k}')
+                    installs.add(rel)
+                    for bin_path in tool_config['bin_paths']:
+                        (root / rel).joinpath(*split_path(bin_path)).mkdir(parents=True, exist_ok=True)
+
+    # 无关目录：根目录、Program Files 和用户目录下各放一些，再加一个较深的项目目录
+    for i in range(noise):
+        name = f'{rng.choice(NOISE_NAMES)}{i}'
+        (root / name / 'sub').mkdir(parents=True, exist_ok=True)
+        (root / 'Program Files' / name).mkdir(parents=True, exist_ok=True)
+    for k in range(profiles):
+        local = root / 'Users' / f'user{k}' / 'AppData' / 'Local'
+        for i in range(noise // 10):
+            (local / f'{rng.choice(NOISE_NAMES)}{i}').mkdir(parents=True, exist_ok=True)
+            (local / 'Programs' / f'App{i}').mkdir(parents=True, exist_ok=True)
+    project = root / 'projects' / 'web'
+    for i in range(noise // 10):
+        (project / 'node_modules' / f'pkg{i}' / 'node_modules').mkdir(parents=True, exist_ok=True)
+
+    return len(installs)
+
+
+def run_scenario(name: str, root: Path, work: Path, warm: bool, probe_ms: float, repeat: int,
+                 workers: int) -> dict:
+    """运行一组扫描，返回最短耗时及最后一次扫描的计数"""
+    probes = []
+
+    def fake_version(tool_name, bin_path, tool_config):
+        probes.append(tool_name)
+        time.sleep(probe_ms / 1000.0)
+        return "1.0.0"
+
+    def make_scanner() -> EnvScanner:
+        scanner = EnvScanner(
+            use_index=warm, index_path=work / f'{name}_index.json',
+            use_probe_cache=warm, probe_cache_path=work / f'{name}_probe.json',
+            max_workers=workers, probe_workers=workers
+        )
+        scanner._get_version = fake_version
+        return scanner
+
+    if warm:
+        # 预热：建立扫描索引
+        make_scanner().scan([root])
+
+    best = None
+    for _ in range(repeat):
+        scanner = make_scanner()
+        del probes[:]
+        with SyscallCounter() as counter:
+            start = time.perf_counter()
+            results = scanner.scan([root])
+            elapsed = time.perf_counter() - start
+        scanner._clean_resources()
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {
+        'name': name,
+        'wall_s': round(best, 4),
+        'dirs_listed': counter.scandir,
+        'stat_calls': counter.stat,
+        'probes': len(probes),
+        'installations': sum(len(items) for items in results.values()),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=str(BASE_DIR),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        return ''
+
+
+def print_report(report: dict, baseline: dict = None):
+    base = {s['name']: s for s in baseline['scenarios']} if baseline else {}
+    print(f"{'场景':<8} {'耗时(s)':>10} {'列举目录':>10} {'stat调用':>10} {'版本探测':>10} {'安装数':>8}")
+    for s in report['scenarios']:
+        line = (f"{s['name']:<8} {s['wall_s']:>10.3f} {s['dirs_listed']:>10} {s['stat_calls']:>10} "
+                f"{s['probes']:>10} {s['installations']:>8}")
+        old = base.get(s['name'])
+        if old and old['wall_s']:
+            line += f"   (基线 {old['wall_s']:.3f}s, {s['wall_s'] / old['wall_s']:.2f}x)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="扫描器基准测试")
+    parser.add_argument('--tools', type=int, default=18, help="生成的工具数（按配置顺序取前 N 个）")
+    parser.add_argument('--versions', type=int, default=3, help="每个通配符模式生成的版本数")
+    parser.add_argument('--profiles', type=int, default=4, help="用户目录数")
+    parser.add_argument('--noise', type=int, default=200, help="无关目录数")
+    parser.add_argument('--probe-ms', type=float, default=5.0, help="模拟的单次版本探测耗时（毫秒）")
+    parser.add_argument('--repeat', type=int, default=3, help="每个场景重复次数，取最短耗时")
+    parser.add_argument('--workers', type=int, default=8, help="扫描及版本探测的线程数")
+    parser.add_argument('--seed', type=int, default=1, help="随机种子")
+    parser.add_argument('--output', default='bench_scanner.json', help="结果 JSON 文件")
+    parser.add_argument('--baseline', help="用于对比的上一次结果 JSON 文件")
+    args = parser.parse_args()
+
+    base = Path(tempfile.mkdtemp(prefix='env_scan_bench_'))
+    try:
+        root = base / 'root'
+        work = base / 'work'
+        work.mkdir()
+        installs = build_tree(root, args.tools, args.versions, args.profiles, args.noise, args.seed)
+
+        report = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'params': {
+                'tools': args.tools, 'versions': args.versions, 'profiles': args.profiles,
+                'noise': args.noise, 'probe_ms': args.probe_ms, 'repeat': args.repeat,
+                'workers': args.workers, 'seed': args.seed, 'generated_installs': installs,
+            },
+            'scenarios': [
+                run_scenario('cold', root, work, False, args.probe_ms, args.repeat, args.workers),
+                run_scenario('warm', root, work, True, args.probe_ms, args.repeat, args.workers),
+            ],
+        }
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -126,7 +126,7 @@ class EnvBackup:
                 self.logger.warning(f"发送环境变更广播失败（不影响恢复结果）: {str(e)}")
             
             # 注册表导入成功就认为恢复成功
-            update_status("恢复成功，如果环境仍未生效，建议重启后验证，如仍然未生效，可以点击右侧开始扫描，根据建议手动添加环境变量")
+            update_status("恢复成功，如果环境仍未生效，建议重启后验证，如仍然未生效，可以点击右侧快速扫描，根据建议手动添加环境变量")
             return True
             
         except Exception as e:
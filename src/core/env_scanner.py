@@ -2,157 +2,1236 @@ import os
 from pathlib import Path
 import logging
 import re
-from concurrent.futures import ThreadPoolExecutor, TimeoutError
-from typing import Dict, List, Tuple, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from collections import deque
+from typing import Dict, List, Mapping, Tuple, Optional, Callable, Iterator
 import time
-import json
-import hashlib
-from datetime import datetime, timedelta
 import threading
 from queue import Queue
-import fnmatch
-import subprocess
-from src.utils.resource import resource_path
+from src.core.scan_index import ScanIndex, dir_mtime, path_identity
+from src.core.version_probe import read_fingerprint, resolve_executable, ProbeCache, VersionProber
+from src.core.scan_plan import (ScanPlan, PatternNode, RecursiveState, DEFAULT_PRUNE_DIRS, load_scan_plan,
+                                merge_states, split_path, states_key)
+from src.core.path_index import EnvSnapshot, PathIndex
+from src.core.installation import Installation
+from src.core.scan_profile import ScanProfile, count_fs
+from src.core.recommendations import RecommendationEngine
+from src.core.scan_roots import ScanRoot, RootsSpec, resolve_roots
+from src.core.registry_source import RegistryReader, RegistrySource, default_registry_reader, map_registry_path
+
+class ScanCancelToken:
+    """扫描取消令牌
+    
+    调用 cancel() 或到达截止时间后视为已取消。扫描在两次目录列举之间检查令牌，
+    取消后中止正在执行的版本命令，并返回已收集到的部分结果。
+    """
+
+    def __init__(self, deadline: Optional[float] = None):
+        """
+        Args:
+            deadline: 截止时间，time.time() 时间戳
+        """
+        self._event = threading.Event()
+        self.deadline = deadline
+
+    def cancel(self):
+        """请求取消扫描"""
+        self._event.set()
+
+    def set_deadline(self, deadline: float):
+        """设置截止时间，已有更早的截止时间时保持不变"""
+        self.deadline = deadline if self.deadline is None else min(self.deadline, deadline)
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.time() >= self.deadline:
+            self._event.set()
+            return True
+        return False
+
+    def remaining(self) -> Optional[float]:
+        """距截止时间的秒数，没有截止时间时返回None"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.time())
+
+
+class ScanEvent:
+    """流式扫描产出的事件"""
+    PROGRESS = 'progress'
+    INSTALLATION = 'installation'
+    DONE = 'done'
+
+    def __init__(self, kind: str, progress: float = 0.0, tool_name: Optional[str] = None,
+                 installation: Optional[Installation] = None, results: Optional[Dict[str, List[Installation]]] = None,
+                 cancelled: bool = False, profile: Optional[Dict] = None):
+        self.kind = kind
+        self.progress = progress
+        self.tool_name = tool_name
+        self.installation = installation
+        self.results = results
+        self.cancelled = cancelled  # done 事件：扫描是否被取消或超时
+        self.profile = profile  # done 事件：开启性能计数时的性能报告
+
+
+class _ScanRun:
+    """一次扫描在各线程间共享的状态：已扫描路径、工作量计数、事件队列和结果"""
+
+    def __init__(self, token: ScanCancelToken):
+        self.token = token
+        self.events: Queue = Queue()
+        self._lock = threading.Lock()
+        self._claims: Dict[object, Tuple] = {}  # 已发现安装的目录的物理身份 -> 最小的候选排序键
+        self._claim_identity: Dict[Tuple, object] = {}  # 候选排序键 -> 目录的物理身份
+        self._shared_probes: Dict[Tuple[object, str], Future] = {}  # (物理身份, 工具名) -> 版本探测
+        self._reported = set()  # 已产出安装事件的物理身份
+        self._planned = 0
+        self._done = 0
+        self._last_progress = -1
+        self._sequence = 0
+        self._found: List[Tuple[Tuple, str, Installation]] = []
+        self._signatures: Dict[Tuple, List] = {}  # 候选排序键 -> 分析安装时的签名
+        self._probes: List[Future] = []
+        # 尚未执行完的探测完成回调；Future 在调用回调之前就已标记为完成
+        self._callbacks = 0
+        self._callbacks_idle = threading.Condition(self._lock)
+        self._expanded: Dict[str, List[PatternNode]] = {}  # 已展开的目录 -> 遍历状态
+
+    def settled(self, identity, key: Tuple) -> bool:
+        """同一物理目录是否已由排序键不大于 key 的候选发现了安装，此时无需再分析"""
+        with self._lock:
+            best = self._claims.get(identity)
+            return best is not None and best <= key
+
+    def claim(self, identity, key: Tuple):
+        """记录候选目录分析出了安装
+
+        只有分析成功的候选才认领目录，注册表中失效的登记或未通过校验的候选不会挡住同一目录的
+        其他候选。以解析后的物理身份去重，通过联接、符号链接或不同大小写到达的同一安装，
+        汇总结果时只保留排序键最小的一个，因此报告的路径与线程调度无关。
+        """
+        with self._lock:
+            best = self._claims.get(identity)
+            if best is None or key < best:
+                self._claims[identity] = key
+            self._claim_identity[key] = identity
+
+    def shared_probe(self, identity, tool_name: str, submit: Callable[[], Future]) -> Future:
+        """同一物理目录的同一工具只执行一次版本探测，之后到达的候选复用已有的探测"""
+        with self._lock:
+            probe = self._shared_probes.get((identity, tool_name))
+            if probe is None:
+                probe = self._shared_probes[(identity, tool_name)] = submit()
+                self._probes.append(probe)
+            return probe
+
+    def plan(self, count: int = 1):
+        """增加计划工作量"""
+        with self._lock:
+            self._planned += count
+
+    def complete(self, count: int = 1):
+        """增加已完成工作量，进度的整数百分比变化时产出进度事件"""
+        with self._lock:
+            self._done += count
+            progress = int(self._done * 100 / self._planned) if self._planned else 0
+            # 计划工作量会随扫描增长，进度只增不减
+            if progress <= self._last_progress:
+                return
+            self._last_progress = progress
+        self.events.put(ScanEvent(ScanEvent.PROGRESS, progress=min(progress, 99)))
+
+    def next_key(self, unit_key: Tuple) -> Tuple:
+        """生成单元内递增的排序键"""
+        with self._lock:
+            self._sequence += 1
+            return unit_key + (self._sequence,)
+
+    def record_dir(self, dir_path: str, nodes: List[PatternNode]):
+        """记录展开过的目录及其遍历状态，供变化监视使用"""
+        with self._lock:
+            self._expanded[dir_path] = nodes
+
+    def expanded_dirs(self) -> Dict[str, List[PatternNode]]:
+        with self._lock:
+            return dict(self._expanded)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    def expect_callback(self):
+        """登记一个将在探测完成后执行的回调"""
+        with self._lock:
+            self._callbacks += 1
+
+    def callback_done(self):
+        with self._callbacks_idle:
+            self._callbacks -= 1
+            self._callbacks_idle.notify_all()
+
+    def wait_probes(self, prober: Optional[VersionProber]):
+        """等待所有版本探测及其完成回调结束，扫描被取消时中止尚未完成的探测
+
+        等待不会越过截止时间，到达截止时间后立即取消排队中的探测并结束正在执行的版本命令。
+        """
+        while True:
+            with self._lock:
+                pending = [probe for probe in self._probes if not probe.done()]
+            if not pending:
+                break
+            if self.cancelled:
+                for probe in pending:
+                    probe.cancel()
+                if prober:
+                    prober.kill_all()
+                wait(pending)
+                break
+            remaining = self.token.remaining()
+            wait(pending, timeout=0.1 if remaining is None else min(0.1, remaining))
+        with self._callbacks_idle:
+            self._callbacks_idle.wait_for(lambda: self._callbacks == 0)
+
+    def add_installation(self, key: Tuple, tool_name: str, installation: Installation,
+                         signature: Optional[List] = None):
+        """记录发现的安装，同一物理目录只产出一次安装事件"""
+        with self._lock:
+            self._found.append((key, tool_name, installation))
+            if signature is not None:
+                self._signatures[key] = signature
+            identity = self._claim_identity.get(key)
+            if identity is not None:
+                if identity in self._reported:
+                    return
+                self._reported.add(identity)
+        self.events.put(ScanEvent(ScanEvent.INSTALLATION, tool_name=tool_name, installation=installation))
+
+    def collect(self) -> Dict[str, List[Installation]]:
+        """按排序键合并结果，与并发调度顺序无关；同一物理目录只保留排序键最小的安装"""
+        results = {}
+        seen = set()
+        with self._lock:
+            found = sorted(self._found, key=lambda item: item[0])
+            identities = dict(self._claim_identity)
+        for key, tool_name, installation in found:
+            identity = identities.get(key)
+            if identity is not None:
+                if identity in seen:
+                    continue
+                seen.add(identity)
+            results.setdefault(tool_name, []).append(installation)
+        return results
+
+    def signatures(self) -> Dict[str, List]:
+        """发现的安装在分析时的签名，键为 工具名|安装目录"""
+        with self._lock:
+            return {
+                f"{tool_name}|{installation['install_path']}": self._signatures[key]
+                for key, tool_name, installation in self._found if key in self._signatures
+            }
+
+
+def _executable_names(dir_path: str) -> set:
+    """目录中可执行文件的小写名称，带 PATHEXT 扩展名的同时记录去掉扩展名的名称"""
+    extensions = {ext.lower() for ext in os.environ.get('PATHEXT', '.COM;.EXE;.BAT;.CMD').split(';') if ext}
+    names = set()
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                name = entry.name.lower()
+                names.add(name)
+                stem, ext = os.path.splitext(name)
+                if ext in extensions:
+                    names.add(stem)
+    except OSError:
+        pass
+    return names
+
+
+def _group_candidates(pairs: List[Tuple[str, str]]) -> List[Tuple[str, List[str]]]:
+    """把 (目录, 工具名) 按规范化的目录合并为 (目录, 工具列表)，保持首次出现的顺序"""
+    candidates: Dict[str, Tuple[str, List[str]]] = {}
+    for path, tool_name in pairs:
+        key = os.path.normcase(os.path.normpath(path))
+        tools = candidates.setdefault(key, (os.path.normpath(path), []))[1]
+        if tool_name not in tools:
+            tools.append(tool_name)
+    return list(candidates.values())
+
+
+def _state_patterns(state) -> List[str]:
+    """遍历状态对应的原始路径模式"""
+    return state.node.patterns if isinstance(state, RecursiveState) else state.patterns
+
+
+def _listing_patterns(states: List) -> List[str]:
+    """需要列举目录才能匹配的路径模式：通配符子节点和 ** 段所在的模式"""
+    patterns = []
+    for state in states:
+        if isinstance(state, RecursiveState):
+            patterns.extend(state.node.patterns)
+            continue
+        for _, _, child in state.wildcards:
+            patterns.extend(child.patterns)
+        if state.recursive is not None:
+            patterns.extend(state.recursive.patterns)
+    return list(dict.fromkeys(patterns))
+
 
 class EnvScanner:
-    def __init__(self):
+    def __init__(self, use_index: bool = True, index_path: Optional[Path] = None,
+                 max_workers: int = 8, per_root_workers: int = 2,
+                 use_probe_cache: bool = True, probe_cache_path: Optional[Path] = None,
+                 probe_workers: int = 4, probe_timeout: float = 10.0, discover: bool = True,
+                 negative_ttl: Optional[float] = 300.0, use_registry: bool = True,
+                 registry_reader: Optional[RegistryReader] = None,
+                 registry_drives: Optional[Dict[str, str]] = None):
+        """初始化扫描器
+        
+        Args:
+            use_index: 是否使用持久化扫描索引进行增量扫描
+            index_path: 索引文件路径，默认为 ~/.env_manager/scan_index.json
+            max_workers: 扫描线程总数
+            per_root_workers: 单个根目录同时运行的扫描单元上限
+            use_probe_cache: 是否缓存版本命令的执行结果
+            probe_cache_path: 版本探测缓存文件路径，默认为 ~/.env_manager/probe_cache.json
+            probe_workers: 同时执行的版本命令数
+            probe_timeout: 单个版本命令的超时时间（秒）
+            discover: 是否在各根目录的前两层按关键字发现 paths 未覆盖的安装
+            negative_ttl: 否定缓存的信任时间（秒），期间直接跳过已知没有匹配的目录和模式组合，
+                超时后按目录修改时间确认；为None时不使用否定缓存，需要启用扫描索引
+            use_registry: 是否分析注册表中登记的安装（卸载信息、App Paths、JavaSoft、PythonCore 等）
+            registry_reader: 注册表读取器，默认读取本机注册表，非 Windows 平台上默认没有
+            registry_drives: 盘符 -> 本地目录，分析挂载的系统镜像的注册表时把登记的路径映射到镜像中
+        """
         self.logger = logging.getLogger('EnvScanner')
         self.progress_callback = None
+        self.use_index = use_index
+        self.index_path = index_path
+        self.scan_index: Optional[ScanIndex] = None
+        self.max_workers = max_workers
+        self.per_root_workers = per_root_workers
+        self.use_probe_cache = use_probe_cache
+        self.probe_cache_path = probe_cache_path
+        self.probe_cache: Optional[ProbeCache] = None
+        self.probe_workers = probe_workers
+        self.probe_timeout = probe_timeout
+        self.discover = discover
+        self.negative_ttl = negative_ttl
+        self.use_registry = use_registry
+        self.registry_reader = registry_reader
+        self.registry_drives = registry_drives or {}
+        self.prober: Optional[VersionProber] = None
+        self._prober_lock = threading.Lock()
+        self.env_snapshot: Optional[EnvSnapshot] = None
+        self.path_index: Optional[PathIndex] = None
+        self._recommender: Optional[RecommendationEngine] = None
+        # 上一次完整扫描的根目录，排除规则作用于根目录以下的各级目录名
+        self.scan_roots: List[str] = []
+        # 上一次完整扫描展开过的目录及其遍历状态，变化监视器据此增量扫描
+        self.watch_dirs: Dict[str, List[PatternNode]] = {}
+        # 上一次完整扫描记录的目录修改时间和安装签名（键为 工具名|安装目录），作为变化监视的基准
+        self.watch_mtimes: Dict[str, int] = {}
+        self.watch_signatures: Dict[str, List] = {}
+        # 未使用索引时，完整扫描期间各根目录的子目录列表，关键字发现直接复用遍历时的列举结果
+        self._root_listings: Optional[Dict[str, List[str]]] = None
+        # 当前扫描的性能计数，未开启时为None
+        self._profile: Optional[ScanProfile] = None
+        
+        # 扫描计划在第一次使用时才加载，同一进程中的扫描器共享同一个只读计划
+        self._plan: Optional[ScanPlan] = None
+
+    @property
+    def plan(self) -> ScanPlan:
+        """当前的扫描计划，第一次访问时加载"""
+        if self._plan is None:
+            self._plan = load_scan_plan()
+        return self._plan
+
+    @property
+    def scan_config(self) -> Mapping[str, Mapping]:
+        """补全缺省值后的只读工具配置"""
+        return self.plan.config
+
+    def scan(self, roots: RootsSpec = None, cancel_token: Optional[ScanCancelToken] = None,
+             deadline: Optional[float] = None) -> Dict[str, List[Installation]]:
+        """扫描系统中已安装的开发工具
+        
+        Args:
+            roots: 要扫描的根目录，可以是目录列表、ScanRoot 列表或 RootProvider，默认为所有可用的磁盘驱动器
+            cancel_token: 取消令牌，取消后返回已收集到的部分结果
+            deadline: 截止时间（time.time() 时间戳），到达后按取消处理
+        """
+        results = {}
+        for event in self.iter_scan(roots, cancel_token, deadline):
+            if event.kind == ScanEvent.DONE:
+                results = event.results
+        return results
+
+    def scan_profiled(self, roots: RootsSpec = None, cancel_token: Optional[ScanCancelToken] = None,
+                      deadline: Optional[float] = None) -> Tuple[Dict[str, List[Installation]], Dict]:
+        """扫描并收集性能计数，返回 (扫描结果, 性能报告)，报告格式见 ScanProfile"""
+        results, report = {}, {}
+        for event in self.iter_scan(roots, cancel_token, deadline, profile=True):
+            if event.kind == ScanEvent.DONE:
+                results, report = event.results, event.profile
+        return results, report
+
+    def iter_scan(self, roots: RootsSpec = None, cancel_token: Optional[ScanCancelToken] = None,
+                  deadline: Optional[float] = None, profile: bool = False) -> Iterator['ScanEvent']:
+        """流式扫描，边扫描边产出事件
+        
+        产出三类事件:
+            progress: 按已计划和已完成的工作量（根目录、候选目录、版本探测）计算的进度
+            installation: 发现一个安装，版本号已确定
+            done: 扫描结束，携带与 scan() 相同结构的完整结果
+        
+        Args:
+            roots: 要扫描的根目录，可以是目录列表、ScanRoot 列表或 RootProvider，默认为所有可用的磁盘驱动器
+            cancel_token: 取消令牌，取消后 done 事件携带已收集到的部分结果
+            deadline: 截止时间（time.time() 时间戳），到达后按取消处理
+            profile: 是否收集性能计数，开启时 done 事件的 profile 为性能报告
+        """
+        token = cancel_token or ScanCancelToken()
+        if deadline is not None:
+            token.set_deadline(deadline)
+        
+        roots = resolve_roots(roots)
+        self.scan_roots = [str(root.path) for root in roots]
+        self._profile = ScanProfile([root.label for root in roots]) if profile else None
+        
+        self.logger.debug(f"开始扫描根目录: {[root.label for root in roots]}")
+        
+        # 所有工具的路径模式已编译为一棵前缀树，每个根目录只遍历一次
+        pattern_tree = self._refresh_plan().tree
+        yield from self._iter_run(token, self._run_scan, (roots, pattern_tree), full=True)
+
+    def quick_scan(self, cancel_token: Optional[ScanCancelToken] = None,
+                   deadline: Optional[float] = None) -> Dict[str, List[Installation]]:
+        """快速扫描，只分析 PATH 和 *_HOME 环境变量指向的安装，参数与 scan() 相同"""
+        results = {}
+        for event in self.iter_quick_scan(cancel_token, deadline):
+            if event.kind == ScanEvent.DONE:
+                results = event.results
+        return results
+
+    def iter_quick_scan(self, cancel_token: Optional[ScanCancelToken] = None,
+                        deadline: Optional[float] = None) -> Iterator['ScanEvent']:
+        """流式快速扫描，事件与 iter_scan() 相同
+        
+        不遍历磁盘，候选安装目录由当前的系统和用户 PATH 条目以及 *_HOME 等环境变量推出：
+        PATH 条目中存在工具的版本命令、且条目以工具的某个bin目录结尾时，去掉bin目录即为安装目录。
+        结果按 PATH 中的先后顺序排列，即实际会被调用的安装在前。
+        """
+        token = cancel_token or ScanCancelToken()
+        if deadline is not None:
+            token.set_deadline(deadline)
+        self._profile = None
+        self._refresh_plan()
+        yield from self._iter_run(token, self._run_quick_scan, (), full=False)
+
+    def _iter_run(self, token: ScanCancelToken, target: Callable, args: Tuple,
+                  full: bool) -> Iterator['ScanEvent']:
+        """在扫描线程中执行 target(*args, run)，转发事件，结束后保存缓存并产出 done 事件
+        
+        Args:
+            full: 是否为完整扫描，只有完整扫描的结果才用于清理索引和变化监视
+        """
+        # 每次扫描重新读取环境变量，不依赖GUI进程启动时的 os.environ
+        self._refresh_environment()
+        
+        if self.use_index and self.scan_index is None:
+            self.scan_index = ScanIndex(self.index_path)
+        if self.scan_index:
+            self.scan_index.begin_scan()
+            self.scan_index.set_plan(self.plan.fingerprint())
+        
+        if self.use_probe_cache and self.probe_cache is None:
+            self.probe_cache = ProbeCache(self.probe_cache_path)
+        if self.probe_cache:
+            self.probe_cache.refresh()
+            self.probe_cache.reset_stats()
+        
+        run = _ScanRun(token)
+        worker = threading.Thread(target=target, args=args + (run,), daemon=True)
+        worker.start()
         
         try:
-            # 使用resource_path获取配置文件路径
-            config_path = resource_path('data/scan_config.json')
-            if not os.path.exists(config_path):
-                self.logger.error(f"配置文件不存在: {config_path}")
-                self.scan_config = {}  # 使用空配置
-                return
-                
-            with open(config_path, 'r', encoding='utf-8') as f:
-                self.scan_config = json.load(f)
-                
+            while True:
+                event = run.events.get()
+                if event is None:
+                    break
+                if event.kind == ScanEvent.PROGRESS:
+                    self._update_progress(event.progress)
+                yield event
+        finally:
+            # 调用方提前停止迭代时取消扫描
+            if worker.is_alive():
+                token.cancel()
+            worker.join()
+        
+        cancelled = token.cancelled
+        if cancelled:
+            self.logger.info("扫描已取消，返回部分结果")
+        elif full:
+            self.watch_dirs = run.expanded_dirs()
+        
+        if self.scan_index:
+            # 取消的扫描和快速扫描只访问了部分目录，不能据此清理索引
+            self.scan_index.save(prune=full and not cancelled)
+        
+        if self.probe_cache:
+            self.probe_cache.save()
+            self.logger.info(
+                f"版本探测缓存命中率: {self.probe_cache.hit_rate():.0%} "
+                f"(命中 {self.probe_cache.hits}, 未命中 {self.probe_cache.misses})"
+            )
+        
+        # 保持与配置文件一致的工具顺序
+        results = run.collect()
+        results = {name: results[name] for name in self.scan_config if name in results}
+        if full and not cancelled:
+            self._record_watch_baseline(run)
+        
+        report = None
+        if self._profile:
+            cache = dict(self.scan_index.stats) if self.scan_index else {}
+            if self.probe_cache:
+                cache.update(probe_hits=self.probe_cache.hits, probe_misses=self.probe_cache.misses)
+            self._profile.finish(cache)
+            report = self._profile.report()
+            self._profile = None
+        
+        self._update_progress(100)
+        yield ScanEvent(ScanEvent.DONE, progress=100, results=results, cancelled=cancelled, profile=report)
+
+    def _record_watch_baseline(self, run: '_ScanRun'):
+        """记录变化监视的基准，扫描结束到监视器第一次轮询之间的变化也能被发现
+
+        安装签名取自分析时的记录；目录修改时间取自扫描索引，未使用索引时由监视器在第一次轮询时确定。
+        """
+        self.watch_signatures = run.signatures()
+        self.watch_mtimes = {}
+        if self.scan_index:
+            for path in self.watch_dirs:
+                mtime = self.scan_index.recorded_mtime(path)
+                if mtime is not None:
+                    self.watch_mtimes[path] = mtime
+
+    def _run_scan(self, roots: List[ScanRoot], tree: PatternNode, run: '_ScanRun'):
+        """扫描线程入口，结束时向事件队列放入结束标记"""
+        self._root_listings = {}
+        try:
+            self._scan_roots(roots, tree, run)
+            run.wait_probes(self.prober)
         except Exception as e:
-            self.logger.error(f"加载配置文件失败: {str(e)}")
-            self.scan_config = {}  # 使用空配置
+            self.logger.error(f"扫描失败: {str(e)}")
+        finally:
+            self._root_listings = None
+            run.events.put(None)
 
-    def scan(self) -> Dict[str, List[Dict]]:
-        """扫描系统中已安装的开发工具"""
-        results = {}
-        scanned_paths = set()  # 用于记录已扫描的路径
+    def _run_quick_scan(self, run: '_ScanRun'):
+        """快速扫描线程入口，结束时向事件队列放入结束标记"""
+        try:
+            candidates = self._quick_candidates()
+            self.logger.debug(f"快速扫描候选目录: {candidates}")
+            run.plan(len(candidates))
+            self._analyze_candidates(candidates, run, (0, 0), verify=True)
+            run.wait_probes(self.prober)
+        except Exception as e:
+            self.logger.error(f"快速扫描失败: {str(e)}")
+        finally:
+            run.events.put(None)
+
+    def _quick_candidates(self) -> List[Tuple[str, List[str]]]:
+        """根据 PATH 条目、环境变量和注册表推出候选安装目录及对应的工具"""
+        pairs: List[Tuple[str, str]] = []
+        specs = sorted(self.plan.tools.values(), key=lambda spec: spec.order)
+        
+        # PATH 条目：目录中有工具的版本命令，且条目以工具的某个bin目录结尾
+        for entry in self._get_path_index().directories:
+            executables = _executable_names(entry)
+            if executables:
+                pairs.extend(self._bin_dir_candidates(entry, executables, specs))
+        
+        # 工具的环境变量（JAVA_HOME 等）以及按关键字对应到工具的其他 *_HOME 变量
+        snapshot = self.env_snapshot
+        var_tools: Dict[str, List[str]] = {}
+        for spec in specs:
+            for var in spec.env_vars:
+                var_tools.setdefault(var.upper(), []).append(spec.name)
+        for var, value in snapshot.variables.items():
+            tool_names = var_tools.get(var)
+            if not tool_names and var.endswith('_HOME'):
+                tool_names = [name for _, name in sorted(self.plan.keyword_index.search(var[:-len('_HOME')]))]
+            value = snapshot.expand(value).strip().strip('"')
+            if not tool_names or not value or os.pathsep in value or not os.path.isabs(value):
+                continue
+            for tool_name in tool_names:
+                pairs.append((value, tool_name))
+        
+        # 注册表中登记的安装
+        pairs.extend(self._registry_candidates(specs))
         
-        # 获取所有可用的磁盘驱动器
-        drives = [Path(f"{d}:\\") for d in 'ABCDEFGHIJKLMNOPQRSTUVWXYZ' 
-                 if os.path.exists(f"{d}:\\")]
+        return _group_candidates(pairs)
+
+    def _bin_dir_candidates(self, bin_dir: str, executables: set, specs: List) -> List[Tuple[str, str]]:
+        """由包含可执行文件的目录推出安装目录：目录中有工具的版本命令，且以工具的某个bin目录结尾"""
+        pairs = []
+        entry_parts = [part.lower() for part in split_path(bin_dir)]
+        for spec in specs:
+            version_cmd = spec.config.get('version_cmd')
+            if not version_cmd or version_cmd.split()[0].lower() not in executables:
+                continue
+            for bin_path in spec.bin_paths:
+                bin_parts = [part.lower() for part in split_path(bin_path)]
+                if len(bin_parts) >= len(entry_parts):
+                    continue
+                if not bin_parts or entry_parts[-len(bin_parts):] == bin_parts:
+                    install_path = bin_dir
+                    for _ in bin_parts:
+                        install_path = os.path.dirname(install_path)
+                    pairs.append((install_path, spec.name))
+        return pairs
+
+    def _registry_candidates(self, specs: List) -> List[Tuple[str, str]]:
+        """注册表中登记的安装目录及对应的工具，所有键在一次读取中枚举"""
+        if not self.use_registry:
+            return []
+        reader = self.registry_reader or default_registry_reader()
+        if reader is None:
+            return []
+        
+        findings = RegistrySource(reader).collect()
+        
+        def expand(path: str) -> str:
+            return map_registry_path(self.env_snapshot.expand(path), self.registry_drives)
         
-        self.logger.debug(f"开始扫描驱动器: {[str(d) for d in drives]}")
+        pairs: List[Tuple[str, str]] = []
+        for path, tool_name in findings.installs:
+            if tool_name in self.plan.tools:
+                pairs.append((expand(path), tool_name))
+        for path, display_name in findings.products:
+            for _, tool_name in sorted(self.plan.keyword_index.search(display_name)):
+                pairs.append((expand(path), tool_name))
+        for executable in findings.executables:
+            executable = expand(executable)
+            name = os.path.basename(executable).lower()
+            names = {name, os.path.splitext(name)[0]}
+            pairs.extend(self._bin_dir_candidates(os.path.dirname(executable), names, specs))
         
-        for tool_name, tool_config in self.scan_config.items():
-            installations = []
-            for drive in drives:
-                self.logger.debug(f"正在扫描驱动器 {drive} 中的 {tool_name}")
-                found = self._scan_tool(drive, tool_name, tool_config, scanned_paths)
-                if found:
-                    installations.extend(found)
+        pairs = [(path, tool_name) for path, tool_name in pairs if os.path.isabs(path)]
+        self.logger.debug(f"注册表中读取到 {len(findings)} 条安装信息，{len(pairs)} 个候选目录")
+        if self._profile:
+            for _, tool_name in pairs:
+                self._profile.add('tools', tool_name, 'registry_candidates')
+        return pairs
+
+    def _registry_by_root(self, roots: List[ScanRoot]) -> Dict[int, List[Tuple[str, List[str]]]]:
+        """注册表中登记的、位于扫描根目录下的候选目录，按根目录分组
+        
+        扫描的根目录可能是其他系统的镜像，根目录以外的登记与本次扫描无关。
+        """
+        specs = sorted(self.plan.tools.values(), key=lambda spec: spec.order)
+        prefixes = sorted(
+            ((os.path.normcase(os.path.normpath(str(root.path))).rstrip('\\/'), index)
+             for index, root in enumerate(roots)),
+            key=lambda item: -len(item[0])
+        )
+        grouped: Dict[int, List[Tuple[str, str]]] = {}
+        for path, tool_name in self._registry_candidates(specs):
+            key = os.path.normcase(os.path.normpath(path))
+            index = next((index for prefix, index in prefixes
+                          if key == prefix or key.startswith(prefix + os.sep)), None)
+            if index is not None:
+                grouped.setdefault(index, []).append((path, tool_name))
+        return {index: _group_candidates(pairs) for index, pairs in grouped.items()}
+
+    def _scan_roots(self, roots: List[ScanRoot], tree: PatternNode, run: '_ScanRun'):
+        """并发扫描多个根目录
+        
+        每个根目录先列举第一层，再把匹配到的每个子目录作为独立的扫描单元提交到线程池。
+        单个根目录同时运行的单元数不超过 per_root_workers 乘以根目录权重，避免慢速磁盘占满所有工作线程；
+        权重高的根目录优先提交。
+        注册表中登记在各根目录下的安装与第一层同时分析，单元序号为 -2。
+        路径模式的单元全部完成后，再按关键字在各根目录的前两层发现其余安装，已认领的目录不会重复分析。
+        发现的安装以 (根目录序号, 单元序号, 单元内序号) 为排序键，根目录第一层的单元序号为 -1，
+        关键字发现的单元序号排在路径模式的单元之后。
+        """
+        run.plan(len(roots))
+        registered = self._registry_by_root(roots) if self.use_registry else {}
+        
+        def expand_root(index: int):
+            try:
+                if run.cancelled:
+                    return [], []
+                root = roots[index]
+                states = tree.closure()
+                run.record_dir(str(root.path), states)
+                return self._in_root(index, self._expand_dir, str(root.path), states)
+            finally:
+                run.complete()
+        
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            # 并发列举各根目录的第一层
+            expanded = list(pool.map(expand_root, range(len(roots))))
             
-            if installations:
-                results[tool_name] = installations
-                
-        return results
+            registry_units = []
+            for index, candidates in sorted(registered.items()):
+                run.plan(len(candidates))
+                registry_units.append((index, pool.submit(
+                    self._in_root, index, self._analyze_candidates, candidates, run, (index, -2), True
+                )))
+            
+            pending = {}
+            first_level = []
+            for index, (candidates, subdirs) in enumerate(expanded):
+                run.plan(len(candidates) + len(subdirs))
+                first_level.append(pool.submit(
+                    self._in_root, index, self._analyze_candidates, candidates, run, (index, -1)
+                ))
+                pending[index] = deque(enumerate(subdirs))
+            
+            running = {}
+            
+            def submit_next(root_index: int):
+                if pending[root_index] and not run.cancelled:
+                    unit_index, (dir_path, nodes) = pending[root_index].popleft()
+                    future = pool.submit(self._in_root, root_index, self._scan_unit,
+                                         dir_path, nodes, run, (root_index, unit_index))
+                    running[future] = root_index
+            
+            # 按权重从高到低轮流为每个根目录提交单元，直到达到各自的并发上限
+            limits = {
+                index: max(1, round(self.per_root_workers * roots[index].weight))
+                for index in pending
+            }
+            order = sorted(pending, key=lambda index: -roots[index].weight)
+            for slot in range(max(limits.values(), default=0)):
+                for root_index in order:
+                    if slot < limits[root_index]:
+                        submit_next(root_index)
+            
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    root_index = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.logger.error(f"扫描 {roots[root_index].label} 时出错: {str(e)}")
+                    submit_next(root_index)
+            
+            for root_index, future in list(enumerate(first_level)) + registry_units:
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"扫描 {roots[root_index].label} 时出错: {str(e)}")
+            
+            if self.discover and not run.cancelled:
+                run.plan(len(roots))
+                discovery = [
+                    pool.submit(self._in_root, index, self._discover_unit, roots[index], run,
+                                (index, len(subdirs)))
+                    for index, (_, subdirs) in enumerate(expanded)
+                ]
+                for root_index, future in enumerate(discovery):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.logger.error(f"在 {roots[root_index].label} 中发现安装时出错: {str(e)}")
 
-    def _scan_tool(self, drive: Path, tool_name: str, tool_config: Dict, 
-                   scanned_paths: set) -> List[Dict]:
-        installations = []
+    def _in_root(self, root_index: int, func: Callable, *args):
+        """在扫描线程中执行属于某个根目录的工作，开启性能计数时记录该根目录的耗时"""
+        profile = self._profile
+        if not profile:
+            return func(*args)
+        profile.enter_root(root_index)
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            profile.add_root('busy_time', time.perf_counter() - start)
+            profile.leave_root()
+
+    def _scan_unit(self, dir_path: str, nodes: List[PatternNode], run: '_ScanRun', unit_key: Tuple):
+        """扫描一个子树单元，每展开一级目录就分析其中的候选目录"""
+        try:
+            for candidates in self._iter_subtree(dir_path, nodes, run.token, visit=run.record_dir):
+                run.plan(len(candidates))
+                self._analyze_candidates(candidates, run, unit_key)
+        finally:
+            run.complete()
+
+    def _discover_unit(self, root: ScanRoot, run: '_ScanRun', unit_key: Tuple):
+        """按关键字发现根目录前两层中的候选目录并分析"""
+        try:
+            candidates = self._discover_candidates(str(root.path))
+            run.plan(len(candidates))
+            self._analyze_candidates(candidates, run, unit_key, verify=True)
+        finally:
+            run.complete()
+
+    def _discover_candidates(self, root_path: str) -> List[Tuple[str, List[str]]]:
+        """列举根目录的前两层，目录名包含工具关键字的作为候选目录
+        
+        所有工具的关键字合并为一个多模式匹配索引，每个目录名只扫描一遍。
+        """
+        index = self.plan.keyword_index
+        candidates = []
+        level = [root_path]
+        for _ in range(2):
+            next_level = []
+            for dir_path in level:
+                try:
+                    names = self._list_subdirs(dir_path)
+                except OSError as e:
+                    self.logger.debug(f"无法访问目录 {dir_path}: {str(e)}")
+                    continue
+                for name in names:
+                    if name.lower() in DEFAULT_PRUNE_DIRS:
+                        continue
+                    child_path = os.path.join(dir_path, name)
+                    next_level.append(child_path)
+                    tools = sorted(index.search(name))
+                    if tools:
+                        candidates.append((child_path, [tool_name for _, tool_name in tools]))
+                        if self._profile:
+                            for _, tool_name in tools:
+                                self._profile.add('tools', tool_name, 'keyword_candidates')
+            level = next_level
+        return candidates
+
+    def _has_tool_executable(self, path: Path, tool_config: Mapping) -> bool:
+        """检查版本命令对应的可执行文件是否存在于某个bin目录中"""
+        version_cmd = tool_config.get('version_cmd')
+        if not version_cmd:
+            return True
+        name = version_cmd.split()[0]
+        return any(
+            resolve_executable(path.joinpath(*split_path(bin_path)), name)
+            for bin_path in tool_config['bin_paths']
+        )
+
+    def _analyze_candidates(self, candidates: List[Tuple[str, List[str]]], run: '_ScanRun', unit_key: Tuple,
+                            verify: bool = False):
+        """依次分析候选目录，同一目录只由第一个匹配成功的工具认领
         
+        版本探测在探测池中并发执行，这里只提交任务，探测完成后再产出安装事件。
+        同一物理目录已由排序键更小的候选发现安装时跳过；排序键更小的候选较晚到达时重新检查目录，
+        但复用已有的版本探测，只改变结果的排序键和报告的路径。
+        
+        Args:
+            verify: 候选目录只按目录名猜测时为True，要求bin目录中存在工具的可执行文件
+        """
+        for path_str, tool_names in candidates:
+            try:
+                if run.cancelled:
+                    continue
+                if self._profile:
+                    self._profile.add_root('candidates')
+                key = run.next_key(unit_key)
+                identity = path_identity(path_str) or path_str
+                if run.settled(identity, key):  # 检查路径是否已扫描
+                    continue
+                    
+                path = Path(path_str)
+                for tool_name in tool_names:
+                    if not self._should_scan_dir(tool_name, path_str):
+                        continue
+                    if verify and not self._has_tool_executable(path, self.scan_config[tool_name]):
+                        continue
+                    prepared = self._prepare_installation(
+                        path, tool_name, self.scan_config[tool_name], run, identity
+                    )
+                    if prepared:
+                        installation, probe, signature = prepared
+                        run.claim(identity, key)
+                        if self._profile:
+                            self._profile.add_root('installations')
+                            self._profile.add('tools', tool_name, 'installations')
+                        if probe:
+                            run.plan()
+                            run.expect_callback()
+                            probe.add_done_callback(
+                                lambda f, k=key, t=tool_name, i=installation, sig=signature:
+                                    self._on_probe_done(run, k, t, i, f, sig)
+                            )
+                        else:
+                            run.add_installation(key, tool_name, installation, signature)
+                        break
+            finally:
+                run.complete()
+
+    def _on_probe_done(self, run: '_ScanRun', key: Tuple, tool_name: str, installation: Installation,
+                       probe: Future, signature: List):
+        """版本探测完成后填入版本号并产出安装事件"""
         try:
-            # 排除的目录模式
-            exclude_patterns = [
-                "*demo*",
-                "*__pycache__*",
-                "*tools*",
-                "*test*",
-                "*examples*"
-            ]
-            
-            # 添加根目录Python搜索模式
-            root_patterns = ["Python*"] if tool_name == "Python" else []
-            
-            def should_scan_dir(path: str) -> bool:
-                if tool_name != "Python":
-                    return True
-                return not any(fnmatch.fnmatch(path.lower(), ex.lower()) for ex in exclude_patterns)
-            
-            # 扫描函数
-            def scan_path(path: Path):
-                if str(path) in scanned_paths:  # 检查路径是否已扫描
-                    return
-                
-                if path.is_dir() and should_scan_dir(str(path)):
-                    installation = self._analyze_installation(path, tool_name, tool_config)
-                    if installation:
-                        installations.append(installation)
-                        scanned_paths.add(str(path))  # 记录已扫描的路径
-            
-            # 扫描配置的路径
-            for path in tool_config['paths']:
-                full_path = drive / path
-                if '*' in str(path):
-                    for matched_path in drive.glob(path):
-                        scan_path(matched_path)
-                else:
-                    if full_path.exists():
-                        scan_path(full_path)
-            
-            # 扫描根目录
-            for pattern in root_patterns:
-                for matched_path in drive.glob(pattern):
-                    scan_path(matched_path)
-                        
+            self._finish_probe(installation, probe, signature)
+            run.add_installation(key, tool_name, installation, signature)
+        finally:
+            run.complete()
+            run.callback_done()
+
+    def _refresh_plan(self) -> ScanPlan:
+        """获取最新的扫描计划，配置文件未变化时直接复用已编译的计划"""
+        plan = load_scan_plan()
+        if plan is not self._plan:
+            if self._plan is not None:
+                self.logger.info("扫描配置已变化，重新编译扫描计划")
+            self._plan = plan
+            self._recommender = None
+        return plan
+
+    def _refresh_environment(self):
+        """读取环境变量快照并建立 PATH 索引"""
+        try:
+            self.env_snapshot = EnvSnapshot.capture()
         except Exception as e:
-            self.logger.error(f"扫描 {tool_name} 路径时出错: {str(e)}")
+            self.logger.error(f"读取环境变量失败: {str(e)}")
+            self.env_snapshot = EnvSnapshot(dict(os.environ), {})
+        self.path_index = PathIndex.from_snapshot(self.env_snapshot)
+        self.logger.debug(f"PATH 索引条目数: {len(self.path_index)}")
+
+    def _get_path_index(self) -> PathIndex:
+        """获取 PATH 索引，尚未扫描过时先读取环境变量"""
+        if self.path_index is None:
+            self._refresh_environment()
+        return self.path_index
+
+    def _iter_subtree(self, dir_path: str, nodes: List[PatternNode],
+                      cancel_token: Optional[ScanCancelToken] = None,
+                      visit: Optional[Callable] = None) -> Iterator[List[Tuple[str, List[str]]]]:
+        """深度优先遍历子树，每展开一级目录产出一批候选目录
+        
+        同一目录可能同时匹配多个工具的模式，因此遍历状态是一组前缀树节点，
+        保证每个目录最多被列举一次；通过联接或符号链接再次到达的同一目录不会重复展开。
+        每次列举目录前检查取消令牌。
+        
+        Args:
+            visit: 每展开一个目录前调用 visit(目录, 遍历状态)
+        """
+        stack = [(dir_path, nodes)]
+        # 以 (物理身份, 遍历状态) 记录已展开的目录，防止联接或符号链接形成的环路
+        expanded = set()
+        
+        while stack:
+            if cancel_token and cancel_token.cancelled:
+                return
+            current_path, current_nodes = stack.pop()
+            identity = path_identity(current_path)
+            if identity is None:
+                continue
+            key = (identity, states_key(current_nodes))
+            if key in expanded:
+                self.logger.debug(f"跳过重复或循环的目录: {current_path}")
+                continue
+            expanded.add(key)
+            if visit:
+                visit(current_path, current_nodes)
+            found, subdirs = self._expand_dir(current_path, current_nodes)
+            if found:
+                yield found
+            
+            # 逆序入栈以保持深度优先的目录名顺序
+            stack.extend(reversed(subdirs))
+
+    def _expand_dir(self, dir_path: str, nodes: List[PatternNode],
+                    trust_negative: bool = True) -> Tuple[List[Tuple[str, List[str]]], List[Tuple[str, List[PatternNode]]]]:
+        """展开一级目录
+        
+        Args:
+            trust_negative: 是否在信任时间内直接采用否定缓存，为False时总是确认目录修改时间
+        
+        Returns:
+            (匹配到的候选目录及工具列表, 需要继续深入的子目录及节点)
+        """
+        negative_key = None
+        if self.scan_index and self.negative_ttl is not None:
+            negative_key = self._negative_key(nodes)
+            ttl = self.negative_ttl if trust_negative else 0
+            if self.scan_index.is_negative(dir_path, negative_key, ttl):
+                if self._profile:
+                    self._profile.add_root('negative_hits')
+                    patterns = [pattern for state in nodes for pattern in _state_patterns(state)]
+                    self._profile.add_patterns(list(dict.fromkeys(patterns)), 'negative_hits')
+                return [], []
+        
+        candidates = []
+        subdirs = []
+        
+        for child_path, child_nodes in self._match_children(dir_path, nodes):
+            tools = sorted({tool for node in child_nodes for tool in node.tools})
+            if tools:
+                candidates.append((child_path, [name for _, name in tools]))
             
-        return installations
+            descend = merge_states([node for node in child_nodes if node.has_children()])
+            if descend:
+                subdirs.append((child_path, descend))
+        
+        if negative_key is not None and not candidates and not subdirs:
+            self.scan_index.put_negative(dir_path, negative_key)
+                
+        return candidates, subdirs
+
+    def _negative_key(self, nodes: List[PatternNode]) -> str:
+        """遍历状态在否定缓存中的键，由节点序号组成，与顺序无关"""
+        return ','.join(f"{i}:{depth}" for i, depth in sorted(self.plan.encode_states(nodes)))
 
-    def _analyze_installation(self, path: Path, tool_name: str, tool_config: Dict) -> Optional[Dict]:
-        """分析工具安装并返回详细信息"""
+    def _match_children(self, dir_path: str, nodes: List[PatternNode]) -> List[Tuple[str, List[PatternNode]]]:
+        """匹配目录下符合任一节点模式的子目录"""
+        matched = {}
+        profile = self._profile
+        
+        try:
+            if any(node.needs_listing() for node in nodes):
+                # 存在通配符时列举一次目录，同时匹配所有模式
+                listed = profile.fs_calls('dirs_listed') if profile else 0
+                names = self._list_subdirs(dir_path)
+                if profile and profile.fs_calls('dirs_listed') > listed:
+                    profile.add_patterns(_listing_patterns(nodes), 'dirs_listed')
+                for name in names:
+                    name_lower = name.lower()
+                    for node in nodes:
+                        for child in node.match(name_lower):
+                            matched.setdefault(os.path.join(dir_path, name), []).append(child)
+                            if profile:
+                                profile.add_patterns(_state_patterns(child), 'matches')
+            else:
+                # 只有固定名称时直接检查目标目录，无需列举
+                for node in nodes:
+                    for segment, child in node.literal_items():
+                        child_path = os.path.join(dir_path, segment)
+                        count_fs('stat_calls')
+                        if profile:
+                            profile.add_patterns(child.patterns, 'stat_calls')
+                        if os.path.isdir(child_path):
+                            matched.setdefault(child_path, []).extend(child.closure())
+                            if profile:
+                                profile.add_patterns(child.patterns, 'matches')
+                            
+        except OSError as e:
+            self.logger.debug(f"无法访问目录 {dir_path}: {str(e)}")
+            
+        return sorted(matched.items(), key=lambda item: item[0].lower())
+
+    def _list_subdirs(self, dir_path: str) -> List[str]:
+        """列出子目录名称，启用索引时目录未变化则不重新列举
+
+        未使用索引时，完整扫描中的根目录只列举一次，遍历和关键字发现共用列举结果。
+        """
+        if self.scan_index:
+            return self.scan_index.list_subdirs(dir_path)
+
+        listings = self._root_listings
+        if listings is not None and dir_path in listings:
+            return listings[dir_path]
+        count_fs('dirs_listed')
+        with os.scandir(dir_path) as it:
+            names = sorted((entry.name for entry in it if entry.is_dir()), key=str.lower)
+        if listings is not None and dir_path in self.scan_roots:
+            listings[dir_path] = names
+        return names
+
+    def _should_scan_dir(self, tool_name: str, path: str) -> bool:
+        """检查目录是否被工具的排除规则过滤
+
+        与 ** 的剪枝一致，规则只匹配扫描根目录以下的各级目录名；不在任何根目录下的候选目录
+        （PATH 条目、环境变量等）只匹配其自身的目录名。
+        """
+        spec = self.plan.tools.get(tool_name)
+        if not spec or not spec.exclude_regex:
+            return True
+        return not any(spec.excludes(name) for name in self._names_below_root(path))
+
+    def _names_below_root(self, path: str) -> List[str]:
+        """候选目录在所属扫描根目录以下的各级目录名"""
+        path_key = os.path.normcase(path)
+        best = None
+        for root in self.scan_roots:
+            root_key = os.path.normcase(root).rstrip('\\/')
+            if path_key == root_key or path_key.startswith(root_key + os.sep) or \
+                    path_key.startswith(root_key + '/'):
+                if best is None or len(root_key) > best:
+                    best = len(root_key)
+        if best is None:
+            return [os.path.basename(path.rstrip('\\/'))]
+        return split_path(path[best:])
+
+    def _analyze_installation(self, path: Path, tool_name: str, tool_config: Mapping) -> Optional[Installation]:
+        """分析工具安装并返回详细信息（同步等待版本探测完成）"""
+        prepared = self._prepare_installation(path, tool_name, tool_config)
+        if not prepared:
+            return None
+            
+        installation, probe, signature = prepared
+        if probe:
+            self._finish_probe(installation, probe, signature)
+        return installation
+
+    def _prepare_installation(self, path: Path, tool_name: str, tool_config: Mapping,
+                              run: Optional['_ScanRun'] = None,
+                              identity=None) -> Optional[Tuple[Installation, Optional[Future], List]]:
+        """检查安装目录并生成安装信息
+        
+        版本号可以从扫描索引或版本指纹得到时直接填入；否则把版本命令提交到探测池，
+        由调用方在探测完成后通过 _finish_probe 填入版本号。扫描已取消时不再提交探测，版本号记为未知。
+        给出 run 和目录的物理身份时，同一安装在本次扫描中只探测一次。
+        
+        Returns:
+            (安装信息, 版本探测任务, 索引签名)，不是有效安装时返回None
+        """
+        profile = self._profile
+        stat_calls = profile.fs_calls('stat_calls') if profile else 0
         try:
             self.logger.debug(f"正在分析路径: {path}")
             
-            # 检查bin路径
-            bin_paths = []
-            for bin_path in tool_config['bin_paths']:
-                full_bin_path = path / bin_path
-                if full_bin_path.is_dir():
-                    bin_paths.append(str(full_bin_path))
-                    self.logger.debug(f"找到bin路径: {full_bin_path}")
+            # 检查bin路径，同时记录目录修改时间作为索引签名
+            signature, bin_paths = self._install_signature(path, tool_config)
+            if profile:
+                profile.add('tools', tool_name, 'candidates')
 
             if not bin_paths:
                 self.logger.debug(f"未在 {path} 找到有效的bin路径")
                 return None
 
-            # 获取版本信息
-            version = self._get_version(tool_name, bin_paths[0], tool_config)
-            self.logger.debug(f"获取到版本信息: {version}")
+            # 获取版本信息，安装目录未变化时使用索引中的结果，其次读取版本指纹
+            probe = None
+            cached = self.scan_index.get_install(str(path), tool_name, signature) if self.scan_index else None
+            if cached:
+                version = cached['version']
+                if profile:
+                    profile.add('tools', tool_name, 'index_hits')
+            else:
+                version = self._read_version_fingerprint(tool_name, path, tool_config)
+                if version is None:
+                    version = "未知版本"
+                    token = run.token if run else None
+                    if token is None or not token.cancelled:
+                        def submit():
+                            return self._get_prober().submit(
+                                self._probe_version, token, tool_name, bin_paths[0], tool_config
+                            )
+                        probe = run.shared_probe(identity, tool_name, submit) if run else submit()
+                else:
+                    if profile:
+                        profile.add('tools', tool_name, 'fingerprint_hits')
+                    if self.scan_index:
+                        self.scan_index.put_install(str(path), tool_name, signature, version)
             
             # 检查环境变量
             env_status = self._check_env_vars(tool_config['env_vars'], bin_paths)
             self.logger.debug(f"环境变量状态: {env_status}")
             
-            result = {
-                'name': tool_name,
-                'install_path': str(path),
-                'bin_paths': bin_paths,
-                'version': version,
-                'env_status': env_status,
-                'recommendations': self._generate_recommendations(
-                    tool_name, bin_paths, env_status
-                )
-            }
+            result = Installation(tool_name, str(path), bin_paths, version, env_status)
             
             self.logger.debug(f"分析结果: {result}")
-            return result
+            return result, probe, signature
             
         except Exception as e:
             self.logger.error(f"分析 {tool_name} 安装时出错: {str(e)}")
             return None
+        finally:
+            if profile:
+                profile.add('tools', tool_name, 'stat_calls', profile.fs_calls('stat_calls') - stat_calls)
+
+    def _install_signature(self, path: Path, tool_config: Mapping) -> Tuple[List, List[str]]:
+        """安装目录及各bin目录的修改时间签名，以及存在的bin目录"""
+        signature = [dir_mtime(str(path))]
+        bin_paths = []
+        for bin_path in tool_config['bin_paths']:
+            full_bin_path = path.joinpath(*split_path(bin_path))
+            mtime = dir_mtime(str(full_bin_path))
+            signature.append(mtime)
+            if mtime is not None:
+                bin_paths.append(str(full_bin_path))
+                self.logger.debug(f"找到bin路径: {full_bin_path}")
+        return signature, bin_paths
+
+    def install_signature(self, install_path: str, tool_name: str) -> Optional[List]:
+        """获取安装的当前签名，签名变化说明安装目录或其bin目录有修改"""
+        tool_config = self.scan_config.get(tool_name)
+        if not tool_config:
+            return None
+        return self._install_signature(Path(install_path), tool_config)[0]
+
+    def reanalyze_installation(self, install_path: str, tool_name: str) -> Optional[Installation]:
+        """重新分析一个安装，已不是有效安装时返回None"""
+        tool_config = self.scan_config.get(tool_name)
+        if not tool_config or not os.path.isdir(install_path):
+            return None
+        return self._analyze_installation(Path(install_path), tool_name, tool_config)
+
+    def rescan_dir(self, dir_path: str, nodes: List[PatternNode],
+                   visit: Optional[Callable] = None) -> List[Tuple[str, Installation]]:
+        """同步重新扫描一个目录子树，用于增量更新
+        
+        Args:
+            dir_path: 目录路径
+            nodes: 该目录在上一次扫描中的遍历状态
+            visit: 每展开一个目录前调用 visit(目录, 遍历状态)
+            
+        Returns:
+            (工具名, 安装信息) 列表
+        """
+        found = []
+        claimed = set()
+        for candidates in self._iter_subtree(dir_path, nodes, visit=visit):
+            for path_str, tool_names in candidates:
+                identity = path_identity(path_str) or path_str
+                if identity in claimed:
+                    continue
+                claimed.add(identity)
+                result = self.analyze_candidate(path_str, tool_names)
+                if result:
+                    found.append(result)
+        return found
+
+    def analyze_candidate(self, path_str: str, tool_names: List[str]) -> Optional[Tuple[str, Installation]]:
+        """同步分析一个候选目录，返回第一个匹配成功的 (工具名, 安装信息)"""
+        for tool_name in tool_names:
+            if not self._should_scan_dir(tool_name, path_str):
+                continue
+            installation = self._analyze_installation(Path(path_str), tool_name, self.scan_config[tool_name])
+            if installation:
+                return tool_name, installation
+        return None
+
+    def _probe_version(self, token: Optional[ScanCancelToken], tool_name: str, bin_path: str,
+                       tool_config: Mapping) -> str:
+        """探测池中执行的版本探测，开始执行前扫描已取消时直接返回未知版本"""
+        if token is not None and token.cancelled:
+            return "未知版本"
+        return self._get_version(tool_name, bin_path, tool_config)
+
+    def _finish_probe(self, installation: Installation, probe: Future, signature: List):
+        """等待版本探测完成，填入版本号并记录到扫描索引"""
+        try:
+            version = "未知版本" if probe.cancelled() else probe.result()
+        except Exception as e:
+            self.logger.error(f"获取{installation['name']}版本失败: {str(e)}")
+            version = "未知版本"
+            
+        installation['version'] = version
+        self.logger.debug(f"获取到版本信息: {installation['install_path']} {version}")
+        if self.scan_index and version != "未知版本":
+            self.scan_index.put_install(installation['install_path'], installation['name'], signature, version)
+
+    def _get_prober(self) -> VersionProber:
+        """获取版本探测池，首次使用时创建"""
+        with self._prober_lock:
+            if self.prober is None:
+                self.prober = VersionProber(self.probe_workers, self.probe_timeout)
+            return self.prober
+
+    def _clean_resources(self):
+        """释放扫描器占用的资源，结束所有正在执行的版本命令"""
+        with self._prober_lock:
+            if self.prober:
+                self.prober.shutdown()
+                self.prober = None
 
     def set_progress_callback(self, callback):
         """设置进度回调函数"""
@@ -163,74 +1242,112 @@ class EnvScanner:
         if self.progress_callback:
             self.progress_callback(value)
 
-    def _get_version(self, tool_name: str, bin_path: str, tool_config: Dict) -> str:
+    def _read_version_fingerprint(self, tool_name: str, install_path: Path, tool_config: Mapping) -> Optional[str]:
+        """读取安装目录中的版本指纹，无需启动进程"""
+        fingerprints = tool_config.get('fingerprints')
+        if not fingerprints:
+            return None
+            
+        version = read_fingerprint(install_path, fingerprints)
+        if version:
+            self.logger.debug(f"通过版本指纹识别 {tool_name}: {version}")
+        return version
+
+    def _get_version(self, tool_name: str, bin_path: str, tool_config: Mapping) -> str:
         """获取工具版本信息"""
         try:
             version_cmd = tool_config.get('version_cmd')
             if not version_cmd:
                 return "未知版本"
             
-            # 分割命令和参数
+            # 分割命令和参数，直接执行bin目录中的可执行文件
             cmd_parts = version_cmd.split()
-            cmd = str(Path(bin_path) / cmd_parts[0])
+            executable = resolve_executable(Path(bin_path), cmd_parts[0])
+            if not executable:
+                self.logger.debug(f"未在 {bin_path} 找到 {cmd_parts[0]}")
+                return "未知版本"
             args = cmd_parts[1:]
             
-            # 执行版本命令
-            result = subprocess.run([cmd] + args, 
-                                  capture_output=True, 
-                                  text=True, 
-                                  encoding='utf-8',
-                                  errors='ignore',
-                                  shell=True)  # 添加shell=True以处理某些特殊命令
+            # 可执行文件未变化时直接使用缓存的版本号
+            cache_key = None
+            if self.probe_cache:
+                cache_key = ProbeCache.make_key(executable)
+                if cache_key:
+                    cached = self.probe_cache.get(cache_key)
+                    if cached:
+                        if self._profile:
+                            self._profile.add('tools', tool_name, 'probe_cache_hits')
+                        return cached
             
+            # 执行版本命令，超时后结束整个进程树
+            start = time.perf_counter()
+            result = self._get_prober().run([str(executable)] + args)
+            if self._profile:
+                self._profile.add('tools', tool_name, 'probes')
+                self._profile.add('tools', tool_name, 'probe_time', time.perf_counter() - start)
+            if result.timed_out or result.aborted:
+                return "未知版本"
+            
+            version = self._parse_version(tool_name, result.stdout, result.stderr)
+            if cache_key and version != "未知版本":
+                self.probe_cache.put(cache_key, version)
+            return version
+            
+        except Exception as e:
+            self.logger.error(f"获取{tool_name}版本失败: {str(e)}")
+            return "未知版本"
+
+    def _parse_version(self, tool_name: str, stdout: str, stderr: str) -> str:
+        """从版本命令的输出中解析版本号"""
+        try:
             # 特殊处理某些工具的版本输出
             if tool_name == "Java":
                 # Java输出在stderr中，格式如: java version "1.8.0_301"
-                version_line = result.stderr.split('\n')[0] if result.stderr else ""
+                version_line = stderr.split('\n')[0] if stderr else ""
                 match = re.search(r'version "([^"]+)"', version_line)
                 return match.group(1) if match else "未知版本"
             
             elif tool_name == "Python":
                 # Python输出格式: Python 3.8.0
-                version_line = result.stdout.strip()
+                version_line = stdout.strip()
                 match = re.search(r'Python (\d+\.\d+\.\d+)', version_line)
                 return match.group(1) if match else "未知版本"
             
             elif tool_name == "Node.js":
                 # Node输出格式: v14.17.0
-                version_line = result.stdout.strip()
+                version_line = stdout.strip()
                 return version_line.lstrip('v')
             
             elif tool_name == "Git":
                 # Git输出格式: git version 2.35.1.windows.2
-                version_line = result.stdout.strip()
+                version_line = stdout.strip()
                 match = re.search(r'git version (\S+)', version_line)
                 return match.group(1) if match else "未知版本"
             
             # 其他工具尝试提取版本号
-            version_line = result.stdout.strip() or result.stderr.strip()
+            version_line = stdout.strip() or stderr.strip()
             # 尝试匹配版本号模式
             match = re.search(r'(\d+\.\d+\.\d+)', version_line)
             return match.group(1) if match else version_line.split('\n')[0]
             
         except Exception as e:
-            self.logger.error(f"获取{tool_name}版本失败: {str(e)}")
+            self.logger.error(f"解析{tool_name}版本失败: {str(e)}")
             return "未知版本"
 
     def _check_env_vars(self, env_vars: List[str], bin_paths: List[str]) -> Dict:
         """检查环境变量状态"""
         try:
             env_status = {}
-            current_env = os.environ
+            path_index = self._get_path_index()
+            snapshot = self.env_snapshot
+            # 同一安装的所有变量共享同一个 PATH 检查结果
+            in_path = any(bp in path_index for bp in bin_paths)
             
             for var in env_vars:
                 env_status[var] = {
-                    'exists': var in current_env,
-                    'value': current_env.get(var, ''),
-                    'in_path': any(
-                        bp in current_env.get('Path', '').split(';')
-                        for bp in bin_paths
-                    )
+                    'exists': var in snapshot,
+                    'value': snapshot.get(var),
+                    'in_path': in_path
                 }
             return env_status
             
@@ -238,139 +1355,15 @@ class EnvScanner:
             self.logger.error(f"检查环境变量状态失败: {str(e)}")
             return {}
 
-    def _generate_recommendations(self, tool_name: str, bin_paths: List[str], env_status: Dict) -> List[str]:
-        """生成环境配置建议"""
-        recommendations = []
+    def get_recommendations(self, installation: Installation) -> Tuple[str, ...]:
+        """获取安装的环境配置建议，首次调用时计算并保存在安装信息中
         
-        try:
-            # 获取配置文件中的建议
-            tool_config = self.scan_config.get(tool_name, {})
-            config_recommendations = tool_config.get('recommendations', [])
-            
-            # 检查环境变量
-            for var, status in env_status.items():
-                if not status['exists'] or not status['value']:
-                    var_recommendation = next(
-                        (r for r in config_recommendations if var in r),
-                        f"建议设置 {var} 环境变量"
-                    )
-                    recommendations.append(var_recommendation)
-            
-            # 检查 PATH
-            for bin_path in bin_paths:
-                if not any(bin_path in path for path in os.environ.get('Path', '').split(';')):
-                    path_recommendation = next(
-                        (r for r in config_recommendations if 'PATH' in r and bin_path in r),
-                        f"建议将 {bin_path} 添加到 PATH 环境变量"
-                    )
-                    recommendations.append(path_recommendation)
-            
-            # 添加其他配置建议
-            other_recommendations = [r for r in config_recommendations 
-                                   if not any(var in r for var in env_status.keys()) 
-                                   and 'PATH' not in r]
-            recommendations.extend(other_recommendations)
-            
-            # 去重
-            recommendations = list(dict.fromkeys(recommendations))
-            
-            if not recommendations:
-                recommendations.append("当前环境配置正常，无需调整")
-                
-            return recommendations
-                
-        except Exception as e:
-            self.logger.error(f"生成建议失败: {str(e)}")
-            return ["生成建议时发生错误"]
-
-    def _scan_wildcard_path(self, drive: Path, pattern: str, tool_name: str, tool_config: Dict) -> List[Dict]:
-        """处理通配符路径的扫描"""
-        installations = []
-        try:
-            # 确保使用相对路径模式
-            pattern = pattern.replace('\\', '/')
-            if pattern.startswith('/'):
-                pattern = pattern[1:]
-            
-            # 将驱动器路径作为基础目录
-            base_dir = drive
-            
-            if '**' in pattern:
-                # 处理递归模式
-                parts = pattern.split('**')
-                base_pattern = parts[0].rstrip('/')
-                search_pattern = parts[1].lstrip('/')
-                
-                # 先查找基础目录
-                for base_path in base_dir.glob(base_pattern):
-                    if base_path.is_dir():
-                        # 在基础目录下递归索
-                        for path in base_path.rglob(search_pattern):
-                            if path.is_dir():
-                                installation = self._analyze_installation(path, tool_name, tool_config)
-                                if installation:
-                                    installations.append(installation)
-            else:
-                # 处理简单的通配符模式
-                for path in base_dir.glob(pattern):
-                    if path.is_dir():
-                        installation = self._analyze_installation(path, tool_name, tool_config)
-                        if installation:
-                            installations.append(installation)
-                    
-        except Exception as e:
-            self.logger.error(f"通符路径扫描失败 {pattern}: {str(e)}")
-            
-        return installations
-
-    def _is_potential_tool_dir(self, dir_name: str, tool_name: str) -> bool:
-        """判断目录名是否可能是工具安装目录"""
-        dir_lower = dir_name.lower()
-        tool_lower = tool_name.lower()
-        
-        # 工具特定的关键字
-        tool_keywords = {
-            "Java": ["java", "jdk", "jre"],
-            "Python": ["python", "py"],
-            "Node.js": ["node", "npm", "nodejs"],
-            "FFmpeg": ["ffmpeg", "ff"],
-            "MySQL": ["mysql", "mariadb"],
-            "Maven": ["maven", "mvn"],
-            "Go": ["go", "golang"],
-            "Gradle": ["gradle"],
-            "Ruby": ["ruby", "rb"],
-            "PHP": ["php"],
-            "Android SDK": ["android", "sdk"],
-            "Visual Studio Code": ["vscode", "code"],
-            "Docker": ["docker"],
-            "MongoDB": ["mongodb", "mongo"],
-            "PostgreSQL": ["postgresql", "pgsql", "postgres"],
-            "Nginx": ["nginx"],
-            "Rust": ["rust", "cargo", "rustup"],
-        }
-        
-        keywords = tool_keywords.get(tool_name, [tool_lower])
-        return any(keyword in dir_lower for keyword in keywords)
-
-    def _get_ffmpeg_version(self, bin_path: Path) -> str:
-        """获取 FFmpeg 版本信息"""
-        try:
-            result = subprocess.run([str(bin_path / 'ffmpeg'), '-version'], 
-                                  capture_output=True, text=True)
-            # 只获取第一行的版本信息
-            version_line = result.stdout.split('\n')[0]
-            return version_line
-        except Exception:
-            return "未知版本"
-
-    def _get_docker_version(self, bin_path: Path) -> str:
-        """获取 Docker 版本信息"""
-        try:
-            result = subprocess.run(['docker', '--version'], 
-                                  capture_output=True, text=True, encoding='utf-8')
-            if result.returncode == 0:
-                return result.stdout.strip()
-            return "未知版本"
-        except Exception as e:
-            self.logger.error(f"获取 Docker 版本失败: {str(e)}")
-            return "未知版本"
+        建议不在扫描过程中生成，只有显示或导出结果时才需要；内容相同的建议在各安装间共享。
+        """
+        if 'recommendations' not in installation:
+            if self._recommender is None:
+                self._recommender = RecommendationEngine(self.scan_config)
+            installation['recommendations'] = self._recommender.recommend(
+                installation, self._get_path_index()
+            )
+        return installation['recommendations']
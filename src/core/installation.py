@@ -0,0 +1,139 @@
+import sys
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# 共享数据的缓存上限，超过后清空重建，避免长时间运行的监视器无限增长
+_MAX_SHARED = 4096
+
+_shared_lock = threading.Lock()
+_shared_env_status: Dict[Tuple, Mapping] = {}
+_shared_recommendations: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def share_env_status(env_status: Dict[str, Dict]) -> Mapping:
+    """返回内容相同的只读环境变量状态的共享实例
+
+    同一工具的各个安装通常只有"是否在 PATH 中"不同，环境变量状态只有少数几种取值。
+    """
+    key = tuple(
+        (sys.intern(var), status['exists'], status['value'], status['in_path'])
+        for var, status in env_status.items()
+    )
+    with _shared_lock:
+        shared = _shared_env_status.get(key)
+        if shared is None:
+            if len(_shared_env_status) >= _MAX_SHARED:
+                _shared_env_status.clear()
+            shared = MappingProxyType({
+                var: MappingProxyType({'exists': exists, 'value': value, 'in_path': in_path})
+                for var, exists, value, in_path in key
+            })
+            _shared_env_status[key] = shared
+        return shared
+
+
+def share_recommendations(recommendations: List[str]) -> Tuple[str, ...]:
+    """返回内容相同的配置建议元组的共享实例"""
+    key = tuple(recommendations)
+    with _shared_lock:
+        shared = _shared_recommendations.get(key)
+        if shared is None:
+            if len(_shared_recommendations) >= _MAX_SHARED:
+                _shared_recommendations.clear()
+            shared = _shared_recommendations[key] = key
+        return shared
+
+
+class Installation(Mapping):
+    """扫描发现的一个工具安装
+
+    使用 __slots__ 存储，环境变量状态和配置建议在同一工具的各个安装间共享只读实例。
+    同时提供只读字典接口（installation['version']、.items() 等），兼容按字典使用安装信息的代码；
+    recommendations 首次计算前不在键中。需要普通字典时（如写入 JSON）使用 to_dict()，
+    其中总是包含 recommendations。
+    """
+
+    __slots__ = ('name', 'install_path', 'bin_paths', 'version', 'env_status', 'recommendations')
+
+    _FIELDS = ('name', 'install_path', 'bin_paths', 'version', 'env_status')
+
+    def __init__(self, name: str, install_path: str, bin_paths: List[str], version: str,
+                 env_status: Dict[str, Dict], recommendations: Optional[List[str]] = None):
+        self.name = sys.intern(name)
+        self.install_path = install_path
+        self.bin_paths = tuple(bin_paths)
+        self.version = sys.intern(version)
+        self.env_status = share_env_status(env_status)
+        if recommendations is not None:
+            self.recommendations = share_recommendations(recommendations)
+
+    def _keys(self) -> Tuple[str, ...]:
+        if hasattr(self, 'recommendations'):
+            return self._FIELDS + ('recommendations',)
+        return self._FIELDS
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key: str, value):
+        """只允许更新已定义的字段，例如版本探测完成后填入版本号"""
+        if key == 'version':
+            value = sys.intern(value)
+        elif key == 'env_status':
+            value = share_env_status(value)
+        elif key == 'recommendations':
+            value = share_recommendations(value)
+        elif key == 'bin_paths':
+            value = tuple(value)
+        elif key not in self._FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __contains__(self, key) -> bool:
+        return key in self._keys()
+
+    def __repr__(self) -> str:
+        return f"Installation({self.name!r}, {self.install_path!r}, version={self.version!r})"
+
+    def __reduce__(self):
+        # 共享的只读映射不能直接序列化，按普通字典传递，接收方重新共享
+        recommendations = getattr(self, 'recommendations', None)
+        return (Installation, (self.name, self.install_path, list(self.bin_paths), self.version,
+                               self.env_status_dict(), list(recommendations) if recommendations is not None else None))
+
+    def env_status_dict(self) -> Dict[str, Dict]:
+        return {var: dict(status) for var, status in self.env_status.items()}
+
+    def to_dict(self, recommend: Optional[Callable[['Installation'], Sequence[str]]] = None) -> Dict:
+        """转换为普通字典，字段与原先的安装信息字典相同
+
+        Args:
+            recommend: 尚未计算配置建议时用于计算的函数，通常为 EnvScanner.get_recommendations；
+                未提供且尚未计算时 recommendations 为None
+        """
+        if not hasattr(self, 'recommendations') and recommend is not None:
+            self['recommendations'] = recommend(self)
+        data = {
+            'name': self.name,
+            'install_path': self.install_path,
+            'bin_paths': list(self.bin_paths),
+            'version': self.version,
+            'env_status': self.env_status_dict(),
+            'recommendations': None,
+        }
+        if hasattr(self, 'recommendations'):
+            data['recommendations'] = list(self.recommendations)
+        return data
@@ -0,0 +1,68 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class KeywordIndex:
+    """多关键字子串匹配索引（Aho-Corasick 自动机）
+
+    所有关键字构建成一个自动机，每个目录名只需扫描一遍即可找出其中包含的全部关键字，
+    耗时与关键字数量无关。关键字和待匹配文本都按小写处理。
+    """
+
+    def __init__(self, keywords: Dict[str, Iterable]):
+        """
+        Args:
+            keywords: 关键字 -> 关键字对应的值（例如工具名）
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set] = [set()]
+
+        for keyword, values in keywords.items():
+            keyword = keyword.lower()
+            if not keyword:
+                continue
+            state = 0
+            for ch in keyword:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(set())
+                state = next_state
+            self._output[state].update(values)
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        """按层次建立失败链接，并把后缀状态的输出合并到当前状态"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> Set:
+        """返回文本中出现的所有关键字对应的值"""
+        found: Set = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+    def __len__(self) -> int:
+        """自动机的状态数"""
+        return len(self._goto)
@@ -0,0 +1,146 @@
+import os
+import re
+import logging
+from typing import Dict, List, Optional
+
+try:
+    import winreg
+except ImportError:  # 非 Windows 平台没有注册表，退回到进程环境变量
+    winreg = None
+
+logger = logging.getLogger('PathIndex')
+
+SYSTEM_ENV_KEY = r"SYSTEM\CurrentControlSet\Control\Session Manager\Environment"
+USER_ENV_KEY = "Environment"
+
+_VAR_PATTERN = re.compile(r'%([^%;]+)%')
+
+
+def _read_registry_env(root, sub_key: str) -> Dict[str, str]:
+    """读取注册表中的一组环境变量，键不存在时返回空字典"""
+    env = {}
+    try:
+        with winreg.OpenKey(root, sub_key, 0, winreg.KEY_READ) as key:
+            i = 0
+            while True:
+                try:
+                    name, value, _ = winreg.EnumValue(key, i)
+                except OSError:
+                    break  # 没有更多的值可以枚举
+                if isinstance(value, str):
+                    env[name] = value
+                i += 1
+    except OSError as e:
+        logger.debug(f"读取注册表环境变量失败 {sub_key}: {str(e)}")
+    return env
+
+
+class EnvSnapshot:
+    """某一时刻的系统和用户环境变量快照
+
+    GUI 进程启动后 os.environ 不会随系统设置更新，因此每次扫描从注册表重新读取。
+    变量名不区分大小写，PATH 按 Windows 的规则由系统 PATH 与用户 PATH 拼接而成。
+    """
+
+    def __init__(self, system_env: Dict[str, str], user_env: Dict[str, str],
+                 fallback_env: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            system_env: 系统环境变量
+            user_env: 用户环境变量
+            fallback_env: 展开 %VAR% 时的兜底变量，如 SystemRoot 等不在注册表中的内置变量
+        """
+        self._fallback = {name.upper(): value for name, value in (fallback_env or {}).items()}
+        self.variables: Dict[str, str] = {}  # 大写变量名 -> 原始值
+        for env in (system_env, user_env):
+            for name, value in env.items():
+                if name.upper() != 'PATH':
+                    self.variables[name.upper()] = value
+
+        path_parts = [env[name] for env in (system_env, user_env) for name in env if name.upper() == 'PATH']
+        self.path = os.pathsep.join(part for part in path_parts if part)
+
+    @classmethod
+    def capture(cls) -> 'EnvSnapshot':
+        """从注册表读取当前的环境变量，非 Windows 平台使用进程环境变量"""
+        if winreg is None:
+            return cls(dict(os.environ), {})
+        system_env = _read_registry_env(winreg.HKEY_LOCAL_MACHINE, SYSTEM_ENV_KEY)
+        user_env = _read_registry_env(winreg.HKEY_CURRENT_USER, USER_ENV_KEY)
+        return cls(system_env, user_env, fallback_env=dict(os.environ))
+
+    def get(self, name: str, default: str = '') -> str:
+        """获取变量的原始值"""
+        return self.variables.get(name.upper(), default)
+
+    def __contains__(self, name: str) -> bool:
+        return name.upper() in self.variables
+
+    def expand(self, value: str) -> str:
+        """展开 %VAR% 形式的变量引用，无法解析的引用保持原样"""
+        def replace(match):
+            name = match.group(1).upper()
+            if name in self.variables:
+                return self.variables[name]
+            return self._fallback.get(name, match.group(0))
+
+        # 变量值本身可能引用其他变量，最多展开几层以避免循环引用
+        for _ in range(4):
+            expanded = _VAR_PATTERN.sub(replace, value)
+            if expanded == value:
+                break
+            value = expanded
+        return value
+
+
+def normalize_path_entry(entry: str) -> str:
+    """把 PATH 条目规范化为可比较的形式：去引号、统一分隔符、去掉末尾分隔符并转小写"""
+    entry = entry.strip().strip('"').strip()
+    if not entry:
+        return ''
+    entry = os.path.normpath(entry)
+    if len(entry) > 1:
+        stripped = entry.rstrip('\\/')
+        # 保留驱动器根目录的分隔符，C:\ 与 C: 含义不同
+        if stripped and not stripped.endswith(':'):
+            entry = stripped
+    return os.path.normcase(entry).casefold()
+
+
+class PathIndex:
+    """PATH 成员索引
+
+    每个条目展开变量并规范化后存入哈希表，记录其在 PATH 中第一次出现的位置，
+    成员检查和先后顺序比较都是 O(1)。
+    """
+
+    def __init__(self, entries: List[str], snapshot: Optional[EnvSnapshot] = None):
+        """
+        Args:
+            entries: PATH 中的原始条目
+            snapshot: 用于展开 %VAR% 的环境变量快照
+        """
+        self.entries = entries
+        self.directories: List[str] = []  # 展开变量后的目录，按 PATH 顺序去重
+        self._positions: Dict[str, int] = {}
+        for position, entry in enumerate(entries):
+            expanded = snapshot.expand(entry) if snapshot else entry
+            key = normalize_path_entry(expanded)
+            if key and key not in self._positions:
+                self._positions[key] = position
+                self.directories.append(os.path.normpath(expanded.strip().strip('"').strip()))
+
+    @classmethod
+    def from_snapshot(cls, snapshot: EnvSnapshot) -> 'PathIndex':
+        """根据环境变量快照中的 PATH 建立索引"""
+        return cls(snapshot.path.split(os.pathsep), snapshot)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, path: str) -> bool:
+        return normalize_path_entry(path) in self._positions
+
+    def position(self, path: str) -> Optional[int]:
+        """返回路径在 PATH 中第一次出现的位置，不在 PATH 中时返回None"""
+        return self._positions.get(normalize_path_entry(path))
@@ -0,0 +1,83 @@
+import logging
+from typing import Dict, List, Mapping, Optional
+
+from src.core.path_index import PathIndex
+
+logger = logging.getLogger('Recommendations')
+
+DEFAULT_OK = "当前环境配置正常，无需调整"
+
+
+class _ToolRecommendations:
+    """单个工具按用途索引后的配置建议"""
+
+    def __init__(self, env_vars: List[str], recommendations: List[str]):
+        self.recommendations = recommendations
+        # 环境变量 -> 第一条提到该变量的建议
+        self.by_var: Dict[str, Optional[str]] = {
+            var: next((r for r in recommendations if var in r), None) for var in env_vars
+        }
+        # 提到 PATH 的建议，数量很少，按 bin 目录匹配时顺序查找
+        self.path_rules: List[str] = [r for r in recommendations if 'PATH' in r]
+        # 与环境变量和 PATH 都无关的通用建议
+        self.general: List[str] = [
+            r for r in recommendations
+            if 'PATH' not in r and not any(var in r for var in env_vars)
+        ]
+
+    def for_var(self, var: str) -> str:
+        if var not in self.by_var:
+            self.by_var[var] = next((r for r in self.recommendations if var in r), None)
+        return self.by_var[var] or f"建议设置 {var} 环境变量"
+
+    def for_bin_path(self, bin_path: str) -> str:
+        return next(
+            (r for r in self.path_rules if bin_path in r),
+            f"建议将 {bin_path} 添加到 PATH 环境变量"
+        )
+
+
+class RecommendationEngine:
+    """环境配置建议引擎
+
+    配置中的建议按环境变量和 PATH 规则建立一次索引，具体某个安装的建议只在显示或导出时计算。
+    """
+
+    def __init__(self, scan_config: Mapping[str, Mapping]):
+        self._tools: Dict[str, _ToolRecommendations] = {}
+        for tool_name, tool_config in scan_config.items():
+            self._tools[tool_name] = _ToolRecommendations(
+                tool_config.get('env_vars', []),
+                tool_config.get('recommendations', [])
+            )
+
+    def recommend(self, installation: Dict, path_index: PathIndex) -> List[str]:
+        """为一个安装生成配置建议
+
+        Args:
+            installation: 扫描结果中的安装信息
+            path_index: 当前的 PATH 索引
+        """
+        try:
+            tool = self._tools.get(installation['name']) or _ToolRecommendations([], [])
+            recommendations = []
+
+            # 检查环境变量
+            for var, status in installation['env_status'].items():
+                if not status['exists'] or not status['value']:
+                    recommendations.append(tool.for_var(var))
+
+            # 检查 PATH
+            for bin_path in installation['bin_paths']:
+                if bin_path not in path_index:
+                    recommendations.append(tool.for_bin_path(bin_path))
+
+            # 添加其他配置建议，去重
+            recommendations.extend(tool.general)
+            recommendations = list(dict.fromkeys(recommendations))
+
+            return recommendations or [DEFAULT_OK]
+
+        except Exception as e:
+            logger.error(f"生成建议失败: {str(e)}")
+            return ["生成建议时发生错误"]
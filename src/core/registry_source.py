@@ -0,0 +1,242 @@
+import re
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import winreg
+except ImportError:  # 非 Windows 平台没有注册表，只能使用 MemoryRegistryReader
+    winreg = None
+
+logger = logging.getLogger('RegistrySource')
+
+HKLM = 'HKEY_LOCAL_MACHINE'
+HKCU = 'HKEY_CURRENT_USER'
+
+# 已安装程序列表，64 位系统上 32 位程序登记在 WOW6432Node 下
+UNINSTALL_KEYS = [
+    HKLM + r'\SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall',
+    HKLM + r'\SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall',
+    HKCU + r'\SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall',
+]
+
+# 可执行文件名 -> 完整路径，默认值为可执行文件路径
+APP_PATHS_KEYS = [
+    HKLM + r'\SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths',
+    HKCU + r'\SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths',
+]
+
+# 厂商登记的安装目录: (工具名, 键, 版本子键下的子键, 值名)
+# 版本子键下的子键为None时直接读取键本身的值，否则枚举键下的每个版本子键
+VENDOR_KEYS: List[Tuple[str, str, Optional[str], str]] = [
+    ('Java', HKLM + r'\SOFTWARE\JavaSoft\JDK', '', 'JavaHome'),
+    ('Java', HKLM + r'\SOFTWARE\JavaSoft\Java Development Kit', '', 'JavaHome'),
+    ('Java', HKLM + r'\SOFTWARE\JavaSoft\JRE', '', 'JavaHome'),
+    ('Java', HKLM + r'\SOFTWARE\JavaSoft\Java Runtime Environment', '', 'JavaHome'),
+    ('Java', HKLM + r'\SOFTWARE\WOW6432Node\JavaSoft\Java Development Kit', '', 'JavaHome'),
+    ('Java', HKLM + r'\SOFTWARE\WOW6432Node\JavaSoft\Java Runtime Environment', '', 'JavaHome'),
+    ('Python', HKLM + r'\SOFTWARE\Python\PythonCore', 'InstallPath', ''),
+    ('Python', HKLM + r'\SOFTWARE\WOW6432Node\Python\PythonCore', 'InstallPath', ''),
+    ('Python', HKCU + r'\SOFTWARE\Python\PythonCore', 'InstallPath', ''),
+    ('Git', HKLM + r'\SOFTWARE\GitForWindows', None, 'InstallPath'),
+]
+
+_ICON_INDEX = re.compile(r',\s*-?\d+$')
+
+
+class RegistryReader:
+    """注册表读取接口
+
+    键用完整路径表示，例如 HKEY_LOCAL_MACHINE\\SOFTWARE\\JavaSoft，不区分大小写；
+    默认值的值名为空字符串。键不存在或无权访问时返回空结果。
+    """
+
+    def subkeys(self, key: str) -> List[str]:
+        raise NotImplementedError
+
+    def values(self, key: str) -> Dict[str, object]:
+        raise NotImplementedError
+
+
+class WinRegistryReader(RegistryReader):
+    """通过 winreg 读取本机注册表，始终使用 64 位视图"""
+
+    def _open(self, key: str):
+        hive, _, sub_key = key.partition('\\')
+        root = {HKLM: winreg.HKEY_LOCAL_MACHINE, HKCU: winreg.HKEY_CURRENT_USER}[hive.upper()]
+        return winreg.OpenKey(root, sub_key, 0, winreg.KEY_READ | winreg.KEY_WOW64_64KEY)
+
+    def subkeys(self, key: str) -> List[str]:
+        names = []
+        try:
+            with self._open(key) as handle:
+                i = 0
+                while True:
+                    try:
+                        names.append(winreg.EnumKey(handle, i))
+                    except OSError:
+                        break  # 没有更多的子键可以枚举
+                    i += 1
+        except OSError as e:
+            logger.debug(f"无法读取注册表键 {key}: {str(e)}")
+        return names
+
+    def values(self, key: str) -> Dict[str, object]:
+        values = {}
+        try:
+            with self._open(key) as handle:
+                i = 0
+                while True:
+                    try:
+                        name, value, _ = winreg.EnumValue(handle, i)
+                    except OSError:
+                        break  # 没有更多的值可以枚举
+                    values[name] = value
+                    i += 1
+        except OSError as e:
+            logger.debug(f"无法读取注册表键 {key}: {str(e)}")
+        return values
+
+
+class MemoryRegistryReader(RegistryReader):
+    """内存中的注册表，用于在非 Windows 平台上测试或分析导出的注册表
+
+    数据格式为 {完整键路径: {值名: 值}}，中间层的键可以省略。
+    """
+
+    def __init__(self, keys: Dict[str, Dict[str, object]]):
+        self._values: Dict[str, Dict[str, object]] = {}
+        self._children: Dict[str, Dict[str, str]] = {}
+        for key, values in keys.items():
+            parts = [part for part in key.split('\\') if part]
+            self._values.setdefault('\\'.join(parts).lower(), {}).update(values or {})
+            for depth in range(1, len(parts)):
+                parent = '\\'.join(parts[:depth]).lower()
+                self._children.setdefault(parent, {}).setdefault(parts[depth].lower(), parts[depth])
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> 'MemoryRegistryReader':
+        """从 JSON 文件读取注册表数据"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def subkeys(self, key: str) -> List[str]:
+        return list(self._children.get(key.strip('\\').lower(), {}).values())
+
+    def values(self, key: str) -> Dict[str, object]:
+        return dict(self._values.get(key.strip('\\').lower(), {}))
+
+
+def default_registry_reader() -> Optional[RegistryReader]:
+    """本机注册表的读取器，非 Windows 平台返回None"""
+    return WinRegistryReader() if winreg is not None else None
+
+
+_DRIVE_PATH = re.compile(r'^([A-Za-z]):(?:[\\/]+|$)')
+
+
+def map_registry_path(path: str, drives: Dict[str, str]) -> str:
+    """把登记的 Windows 路径映射到本地目录，用于分析挂载的系统镜像
+
+    Args:
+        path: 注册表中的路径，例如 C:\\Program Files\\Java\\jdk-17
+        drives: 盘符 -> 本地目录，例如 {'C': '/mnt/image1'}；盘符不在其中时原样返回
+    """
+    match = _DRIVE_PATH.match(path)
+    if not match:
+        return path
+    target = drives.get(match.group(1).upper())
+    if target is None:
+        return path
+    rest = [part for part in re.split(r'[\\/]+', path[match.end():]) if part]
+    return str(Path(target).joinpath(*rest))
+
+
+def parse_drive_mapping(entries: List[str]) -> Dict[str, str]:
+    """解析 C=/mnt/image1 形式的盘符映射，格式错误时抛出 ValueError"""
+    drives = {}
+    for entry in entries:
+        letter, sep, target = entry.partition('=')
+        letter = letter.strip().rstrip(':')
+        if not sep or len(letter) != 1 or not letter.isalpha() or not target:
+            raise ValueError(f"无效的盘符映射: {entry}")
+        drives[letter.upper()] = target
+    return drives
+
+
+def _clean_path(value) -> str:
+    """去掉路径两端的引号和图标序号，非字符串返回空字符串"""
+    if not isinstance(value, str):
+        return ''
+    value = _ICON_INDEX.sub('', value.strip()).strip().strip('"').strip()
+    return value
+
+
+class RegistryFindings:
+    """一次注册表读取的结果
+
+    installs:    (安装目录, 工具名)，来自 JavaSoft、PythonCore 等厂商键，工具已确定
+    products:    (安装目录, 显示名称)，来自卸载信息，按显示名称中的关键字对应到工具
+    executables: 可执行文件路径，来自 App Paths 和卸载信息中的图标
+    """
+
+    def __init__(self):
+        self.installs: List[Tuple[str, str]] = []
+        self.products: List[Tuple[str, str]] = []
+        self.executables: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.installs) + len(self.products) + len(self.executables)
+
+
+class RegistrySource:
+    """从注册表中登记的安装信息发现候选安装目录
+
+    依次读取卸载信息、App Paths 和厂商键，每个键只枚举一次。路径中的 %VAR% 由调用方展开。
+    """
+
+    def __init__(self, reader: RegistryReader):
+        self.reader = reader
+
+    def collect(self) -> RegistryFindings:
+        findings = RegistryFindings()
+        try:
+            self._read_uninstall(findings)
+            self._read_app_paths(findings)
+            self._read_vendor_keys(findings)
+        except Exception as e:
+            logger.error(f"读取注册表安装信息失败: {str(e)}")
+        return findings
+
+    def _read_uninstall(self, findings: RegistryFindings):
+        for base in UNINSTALL_KEYS:
+            for name in self.reader.subkeys(base):
+                values = self.reader.values(f"{base}\\{name}")
+                display_name = values.get('DisplayName')
+                if not isinstance(display_name, str) or not display_name:
+                    continue
+                location = _clean_path(values.get('InstallLocation'))
+                if location:
+                    findings.products.append((location, display_name))
+                icon = _clean_path(values.get('DisplayIcon'))
+                if icon.lower().endswith('.exe'):
+                    findings.executables.append(icon)
+
+    def _read_app_paths(self, findings: RegistryFindings):
+        for base in APP_PATHS_KEYS:
+            for name in self.reader.subkeys(base):
+                executable = _clean_path(self.reader.values(f"{base}\\{name}").get(''))
+                if executable:
+                    findings.executables.append(executable)
+
+    def _read_vendor_keys(self, findings: RegistryFindings):
+        for tool_name, base, sub_key, value_name in VENDOR_KEYS:
+            if sub_key is None:
+                keys = [base]
+            else:
+                keys = [f"{base}\\{version}\\{sub_key}".rstrip('\\') for version in self.reader.subkeys(base)]
+            for key in keys:
+                path = _clean_path(self.reader.values(key).get(value_name))
+                if path:
+                    findings.installs.append((path, tool_name))
@@ -0,0 +1,279 @@
+import os
+import stat
+import json
+import logging
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.core.scan_profile import count_fs
+
+# 索引文件格式版本，格式变化时旧索引直接作废
+INDEX_VERSION = 1
+
+
+def default_index_path() -> Path:
+    """默认的扫描索引文件路径"""
+    return Path.home() / '.env_manager' / 'scan_index.json'
+
+
+def dir_mtime(path: str) -> Optional[int]:
+    """获取目录的修改时间（纳秒），不是目录或无法访问时返回None"""
+    count_fs('stat_calls')
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode):
+        return None
+    return st.st_mtime_ns
+
+
+def path_identity(path: str) -> Optional[Tuple]:
+    """路径的物理身份，经过符号链接和目录联接解析后的 (st_dev, st_ino)
+    
+    同一个目录通过联接、符号链接或不同大小写访问时身份相同。文件系统不提供文件ID时，
+    退回为规范化的真实路径。路径不存在时返回None。
+    """
+    count_fs('stat_calls')
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if st.st_ino:
+        return (st.st_dev, st.st_ino)
+    return ('path', os.path.normcase(os.path.realpath(path)))
+
+
+class ScanIndex:
+    """持久化的增量扫描索引
+
+    记录每个已访问目录的修改时间及其子目录列表，以及每个安装目录的分析结果。
+    目录修改时间未变化时直接复用子目录列表，安装目录及其bin目录均未变化时复用版本信息。
+
+    另有一份否定缓存，记录在某个目录下没有匹配到任何子目录的遍历状态。在信任时间内
+    直接跳过这些组合，超时后只需比较目录修改时间即可继续沿用。否定缓存的键依赖扫描计划
+    的节点序号，计划变化时整体作废。
+    """
+
+    def __init__(self, index_path: Optional[Path] = None):
+        self.logger = logging.getLogger('ScanIndex')
+        self.index_path = Path(index_path) if index_path else default_index_path()
+        self._lock = threading.Lock()
+        self._dirs: Dict[str, Dict] = {}
+        self._installs: Dict[str, Dict] = {}
+        self._negatives: Dict[str, Dict] = {}
+        self._plan: Optional[str] = None
+        self._touched_dirs = set()
+        self._touched_installs = set()
+        self._touched_negatives = set()
+        # 最近一次加载或保存时索引文件的修改时间
+        self._loaded_stamp: Optional[int] = None
+        # 本轮扫描中目录列表、安装分析结果和否定缓存的命中次数
+        self.stats: Dict[str, int] = {}
+        self.load()
+
+    def _file_stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read_file(self) -> Optional[Dict]:
+        """读取磁盘上的索引，文件不存在、版本不匹配或损坏时返回None"""
+        try:
+            if not self.index_path.exists():
+                return None
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_VERSION:
+                self.logger.info("扫描索引版本不匹配，将重新建立索引")
+                return None
+            return data
+        except Exception as e:
+            self.logger.error(f"加载扫描索引失败: {str(e)}")
+            return None
+
+    def load(self):
+        """从磁盘加载索引"""
+        stamp = self._file_stamp()
+        data = self._read_file() or {}
+        with self._lock:
+            self._dirs = data.get('dirs', {})
+            self._installs = data.get('installs', {})
+            self._negatives = data.get('negatives', {})
+            self._plan = data.get('plan')
+            self._loaded_stamp = stamp
+
+    def save(self, prune: bool = True):
+        """保存索引到磁盘
+
+        同一个索引文件可能同时被扫描进程和界面进程使用。文件在加载之后被其他进程改写时，
+        本次扫描未访问的条目以磁盘上的为准，避免用过期的内存数据覆盖其他进程的结果。
+
+        Args:
+            prune: 是否丢弃本次扫描未访问到的条目
+        """
+        try:
+            disk = None
+            if not prune and self._file_stamp() != self._loaded_stamp:
+                disk = self._read_file()
+
+            with self._lock:
+                sections = {}
+                for name, entries, touched in (('dirs', self._dirs, self._touched_dirs),
+                                               ('installs', self._installs, self._touched_installs),
+                                               ('negatives', self._negatives, self._touched_negatives)):
+                    if prune:
+                        sections[name] = {k: v for k, v in entries.items() if k in touched}
+                        continue
+                    base = entries
+                    if disk is not None and (name != 'negatives' or disk.get('plan') == self._plan):
+                        base = disk.get(name, {})
+                    merged = dict(base)
+                    merged.update((k, entries[k]) for k in touched if k in entries)
+                    sections[name] = merged
+                data = dict(sections, version=INDEX_VERSION, plan=self._plan)
+
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+
+            with self._lock:
+                self._dirs = sections['dirs']
+                self._installs = sections['installs']
+                self._negatives = sections['negatives']
+                self._loaded_stamp = self._file_stamp()
+        except Exception as e:
+            self.logger.error(f"保存扫描索引失败: {str(e)}")
+
+    def begin_scan(self):
+        """开始新一轮扫描，重置访问记录；索引文件已被其他进程改写时重新加载"""
+        if self._file_stamp() != self._loaded_stamp:
+            self.load()
+        with self._lock:
+            self._touched_dirs = set()
+            self._touched_installs = set()
+            self._touched_negatives = set()
+            self.stats = {'dir_hits': 0, 'dir_misses': 0, 'install_hits': 0, 'install_misses': 0,
+                          'negative_hits': 0}
+
+    def set_plan(self, fingerprint: str):
+        """设置当前扫描计划的标识，与索引中记录的不同时清空否定缓存"""
+        with self._lock:
+            if self._plan != fingerprint:
+                self._negatives = {}
+                self._plan = fingerprint
+
+    def list_subdirs(self, dir_path: str) -> List[str]:
+        """列出目录下的子目录名称，目录未变化时直接使用索引中的记录"""
+        mtime = dir_mtime(dir_path)
+        if mtime is None:
+            return []
+
+        with self._lock:
+            self._touched_dirs.add(dir_path)
+            entry = self._dirs.get(dir_path)
+            if entry and entry['mtime'] == mtime:
+                self._count('dir_hits')
+                return entry['subdirs']
+            self._count('dir_misses')
+
+        subdirs = []
+        count_fs('dirs_listed')
+        try:
+            with os.scandir(dir_path) as it:
+                subdirs = sorted(
+                    (entry.name for entry in it if entry.is_dir()),
+                    key=str.lower
+                )
+        except OSError as e:
+            self.logger.debug(f"无法列举目录 {dir_path}: {str(e)}")
+            return []
+
+        with self._lock:
+            self._dirs[dir_path] = {'mtime': mtime, 'subdirs': subdirs}
+        return subdirs
+
+    def recorded_mtime(self, dir_path: str) -> Optional[int]:
+        """索引中记录的目录修改时间，没有记录时返回None"""
+        with self._lock:
+            entry = self._dirs.get(dir_path)
+            return entry['mtime'] if entry else None
+
+    def get_install(self, install_path: str, tool_name: str, signature: List) -> Optional[Dict]:
+        """获取安装目录的缓存分析结果，签名不一致时返回None"""
+        key = f"{tool_name}|{install_path}"
+        with self._lock:
+            entry = self._installs.get(key)
+            if entry is None or entry['signature'] != signature:
+                self._count('install_misses')
+                return None
+            self._count('install_hits')
+            self._touched_installs.add(key)
+            return entry
+
+    def _count(self, field: str):
+        # 调用方已持有锁
+        self.stats[field] = self.stats.get(field, 0) + 1
+
+    def put_install(self, install_path: str, tool_name: str, signature: List, version: str):
+        """记录安装目录的分析结果"""
+        key = f"{tool_name}|{install_path}"
+        with self._lock:
+            self._installs[key] = {'signature': signature, 'version': version}
+            self._touched_installs.add(key)
+
+    def is_negative(self, dir_path: str, key: str, ttl: float) -> bool:
+        """检查遍历状态在目录下是否已知没有匹配
+
+        记录未超过信任时间时不访问文件系统；超时后比较目录修改时间，未变化则续期，
+        变化则丢弃该目录的全部否定记录。
+
+        Args:
+            key: 遍历状态的编码
+            ttl: 信任时间（秒），为0时每次都比较目录修改时间
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._negatives.get(dir_path)
+            if entry is None or key not in entry['keys']:
+                return False
+            if now - entry['checked'] < ttl:
+                self._touched_negatives.add(dir_path)
+                self._count('negative_hits')
+                return True
+
+        mtime = dir_mtime(dir_path)
+        with self._lock:
+            if self._negatives.get(dir_path) is not entry:
+                return False
+            if mtime is None or mtime != entry['mtime']:
+                del self._negatives[dir_path]
+                return False
+            entry['checked'] = now
+            self._touched_negatives.add(dir_path)
+            self._count('negative_hits')
+            return True
+
+    def put_negative(self, dir_path: str, key: str):
+        """记录遍历状态在目录下没有匹配到任何子目录
+
+        本轮扫描列举过该目录时使用列举时的修改时间，避免记录列举之后才发生的变化。
+        """
+        with self._lock:
+            listed = self._dirs.get(dir_path) if dir_path in self._touched_dirs else None
+        mtime = listed['mtime'] if listed else dir_mtime(dir_path)
+        if mtime is None:
+            return
+        with self._lock:
+            entry = self._negatives.get(dir_path)
+            if entry is None or entry['mtime'] != mtime:
+                entry = {'mtime': mtime, 'checked': time.time(), 'keys': []}
+                self._negatives[dir_path] = entry
+            if key not in entry['keys']:
+                entry['keys'].append(key)
+            self._touched_negatives.add(dir_path)
@@ -0,0 +1,615 @@
+import os
+import re
+import hashlib
+import json
+import logging
+import threading
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+from src.utils.resource import resource_path
+from src.core.keyword_index import KeywordIndex
+
+logger = logging.getLogger('ScanPlan')
+
+# 递归段，匹配零到多级目录
+RECURSIVE_SEGMENT = '**'
+# 递归段下总是跳过的目录
+DEFAULT_PRUNE_DIRS = ['node_modules', '__pycache__', '.git']
+# 工具未配置 max_depth 时递归段最多匹配的目录层数
+DEFAULT_MAX_DEPTH = 4
+
+_WILDCARD_CHARS = '*?['
+
+# 工具配置的字段: 字段名 -> (取值类型, 是否必需, 缺省值)，缺省值为None的字段不补全
+TOOL_SCHEMA: Dict[str, Tuple[str, bool, object]] = {
+    'paths': ('path_list', True, None),
+    'bin_paths': ('str_list', True, None),
+    'env_vars': ('str_list', False, []),
+    'recommendations': ('str_list', False, []),
+    'exclude_patterns': ('glob_list', False, []),
+    'keywords': ('str_list', False, None),
+    'version_cmd': ('str', False, None),
+    'max_depth': ('depth', False, DEFAULT_MAX_DEPTH),
+    'fingerprints': ('fingerprints', False, []),
+}
+
+
+def split_path(pattern: str) -> List[str]:
+    """按 Windows 或 POSIX 分隔符拆分路径模式"""
+    return [part for part in re.split(r'[\\/]+', pattern) if part]
+
+
+def glob_to_regex(pattern: str) -> str:
+    """把通配符模式转换为不带锚点和全局标志的正则片段，便于合并到一个正则中
+
+    字符集合的规则与 fnmatch.translate 相同：没有闭合的 '[' 按普通字符处理，
+    紧跟在 '[' 或 '[!' 之后的 ']' 属于集合内容，反向的字符范围被丢弃。
+    """
+    parts = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        ch = pattern[i]
+        i += 1
+        if ch == '*':
+            parts.append('.*')
+        elif ch == '?':
+            parts.append('.')
+        elif ch == '[':
+            j = i
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                parts.append('\\[')
+                continue
+            parts.append(_bracket_to_regex(pattern, i, j))
+            i = j + 1
+        else:
+            parts.append(re.escape(ch))
+    return ''.join(parts)
+
+
+def _bracket_to_regex(pattern: str, start: int, end: int) -> str:
+    """转换 pattern[start:end] 中的字符集合内容"""
+    body = pattern[start:end]
+    if '-' not in body:
+        body = body.replace('\\', '\\\\')
+    else:
+        # 按范围连字符切分，去掉反向的范围，其余连字符和反斜杠按普通字符转义
+        chunks = []
+        k = start + 2 if pattern[start] == '!' else start + 1
+        while True:
+            k = pattern.find('-', k, end)
+            if k < 0:
+                break
+            chunks.append(pattern[start:k])
+            start = k + 1
+            k = k + 3
+        chunk = pattern[start:end]
+        if chunk:
+            chunks.append(chunk)
+        else:
+            chunks[-1] += '-'
+        for k in range(len(chunks) - 1, 0, -1):
+            if chunks[k - 1][-1] > chunks[k][0]:
+                chunks[k - 1] = chunks[k - 1][:-1] + chunks[k][1:]
+                del chunks[k]
+        body = '-'.join(chunk.replace('\\', '\\\\').replace('-', '\\-') for chunk in chunks)
+    # 转义正则中的集合运算符号
+    body = re.sub(r'([&~|])', r'\\\1', body)
+    if not body:
+        # 空集合不匹配任何字符
+        return '(?!)'
+    if body == '!':
+        # 取反的空集合匹配任意字符
+        return '.'
+    if body[0] == '!':
+        body = '^' + body[1:]
+    elif body[0] in ('^', '['):
+        body = '\\' + body
+    return f'[{body}]'
+
+
+def compile_glob(pattern: str) -> Callable[[str], bool]:
+    """把小写的通配符模式编译为最快的匹配函数
+
+    常见形式直接使用字符串比较：
+        abc     -> 相等
+        abc*    -> startswith
+        *abc    -> endswith
+        *abc*   -> 子串
+    其余形式使用编译后的正则。
+    """
+    body = pattern.strip('*')
+    if not any(ch in body for ch in _WILDCARD_CHARS):
+        leading = pattern.startswith('*')
+        trailing = pattern.endswith('*')
+        if not leading and not trailing:
+            return lambda name: name == body
+        if not leading:
+            return lambda name: name.startswith(body)
+        if not trailing:
+            return lambda name: name.endswith(body)
+        return lambda name: body in name
+
+    regex = re.compile(glob_to_regex(pattern) + '\\Z', re.DOTALL)
+    return lambda name: regex.match(name) is not None
+
+
+def _literal_affixes(pattern: str) -> Tuple[str, str]:
+    """返回模式中第一个通配符之前和最后一个通配符之后的固定部分"""
+    first = min((pattern.index(ch) for ch in _WILDCARD_CHARS if ch in pattern), default=len(pattern))
+    last = max((pattern.rindex(ch) for ch in _WILDCARD_CHARS if ch in pattern), default=-1)
+    suffix = pattern[last + 1:] if last >= 0 else ''
+    # '[' 开头的字符集合不计入后缀
+    if ']' in suffix:
+        suffix = suffix[suffix.rindex(']') + 1:]
+    return pattern[:first], suffix
+
+
+def _may_overlap(a: str, b: str) -> bool:
+    """保守判断两个通配符模式是否可能匹配同一个名称"""
+    prefix_a, suffix_a = _literal_affixes(a)
+    prefix_b, suffix_b = _literal_affixes(b)
+    prefix_ok = prefix_a.startswith(prefix_b) or prefix_b.startswith(prefix_a)
+    suffix_ok = suffix_a.endswith(suffix_b) or suffix_b.endswith(suffix_a)
+    return prefix_ok and suffix_ok
+
+
+class PatternNode:
+    """路径模式前缀树节点，每个节点对应模式中的一级目录
+
+    固定名称的子节点用字典查找；所有通配符子节点合并为一个正则，
+    每个目录名只需一次正则调用即可确定匹配的子节点。
+    ** 段单独保存为 recursive 子节点，遍历时由 RecursiveState 记录已匹配的层数。
+    """
+
+    def __init__(self):
+        self.literals: Dict[str, Tuple[str, 'PatternNode']] = {}  # 小写名称 -> (原始名称, 子节点)
+        self.wildcards: List[Tuple[str, Callable[[str], bool], 'PatternNode']] = []
+        self.tools: List[Tuple[int, str]] = []  # (配置顺序, 工具名)
+        self.patterns: List[str] = []  # 经过此节点的原始路径模式
+        self.recursive: Optional['PatternNode'] = None  # ** 段之后的模式
+        self.max_depth = DEFAULT_MAX_DEPTH  # 作为 ** 节点时最多匹配的目录层数
+        self._prune = None
+        self._combined = None
+        self._overlapping = False
+
+    def child(self, segment: str) -> 'PatternNode':
+        """获取或创建模式段对应的子节点"""
+        if segment == RECURSIVE_SEGMENT:
+            if self.recursive is None:
+                self.recursive = PatternNode()
+            return self.recursive
+
+        key = segment.lower()
+        if not any(ch in segment for ch in _WILDCARD_CHARS):
+            if key not in self.literals:
+                self.literals[key] = (segment, PatternNode())
+            return self.literals[key][1]
+
+        for existing, _, node in self.wildcards:
+            if existing == key:
+                return node
+        node = PatternNode()
+        self.wildcards.append((key, compile_glob(key), node))
+        return node
+
+    def finalize(self, tools: Dict[str, 'ToolSpec']):
+        """编译合并后的通配符正则，递归处理所有子节点
+
+        Args:
+            tools: 工具名 -> 工具配置，用于确定 ** 节点的深度上限和剪枝规则
+        """
+        if self.wildcards:
+            alternatives = '|'.join(
+                f"(?P<w{i}>{glob_to_regex(key)})"
+                for i, (key, _, _) in enumerate(self.wildcards)
+            )
+            self._combined = re.compile(f"(?:{alternatives})\\Z", re.DOTALL)
+            keys = [key for key, _, _ in self.wildcards]
+            self._overlapping = any(
+                _may_overlap(keys[i], keys[j])
+                for i in range(len(keys)) for j in range(i + 1, len(keys))
+            )
+        for _, node in self.literals.values():
+            node.finalize(tools)
+        for _, _, node in self.wildcards:
+            node.finalize(tools)
+        if self.recursive:
+            self.recursive._finalize_recursive(tools)
+            self.recursive.finalize(tools)
+
+    def _finalize_recursive(self, tools: Dict[str, 'ToolSpec']):
+        """根据子树中的工具配置确定 ** 节点的深度上限和剪枝规则"""
+        specs = [tools[name] for _, name in self._subtree_tools() if name in tools]
+        if specs:
+            self.max_depth = max(spec.max_depth for spec in specs)
+        prune_dirs = set(DEFAULT_PRUNE_DIRS)
+
+        def prune(name_lower: str) -> bool:
+            # 默认剪枝目录总是跳过；其余目录只有被子树中所有工具排除时才跳过
+            if name_lower in prune_dirs:
+                return True
+            return bool(specs) and all(spec.excludes(name_lower) for spec in specs)
+
+        self._prune = prune
+
+    def _subtree_tools(self) -> List[Tuple[int, str]]:
+        """子树（含自身）中所有模式对应的工具"""
+        found = set(self.tools)
+        children = [node for _, node in self.literals.values()] + [node for _, _, node in self.wildcards]
+        if self.recursive:
+            children.append(self.recursive)
+        for node in children:
+            found.update(node._subtree_tools())
+        return sorted(found)
+
+    def prunes(self, name_lower: str) -> bool:
+        """作为 ** 节点时，是否跳过名为 name_lower 的目录"""
+        return bool(self._prune and self._prune(name_lower))
+
+    def closure(self) -> List['PatternNode']:
+        """节点本身以及其后 ** 段匹配零级目录时的状态"""
+        if self.recursive is None:
+            return [self]
+        return [self, RecursiveState(self.recursive, 0)]
+
+    def has_children(self) -> bool:
+        return bool(self.literals or self.wildcards or self.recursive)
+
+    def needs_listing(self) -> bool:
+        """匹配子目录时是否需要列举目录内容"""
+        return bool(self.wildcards)
+
+    def literal_items(self) -> List[Tuple[str, 'PatternNode']]:
+        return list(self.literals.values())
+
+    def match(self, name_lower: str) -> List['PatternNode']:
+        """返回与小写目录名匹配的所有子节点"""
+        matched = []
+        literal = self.literals.get(name_lower)
+        if literal:
+            matched.extend(literal[1].closure())
+
+        if self._combined is None:
+            return matched
+
+        m = self._combined.match(name_lower)
+        if m is None:
+            return matched
+
+        if not self._overlapping:
+            matched.extend(self.wildcards[int(m.lastgroup[1:])][2].closure())
+        else:
+            # 模式之间可能重叠时逐个确认，保证一个名称能命中多个模式
+            for _, test, node in self.wildcards:
+                if test(name_lower):
+                    matched.extend(node.closure())
+        return matched
+
+
+class RecursiveState:
+    """** 段的遍历状态，记录已经向下匹配的目录层数
+
+    与 PatternNode 提供相同的遍历接口：每个子目录既可能匹配 ** 之后的模式，
+    也可能继续被 ** 吸收；超过深度上限或命中剪枝规则的目录不再向下。
+    """
+
+    __slots__ = ('node', 'depth')
+
+    def __init__(self, node: PatternNode, depth: int):
+        self.node = node
+        self.depth = depth
+
+    @property
+    def tools(self) -> List[Tuple[int, str]]:
+        return self.node.tools
+
+    def has_children(self) -> bool:
+        return True
+
+    def needs_listing(self) -> bool:
+        return True
+
+    def literal_items(self) -> List[Tuple[str, PatternNode]]:
+        return self.node.literal_items()
+
+    def closure(self) -> List['RecursiveState']:
+        return [self]
+
+    def match(self, name_lower: str) -> List:
+        matched = self.node.match(name_lower)
+        if self.depth < self.node.max_depth and not self.node.prunes(name_lower):
+            matched.append(RecursiveState(self.node, self.depth + 1))
+        return matched
+
+
+def states_key(states: List) -> Tuple:
+    """一组遍历状态的标识，** 状态不区分已匹配的层数
+
+    沿符号链接或目录联接绕回同一目录时标识相同，遍历据此识别环路。
+    """
+    return tuple(sorted(
+        ('**', id(state.node)) if isinstance(state, RecursiveState) else ('', id(state))
+        for state in states
+    ))
+
+
+def merge_states(states: List) -> List:
+    """合并同一目录上的遍历状态，同一 ** 节点只保留层数最少的状态"""
+    merged = []
+    recursive: Dict[int, int] = {}  # id(node) -> merged 中的位置
+    for state in states:
+        if isinstance(state, RecursiveState):
+            index = recursive.get(id(state.node))
+            if index is None:
+                recursive[id(state.node)] = len(merged)
+                merged.append(state)
+            elif state.depth < merged[index].depth:
+                merged[index] = state
+        elif not any(state is existing for existing in merged):
+            merged.append(state)
+    return merged
+
+
+class ToolSpec:
+    """单个工具经过校验和预编译的扫描配置"""
+
+    def __init__(self, name: str, order: int, config: Mapping):
+        self.name = name
+        self.order = order
+        self.config = config
+        self.paths: List[str] = list(config['paths'])
+        self.bin_paths: List[str] = list(config['bin_paths'])
+        self.env_vars: List[str] = list(config.get('env_vars', []))
+        # 发现不在 paths 中的安装时用于匹配目录名的关键字，未配置时使用工具名
+        self.keywords: List[str] = [k.lower() for k in config.get('keywords', [name]) if k]
+
+        self.max_depth: int = config.get('max_depth', DEFAULT_MAX_DEPTH)
+
+        exclude_patterns = config.get('exclude_patterns', [])
+        self.exclude_regex = None
+        if exclude_patterns:
+            self.exclude_regex = re.compile(
+                '(?:' + '|'.join(glob_to_regex(p.lower()) for p in exclude_patterns) + ')\\Z',
+                re.DOTALL
+            )
+
+    def excludes(self, name: str) -> bool:
+        """检查目录名是否命中排除规则
+
+        排除规则只作用于单级目录名，不作用于完整路径，扫描根目录所在的位置不影响结果。
+        """
+        return bool(self.exclude_regex and self.exclude_regex.match(name.lower()))
+
+
+def _check_glob(pattern: str) -> Optional[str]:
+    """检查单个通配符模式能否编译，返回错误说明"""
+    try:
+        re.compile(glob_to_regex(pattern.lower()))
+    except re.error as e:
+        return f"通配符模式无效 {pattern!r}: {str(e)}"
+    return None
+
+
+def _check_value(kind: str, value) -> Optional[str]:
+    """按字段类型检查取值，返回错误说明"""
+    if kind in ('str_list', 'path_list', 'glob_list'):
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            return "必须是字符串列表"
+        if kind == 'path_list':
+            segments = [segment for v in value for segment in split_path(v) if segment != RECURSIVE_SEGMENT]
+        elif kind == 'glob_list':
+            segments = value
+        else:
+            segments = []
+        for segment in segments:
+            problem = _check_glob(segment)
+            if problem:
+                return problem
+    elif kind == 'str':
+        if not isinstance(value, str):
+            return "必须是字符串"
+    elif kind == 'depth':
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            return "必须是正整数"
+    elif kind == 'fingerprints':
+        if not isinstance(value, list):
+            return "必须是列表"
+        for fingerprint in value:
+            if not isinstance(fingerprint, dict) or not isinstance(fingerprint.get('pattern'), str) or \
+                    not any(isinstance(fingerprint.get(key), str) for key in ('file', 'glob')):
+                return "每项需要 pattern 以及 file 或 glob"
+            if 'resource' in fingerprint and not (isinstance(fingerprint['resource'], str) and 'glob' in fingerprint):
+                return "resource 必须是字符串且只能用于 glob 规则"
+            try:
+                re.compile(fingerprint['pattern'])
+            except re.error as e:
+                return f"版本指纹正则无效: {str(e)}"
+    return None
+
+
+def _validate_tool(name: str, config) -> Tuple[List[str], List[str]]:
+    """按 TOOL_SCHEMA 校验单个工具的配置
+
+    Returns:
+        (错误列表, 警告列表)，有错误的工具不进入扫描计划，未知字段只产生警告
+    """
+    if not isinstance(config, dict):
+        return [f"{name}: 配置必须是对象"], []
+
+    errors = []
+    for field, (kind, required, _) in TOOL_SCHEMA.items():
+        if field not in config:
+            if required:
+                errors.append(f"{name}: 缺少 {field}")
+            continue
+        problem = _check_value(kind, config[field])
+        if problem:
+            errors.append(f"{name}: {field} {problem}")
+
+    warnings = [f"{name}: 未知字段 {field}" for field in config if field not in TOOL_SCHEMA]
+    return errors, warnings
+
+
+def _freeze(value):
+    """把JSON取值转换为只读结构：对象转为只读映射，数组转为元组"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _normalize_tool(config: Dict) -> Dict:
+    """补全可选字段的缺省值，之后各处可以直接按字段名取值"""
+    normalized = dict(config)
+    for field, (_, _, default) in TOOL_SCHEMA.items():
+        if field not in normalized and default is not None:
+            normalized[field] = list(default) if isinstance(default, list) else default
+    return normalized
+
+
+class ScanPlan:
+    """编译后的扫描计划
+
+    配置只校验一次，所有工具的路径模式合并成一棵前缀树并预编译匹配规则。
+    校验失败的工具不会进入扫描计划，错误记录在 errors 中，未知字段记录在 warnings 中。
+    config 是补全缺省值后的只读配置，由同一进程中的所有扫描器共享。
+    """
+
+    def __init__(self, config: Dict):
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+        self.tools: Dict[str, ToolSpec] = {}
+        self.tree = PatternNode()
+        normalized: Dict[str, Dict] = {}
+
+        if not isinstance(config, dict):
+            self.errors.append("扫描配置必须是对象")
+            config = {}
+
+        for order, (name, tool_config) in enumerate(config.items()):
+            errors, warnings = _validate_tool(name, tool_config)
+            self.warnings.extend(warnings)
+            if errors:
+                self.errors.extend(errors)
+                continue
+            normalized[name] = _normalize_tool(tool_config)
+            spec = ToolSpec(name, order, _freeze(normalized[name]))
+            self.tools[name] = spec
+
+            for pattern in spec.paths:
+                node = self.tree
+                for segment in split_path(pattern):
+                    node = node.child(segment)
+                    node.patterns.append(pattern)
+                if (order, name) not in node.tools:
+                    node.tools.append((order, name))
+
+        self.tree.finalize(self.tools)
+        self._nodes: Optional[List[PatternNode]] = None
+        self._node_ids: Optional[Dict[int, int]] = None
+        self._keyword_index: Optional[KeywordIndex] = None
+        self.config: Mapping[str, Mapping] = MappingProxyType({name: spec.config for name, spec in self.tools.items()})
+        self._fingerprint = hashlib.sha1(json.dumps(normalized, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+        for error in self.errors:
+            logger.error(f"扫描配置错误: {error}")
+        for warning in self.warnings:
+            logger.warning(f"扫描配置警告: {warning}")
+
+    @property
+    def keyword_index(self) -> KeywordIndex:
+        """所有工具关键字组成的匹配索引，匹配结果为 (配置顺序, 工具名)"""
+        if self._keyword_index is None:
+            keywords: Dict[str, List[Tuple[int, str]]] = {}
+            for spec in self.tools.values():
+                for keyword in spec.keywords:
+                    keywords.setdefault(keyword, []).append((spec.order, spec.name))
+            self._keyword_index = KeywordIndex(keywords)
+        return self._keyword_index
+
+    def _node_list(self) -> List[PatternNode]:
+        """按固定顺序排列的所有节点，同一配置在任何进程中编译出的顺序都相同"""
+        if self._nodes is None:
+            nodes = []
+            stack = [self.tree]
+            while stack:
+                node = stack.pop()
+                nodes.append(node)
+                children = [child for _, child in node.literals.values()]
+                children += [child for _, _, child in node.wildcards]
+                if node.recursive is not None:
+                    children.append(node.recursive)
+                stack.extend(reversed(children))
+            self._nodes = nodes
+        return self._nodes
+
+    def encode_states(self, states: List) -> List[Tuple[int, int]]:
+        """把遍历状态转换为 (节点序号, ** 已匹配层数) 列表，普通节点的层数为 -1
+
+        节点对象不能跨进程传递，扫描进程用此方法把遍历状态交给主进程。
+        """
+        if self._node_ids is None:
+            self._node_ids = {id(node): i for i, node in enumerate(self._node_list())}
+        index = self._node_ids
+        return [
+            (index[id(state.node)], state.depth) if isinstance(state, RecursiveState) else (index[id(state)], -1)
+            for state in states
+        ]
+
+    def decode_states(self, encoded: List[Tuple[int, int]]) -> List:
+        """encode_states 的逆操作，序号超出范围时抛出 ValueError"""
+        nodes = self._node_list()
+        states = []
+        for i, depth in encoded:
+            if not 0 <= i < len(nodes):
+                raise ValueError(f"无效的节点序号: {i}")
+            states.append(nodes[i] if depth < 0 else RecursiveState(nodes[i], depth))
+        return states
+
+    def fingerprint(self) -> str:
+        """计划的内容标识，用于确认两个进程编译出的节点序号一致"""
+        return self._fingerprint
+
+
+_plan_cache: Dict[str, Tuple[Optional[int], ScanPlan]] = {}
+_plan_lock = threading.Lock()
+
+
+def load_scan_plan(config_path: Optional[str] = None) -> ScanPlan:
+    """加载扫描计划，按配置文件路径缓存，文件修改时间变化时重新编译
+
+    Args:
+        config_path: 配置文件路径，默认为 data/scan_config.json
+    """
+    config_path = config_path or resource_path('data/scan_config.json')
+    try:
+        mtime = os.stat(config_path).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    with _plan_lock:
+        cached = _plan_cache.get(config_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        config = {}
+        if mtime is None:
+            logger.error(f"配置文件不存在: {config_path}")
+        else:
+            try:
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+            except Exception as e:
+                logger.error(f"加载配置文件失败: {str(e)}")
+
+        plan = ScanPlan(config)
+        _plan_cache[config_path] = (mtime, plan)
+        return plan
@@ -0,0 +1,131 @@
+import time
+import threading
+from typing import Dict, List, Optional
+
+# 当前线程正在计数的扫描，由 ScanProfile.enter_root 设置
+_active = threading.local()
+
+
+def count_fs(field: str, amount: float = 1):
+    """在实际发生文件系统调用的位置计数
+
+    field 为 stat_calls（stat 类调用）或 dirs_listed（列举目录）。当前线程不在带性能计数的
+    扫描中时不做任何事，因此可以放在扫描器、扫描索引和变化监视器共用的函数里。
+    """
+    profile = getattr(_active, 'profile', None)
+    if profile is not None:
+        profile.count_fs(field, amount)
+
+
+class ScanProfile:
+    """一次扫描的性能计数
+
+    按根目录、工具和路径模式分别累计计数和耗时，扫描结束后由 report() 输出结构化报告，
+    用于判断 scan_config.json 中哪些条目开销大。计数在多个扫描线程和探测线程中进行，
+    根目录由当前线程正在扫描的单元决定。文件系统调用由 count_fs 在调用处计数，
+    使用扫描索引时命中的目录不计为列举。
+
+    报告中的计数项:
+        roots:    dirs_listed 实际列举的目录数, stat_calls 实际的 stat 类调用数, candidates 候选目录数,
+                  installations 发现的安装数, busy_time 扫描线程在该根目录上的累计耗时,
+                  negative_hits 因否定缓存跳过的目录数
+        patterns: dirs_listed 为匹配该模式实际列举的目录数, matches 目录名匹配次数,
+                  stat_calls 检查固定名称目录的次数, negative_hits 因否定缓存跳过的次数
+        tools:    candidates 分析的候选目录数, installations 发现的安装数, stat_calls 分析安装时的 stat 类调用数,
+                  index_hits 版本取自扫描索引, fingerprint_hits 版本取自版本指纹,
+                  probe_cache_hits 版本取自探测缓存, probes 执行的版本命令数, probe_time 版本命令耗时,
+                  keyword_candidates 按关键字发现的候选目录数, registry_candidates 注册表中登记的候选目录数
+    """
+
+    SECTIONS = ('roots', 'patterns', 'tools')
+
+    def __init__(self, root_labels: Optional[List[str]] = None):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._root_labels = list(root_labels or [])
+        self._sections: Dict[str, Dict[str, Dict[str, float]]] = {name: {} for name in self.SECTIONS}
+        self._started = time.perf_counter()
+        self._finished: Optional[float] = None
+        self.cache: Dict[str, float] = {}
+
+    def enter_root(self, root_index: int):
+        """把当前线程接下来的计数记在指定根目录上"""
+        self._local.root = self._root_labels[root_index] if 0 <= root_index < len(self._root_labels) else None
+        _active.profile = self
+
+    def leave_root(self):
+        """当前线程的工作不再属于任何根目录"""
+        self._local.root = None
+        _active.profile = None
+
+    def count_fs(self, field: str, amount: float = 1):
+        """记录当前线程的一次文件系统调用"""
+        counts = getattr(self._local, 'fs', None)
+        if counts is None:
+            counts = self._local.fs = {}
+        counts[field] = counts.get(field, 0) + amount
+        self.add_root(field, amount)
+
+    def fs_calls(self, field: str) -> float:
+        """当前线程累计的文件系统调用数，用两次读数之差把调用归到模式或工具上"""
+        return getattr(self._local, 'fs', {}).get(field, 0)
+
+    @property
+    def current_root(self) -> Optional[str]:
+        return getattr(self._local, 'root', None)
+
+    def add(self, section: str, key: str, field: str, amount: float = 1):
+        with self._lock:
+            counters = self._sections[section].setdefault(key, {})
+            counters[field] = counters.get(field, 0) + amount
+
+    def add_root(self, field: str, amount: float = 1):
+        root = self.current_root
+        if root is not None:
+            self.add('roots', root, field, amount)
+
+    def add_patterns(self, patterns: List[str], field: str, amount: float = 1):
+        with self._lock:
+            section = self._sections['patterns']
+            for pattern in patterns:
+                counters = section.setdefault(pattern, {})
+                counters[field] = counters.get(field, 0) + amount
+
+    def finish(self, cache: Optional[Dict[str, float]] = None):
+        """扫描结束，记录总耗时和缓存统计"""
+        self._finished = time.perf_counter()
+        if cache:
+            self.cache.update(cache)
+
+    def report(self) -> Dict:
+        """结构化的性能报告，可直接写入 JSON"""
+        end = self._finished if self._finished is not None else time.perf_counter()
+        with self._lock:
+            report = {
+                'wall_time': round(end - self._started, 6),
+                'cache': dict(self.cache),
+            }
+            for name in self.SECTIONS:
+                report[name] = {
+                    key: {field: round(value, 6) if isinstance(value, float) else value
+                          for field, value in counters.items()}
+                    for key, counters in self._sections[name].items()
+                }
+        return report
+
+
+def merge_reports(reports: List[Dict]) -> Dict:
+    """合并多个扫描进程的性能报告，计数相加，总耗时取最大值"""
+    merged = {'wall_time': 0.0, 'cache': {}}
+    for name in ScanProfile.SECTIONS:
+        merged[name] = {}
+    for report in reports:
+        merged['wall_time'] = max(merged['wall_time'], report.get('wall_time', 0.0))
+        for field, value in report.get('cache', {}).items():
+            merged['cache'][field] = merged['cache'].get(field, 0) + value
+        for name in ScanProfile.SECTIONS:
+            for key, counters in report.get(name, {}).items():
+                target = merged[name].setdefault(key, {})
+                for field, value in counters.items():
+                    target[field] = target.get(field, 0) + value
+    return merged
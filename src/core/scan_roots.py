@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+from src.core.scan_index import path_identity
+
+logger = logging.getLogger('ScanRoots')
+
+# 驱动器类别
+DRIVE_FIXED = 'fixed'
+DRIVE_REMOVABLE = 'removable'
+DRIVE_NETWORK = 'network'
+DRIVE_UNAVAILABLE = 'unavailable'
+
+# GetDriveTypeW 返回值 -> 驱动器类别
+_WIN_DRIVE_TYPES = {
+    0: DRIVE_UNAVAILABLE,  # DRIVE_UNKNOWN
+    1: DRIVE_UNAVAILABLE,  # DRIVE_NO_ROOT_DIR
+    2: DRIVE_REMOVABLE,    # DRIVE_REMOVABLE
+    3: DRIVE_FIXED,        # DRIVE_FIXED
+    4: DRIVE_NETWORK,      # DRIVE_REMOTE
+    5: DRIVE_REMOVABLE,    # DRIVE_CDROM
+    6: DRIVE_FIXED,        # DRIVE_RAMDISK
+}
+
+# 可移动磁盘和网络驱动器较慢，包含时降低调度权重
+SLOW_DRIVE_WEIGHT = 0.5
+
+
+class ScanRoot:
+    """一个扫描根目录
+
+    weight 表示根目录的相对扫描量，调度时权重越高的根目录越先提交，
+    同时运行的扫描单元数也按权重放大。
+    """
+
+    def __init__(self, path: Union[str, Path], weight: float = 1.0, label: Optional[str] = None,
+                 kind: Optional[str] = None):
+        self.path = Path(path)
+        self.weight = weight if weight > 0 else 1.0
+        self.label = label or str(self.path)
+        self.kind = kind  # 驱动器类别，普通目录为None
+
+    def __repr__(self) -> str:
+        return f"ScanRoot({str(self.path)!r}, weight={self.weight})"
+
+
+class RootProvider:
+    """扫描根目录提供者基类"""
+
+    def roots(self) -> List[ScanRoot]:
+        raise NotImplementedError
+
+
+def _logical_drive_letters(letters: str) -> List[str]:
+    """通过 GetLogicalDrives 获取存在的盘符，不访问磁盘；不支持时逐个检查盘符"""
+    if sys.platform.startswith('win'):
+        try:
+            import ctypes
+            mask = ctypes.windll.kernel32.GetLogicalDrives()
+            return [d for d in letters if mask & (1 << (ord(d) - ord('A')))]
+        except Exception as e:
+            logger.debug(f"GetLogicalDrives 调用失败: {str(e)}")
+        return list(letters)
+    return []
+
+
+def _drive_kind(letter: str) -> str:
+    """通过 GetDriveTypeW 获取驱动器类别，不访问磁盘"""
+    try:
+        import ctypes
+        return _WIN_DRIVE_TYPES.get(ctypes.windll.kernel32.GetDriveTypeW(f"{letter}:\\"), DRIVE_UNAVAILABLE)
+    except Exception:
+        return DRIVE_FIXED
+
+
+def _probe_concurrently(paths: List[str], check: Callable[[str], object], timeout: float,
+                        default: object) -> Dict[str, object]:
+    """在守护线程中并发执行检查，超时未返回的路径取默认值"""
+    results = {path: default for path in paths}
+    lock = threading.Lock()
+
+    def probe(path: str):
+        value = check(path)
+        with lock:
+            results[path] = value
+
+    threads = []
+    for path in paths:
+        thread = threading.Thread(target=probe, args=(path,), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(0.0, deadline - time.monotonic()))
+
+    with lock:
+        return dict(results)
+
+
+def probe_paths(paths: List[str], timeout: float) -> Dict[str, bool]:
+    """并发检查路径是否可以访问，超时未返回的视为不可用
+
+    断开的网络驱动器、空读卡器和休眠的 USB 磁盘可能让 os.path.isdir 阻塞很久，
+    检查在守护线程中进行，超时后直接放弃等待，不影响程序退出。
+    """
+    return _probe_concurrently(paths, os.path.isdir, timeout, False)
+
+
+# 超时未返回的路径
+PROBE_TIMED_OUT = 'timed-out'
+
+
+def identify_paths(paths: List[str], timeout: float) -> Dict[str, object]:
+    """并发获取路径的物理身份，与 probe_paths 一样受超时限制
+
+    Returns:
+        路径 -> path_identity 的结果，超时未返回的路径为 PROBE_TIMED_OUT
+    """
+    return _probe_concurrently(paths, path_identity, timeout, PROBE_TIMED_OUT)
+
+
+class DriveInfo:
+    """驱动器的类别和可访问性"""
+
+    def __init__(self, letter: str, kind: str, accessible: bool):
+        self.letter = letter
+        self.kind = kind if accessible else DRIVE_UNAVAILABLE
+        self.accessible = accessible
+
+    @property
+    def path(self) -> str:
+        return f"{self.letter}:\\"
+
+
+def classify_drives(letters: str = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', probe_timeout: float = 0.5,
+                    probe_kinds=(DRIVE_FIXED, DRIVE_REMOVABLE, DRIVE_NETWORK)) -> List[DriveInfo]:
+    """对驱动器分类，并在超时限制内检查可访问性
+
+    Args:
+        letters: 要检查的盘符
+        probe_timeout: 可访问性检查的总超时（秒）
+        probe_kinds: 需要检查可访问性的类别，其余类别直接视为不可用
+    """
+    drives = [(letter, _drive_kind(letter)) for letter in _logical_drive_letters(letters)]
+    to_probe = [f"{letter}:\\" for letter, kind in drives if kind in probe_kinds]
+    accessible = probe_paths(to_probe, probe_timeout)
+    return [DriveInfo(letter, kind, accessible.get(f"{letter}:\\", False)) for letter, kind in drives]
+
+
+class DriveRootProvider(RootProvider):
+    """可用的磁盘驱动器
+
+    默认只扫描本地固定磁盘；可移动磁盘和网络驱动器需要显式包含，包含时调度权重较低。
+    盘符的类别通过系统调用获得，不访问磁盘；只有需要扫描的驱动器才在超时限制内检查可访问性。
+    """
+
+    def __init__(self, letters: str = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', include_removable: bool = False,
+                 include_network: bool = False, probe_timeout: float = 0.5):
+        self.letters = letters
+        self.include_removable = include_removable
+        self.include_network = include_network
+        self.probe_timeout = probe_timeout
+
+    def roots(self) -> List[ScanRoot]:
+        start = time.perf_counter()
+        kinds = [DRIVE_FIXED]
+        if self.include_removable:
+            kinds.append(DRIVE_REMOVABLE)
+        if self.include_network:
+            kinds.append(DRIVE_NETWORK)
+
+        roots = []
+        for drive in classify_drives(self.letters, self.probe_timeout, tuple(kinds)):
+            if drive.kind not in kinds:
+                logger.debug(f"跳过驱动器 {drive.path} ({drive.kind})")
+                continue
+            weight = 1.0 if drive.kind == DRIVE_FIXED else SLOW_DRIVE_WEIGHT
+            roots.append(ScanRoot(drive.path, weight, kind=drive.kind))
+
+        logger.debug(f"驱动器枚举耗时 {(time.perf_counter() - start) * 1000:.1f}ms: {roots}")
+        return roots
+
+
+class DirectoryRootProvider(RootProvider):
+    """显式指定的目录，例如挂载的虚拟磁盘、解压出的系统镜像或测试目录"""
+
+    def __init__(self, directories: List[Union[str, Path, ScanRoot]], probe_timeout: float = 2.0):
+        """
+        Args:
+            directories: 目录列表
+            probe_timeout: 检查目录是否可访问的超时（秒），目录可能位于网络共享上
+        """
+        self.directories = directories
+        self.probe_timeout = probe_timeout
+
+    def roots(self) -> List[ScanRoot]:
+        candidates = [item if isinstance(item, ScanRoot) else ScanRoot(item) for item in self.directories]
+        accessible = probe_paths([str(root.path) for root in candidates], self.probe_timeout)
+        roots = []
+        for root in candidates:
+            if not accessible.get(str(root.path)):
+                logger.warning(f"扫描根目录不存在或无法访问，已跳过: {root.path}")
+                continue
+            roots.append(root)
+        return roots
+
+
+class ConfigRootProvider(RootProvider):
+    """由配置列表给出的根目录
+
+    列表中每一项可以是:
+        "D:\\\\images\\\\win10"                     目录
+        {"path": "E:\\\\", "weight": 2}           带权重的目录
+        "drives"                                 所有可用的磁盘驱动器
+    """
+
+    DRIVES = 'drives'
+
+    def __init__(self, entries: List[Union[str, Dict]], drive_provider: Optional[DriveRootProvider] = None):
+        """
+        Args:
+            entries: 根目录配置列表
+            drive_provider: "drives" 项使用的驱动器提供者
+        """
+        self.entries = entries
+        self.drive_provider = drive_provider or DriveRootProvider()
+
+    @classmethod
+    def from_file(cls, config_path: Union[str, Path],
+                  drive_provider: Optional[DriveRootProvider] = None) -> 'ConfigRootProvider':
+        """从 JSON 文件读取根目录列表，文件内容为列表或含 roots 字段的对象"""
+        with open(config_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('roots', [])
+        return cls(data, drive_provider)
+
+    def roots(self) -> List[ScanRoot]:
+        roots = []
+        for entry in self.entries:
+            try:
+                if entry == self.DRIVES:
+                    roots.extend(self.drive_provider.roots())
+                elif isinstance(entry, dict):
+                    roots.extend(DirectoryRootProvider([
+                        ScanRoot(entry['path'], float(entry.get('weight', 1.0)), entry.get('label'))
+                    ]).roots())
+                else:
+                    roots.extend(DirectoryRootProvider([entry]).roots())
+            except Exception as e:
+                logger.error(f"无效的扫描根目录配置 {entry}: {str(e)}")
+        return roots
+
+
+RootsSpec = Union[None, RootProvider, List[Union[str, Path, ScanRoot]]]
+
+
+def resolve_roots(roots: RootsSpec, probe_timeout: float = 2.0) -> List[ScanRoot]:
+    """把扫描参数统一转换为 ScanRoot 列表，重复的目录只保留第一个
+
+    Args:
+        roots: None 表示所有磁盘驱动器；也可以是根目录提供者或目录列表
+        probe_timeout: 获取根目录物理身份的超时（秒），超时未响应的根目录被跳过
+    """
+    if roots is None:
+        resolved = DriveRootProvider().roots()
+    elif isinstance(roots, RootProvider):
+        resolved = roots.roots()
+    else:
+        resolved = [item if isinstance(item, ScanRoot) else ScanRoot(item) for item in roots]
+
+    identities = identify_paths([str(root.path) for root in resolved], probe_timeout)
+    unique = []
+    seen = set()
+    for root in resolved:
+        identity = identities[str(root.path)]
+        if identity is PROBE_TIMED_OUT:
+            logger.warning(f"扫描根目录无响应，已跳过: {root.path}")
+            continue
+        # 同一物理目录通过不同路径给出时只扫描一次；不存在的根目录按路径去重
+        key = identity or os.path.normcase(os.path.abspath(str(root.path)))
+        if key in seen:
+            continue
+        seen.add(key)
+        unique.append(root)
+    return unique
@@ -0,0 +1,249 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.core.installation import Installation
+from src.core.scan_index import dir_mtime
+
+# 尚未记录基准修改时间
+_UNKNOWN = object()
+
+
+class ScanChange:
+    """监视器发现的一处安装变化"""
+    ADDED = 'added'
+    REMOVED = 'removed'
+    UPDATED = 'updated'
+
+    def __init__(self, kind: str, tool_name: str, installation: Installation):
+        self.kind = kind
+        self.tool_name = tool_name
+        self.installation = installation
+
+    def __repr__(self) -> str:
+        return f"ScanChange({self.kind}, {self.tool_name}, {self.installation['install_path']})"
+
+
+def _is_under(path: str, parent: str) -> bool:
+    parent = parent.rstrip('\\/')
+    return path == parent or path.startswith(parent + os.sep)
+
+
+class ScanWatcher:
+    """安装目录变化监视器
+
+    轮询上一次完整扫描展开过的目录（Program Files、用户的 AppData\\Local\\Programs 等）
+    以及每个安装目录和bin目录的修改时间。目录有变化时只扫描其中新出现的子目录，
+    安装目录有变化时只重新分析该安装，变化通过回调推送给界面。
+
+    轮询分批进行并受资源预算限制：每批最多检查 batch_size 个目录，
+    检查和重新分析占用的时间不超过 duty_cycle 比例，一轮完整轮询至少间隔 interval 秒。
+    """
+
+    def __init__(self, scanner, on_change: Callable[[List[ScanChange]], None],
+                 interval: float = 10.0, batch_size: int = 128, duty_cycle: float = 0.02):
+        """
+        Args:
+            scanner: 执行过完整扫描的 EnvScanner
+            on_change: 发现变化时在监视线程中调用，参数为变化列表
+            interval: 一轮完整轮询的最短间隔（秒）
+            batch_size: 每批检查的目录数
+            duty_cycle: 监视器工作时间占总时间的上限比例
+        """
+        self.logger = logging.getLogger('ScanWatcher')
+        self.scanner = scanner
+        self.on_change = on_change
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.duty_cycle = min(max(duty_cycle, 0.001), 1.0)
+
+        self._lock = threading.Lock()
+        self._dirs: Dict[str, Tuple[object, List]] = {}  # 目录 -> (修改时间, 遍历状态)
+        self._installs: Dict[str, Tuple[str, Installation, object]] = {}  # 安装目录 -> (工具名, 安装信息, 签名)
+        self._stop = threading.Event()
+        self._paused = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def reset(self, results: Dict[str, List[Installation]]):
+        """以一次完整扫描的结果作为新的基准
+
+        目录修改时间和安装签名取自扫描器在本次扫描中记录的基准（watch_mtimes、watch_signatures），
+        扫描结束到第一次轮询之间的变化也能被发现；没有记录的条目在第一次轮询时确定基准。
+        扫描在独立进程中进行时，调用方需要先把 ProcessScanner 的监视数据交给扫描器。
+        """
+        mtimes = self.scanner.watch_mtimes
+        signatures = self.scanner.watch_signatures
+        with self._lock:
+            self._dirs = {
+                path: (mtimes.get(path, _UNKNOWN), nodes)
+                for path, nodes in self.scanner.watch_dirs.items()
+            }
+            self._installs = {
+                installation['install_path']: (
+                    tool_name, installation,
+                    signatures.get(f"{tool_name}|{installation['install_path']}", _UNKNOWN)
+                )
+                for tool_name, installations in results.items()
+                for installation in installations
+            }
+        self.logger.debug(f"监视 {len(self._dirs)} 个目录和 {len(self._installs)} 个安装")
+
+    def start(self):
+        """启动后台监视线程"""
+        self._paused.clear()
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='scan-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监视线程"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def pause(self):
+        """暂停轮询，例如完整扫描进行期间"""
+        self._paused.set()
+
+    def resume(self):
+        self._paused.clear()
+
+    def poll_once(self) -> List[ScanChange]:
+        """不受预算限制地完成一轮轮询，返回发现的变化"""
+        changes = []
+        for batch in self._batches():
+            changes.extend(self._check_batch(batch))
+        return changes
+
+    def _batches(self) -> List[List[Tuple[str, str]]]:
+        with self._lock:
+            items = [('dir', path) for path in self._dirs] + [('install', path) for path in self._installs]
+        return [items[i:i + self.batch_size] for i in range(0, len(items), self.batch_size)]
+
+    def _run(self):
+        while not self._stop.is_set():
+            batches = self._batches()
+            if not batches:
+                self._stop.wait(self.interval)
+                continue
+
+            for batch in batches:
+                if self._stop.is_set():
+                    return
+                while self._paused.is_set() and not self._stop.is_set():
+                    self._stop.wait(0.5)
+
+                start = time.perf_counter()
+                try:
+                    changes = self._check_batch(batch)
+                    if changes:
+                        self.on_change(changes)
+                except Exception as e:
+                    self.logger.error(f"检查安装变化失败: {str(e)}")
+                elapsed = time.perf_counter() - start
+
+                # 工作时间占比不超过 duty_cycle，同时把一轮轮询均匀分布在 interval 内
+                pause = max(elapsed * (1 - self.duty_cycle) / self.duty_cycle,
+                            self.interval / len(batches))
+                self._stop.wait(pause)
+
+    def _check_batch(self, batch: List[Tuple[str, str]]) -> List[ScanChange]:
+        changes = []
+        for kind, path in batch:
+            if kind == 'dir':
+                changes.extend(self._check_dir(path))
+            else:
+                changes.extend(self._check_install(path))
+        if changes and self.scanner.scan_index:
+            self.scanner.scan_index.save(prune=False)
+        return changes
+
+    def _check_dir(self, dir_path: str) -> List[ScanChange]:
+        """目录修改时间变化时重新列举该目录
+
+        只有新出现的子目录才需要扫描，已知的安装和子目录由各自的轮询负责；
+        消失的子目录连同其中的安装一并移除。
+        """
+        with self._lock:
+            entry = self._dirs.get(dir_path)
+        if entry is None:
+            return []
+        known, nodes = entry
+        mtime = dir_mtime(dir_path)
+        if known is _UNKNOWN or mtime == known:
+            with self._lock:
+                if dir_path in self._dirs:
+                    self._dirs[dir_path] = (mtime, nodes)
+            return []
+
+        self.logger.info(f"目录有变化，重新扫描: {dir_path}")
+        candidates, subdirs = self.scanner._expand_dir(dir_path, nodes, trust_negative=False) if mtime is not None else ([], [])
+        present = {path for path, _ in candidates} | {path for path, _ in subdirs}
+
+        changes = []
+        with self._lock:
+            if mtime is None:
+                self._dirs.pop(dir_path, None)
+            else:
+                self._dirs[dir_path] = (mtime, nodes)
+
+            # 消失的子目录：移除其下的监视目录和安装
+            for path in [p for p in self._dirs if p != dir_path and _is_under(p, dir_path)]:
+                if not any(_is_under(path, child) for child in present):
+                    del self._dirs[path]
+            for path in [p for p in self._installs if p != dir_path and _is_under(p, dir_path)]:
+                if not any(_is_under(path, child) for child in present):
+                    tool_name, installation, _ = self._installs.pop(path)
+                    changes.append(ScanChange(ScanChange.REMOVED, tool_name, installation))
+
+            new_candidates = [(path, tools) for path, tools in candidates if path not in self._installs]
+            new_subdirs = [(path, sub_nodes) for path, sub_nodes in subdirs if path not in self._dirs]
+
+        # 新出现的候选目录和子目录在锁外分析，可能需要执行版本命令
+        found = []
+        visited = {}
+        for path, tool_names in new_candidates:
+            result = self.scanner.analyze_candidate(path, tool_names)
+            if result:
+                found.append(result)
+        for path, sub_nodes in new_subdirs:
+            found.extend(self.scanner.rescan_dir(path, sub_nodes, visit=visited.__setitem__))
+
+        with self._lock:
+            for path, path_nodes in visited.items():
+                self._dirs[path] = (dir_mtime(path), path_nodes)
+            for tool_name, installation in found:
+                path = installation['install_path']
+                if path in self._installs:
+                    continue
+                self._installs[path] = (tool_name, installation, self.scanner.install_signature(path, tool_name))
+                changes.append(ScanChange(ScanChange.ADDED, tool_name, installation))
+        return changes
+
+    def _check_install(self, install_path: str) -> List[ScanChange]:
+        """安装目录或bin目录修改时间变化时重新分析该安装"""
+        with self._lock:
+            entry = self._installs.get(install_path)
+        if entry is None:
+            return []
+        tool_name, installation, known = entry
+        signature = self.scanner.install_signature(install_path, tool_name)
+        if known is _UNKNOWN or signature == known:
+            with self._lock:
+                if install_path in self._installs:
+                    self._installs[install_path] = (tool_name, installation, signature)
+            return []
+
+        self.logger.info(f"安装有变化，重新分析: {install_path}")
+        updated = self.scanner.reanalyze_installation(install_path, tool_name)
+        with self._lock:
+            if updated is None:
+                self._installs.pop(install_path, None)
+                return [ScanChange(ScanChange.REMOVED, tool_name, installation)]
+            self._installs[install_path] = (tool_name, updated, signature)
+        return [ScanChange(ScanChange.UPDATED, tool_name, updated)]
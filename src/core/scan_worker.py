@@ -0,0 +1,296 @@
+import logging
+import threading
+import multiprocessing
+from multiprocessing.connection import wait as wait_connections
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.core.env_scanner import EnvScanner, ScanEvent, ScanCancelToken
+from src.core.installation import Installation
+from src.core.scan_index import default_index_path, path_identity
+from src.core.scan_plan import load_scan_plan
+from src.core.scan_profile import merge_reports
+from src.core.scan_roots import RootsSpec, ScanRoot, resolve_roots
+from src.core.version_probe import default_probe_cache_path
+
+# 扫描进程发送展开过的目录时使用的消息标记
+_WATCH = 'watch'
+
+
+def _worker_main(events_conn, control_conn, roots: List[ScanRoot], options: Dict,
+                 deadline: Optional[float], profile: bool = False):
+    """扫描进程入口：执行流式扫描，把事件逐个发送回主进程"""
+    token = ScanCancelToken(deadline)
+
+    def listen():
+        # 主进程发送取消指令或管道关闭时取消扫描
+        try:
+            while True:
+                if control_conn.recv() == 'cancel':
+                    token.cancel()
+        except (EOFError, OSError):
+            token.cancel()
+
+    threading.Thread(target=listen, daemon=True).start()
+
+    scanner = EnvScanner(**options)
+    try:
+        for event in scanner.iter_scan(roots, cancel_token=token, profile=profile):
+            if event.kind == ScanEvent.DONE and not event.cancelled:
+                # 展开过的目录和监视基准交给主进程的变化监视器，遍历状态按节点序号传递
+                plan = scanner.plan
+                watch_dirs = {path: plan.encode_states(states) for path, states in scanner.watch_dirs.items()}
+                events_conn.send((_WATCH, plan.fingerprint(), watch_dirs,
+                                  scanner.watch_mtimes, scanner.watch_signatures))
+            events_conn.send(event)
+    finally:
+        scanner._clean_resources()
+        events_conn.close()
+
+
+def _split_roots(roots: List[ScanRoot], shards: int) -> List[List[ScanRoot]]:
+    """按权重把根目录切分为连续的若干组，保持根目录顺序以便结果顺序与单进程一致"""
+    shards = max(1, min(shards, len(roots)))
+    total = sum(root.weight for root in roots)
+    groups = [[] for _ in range(shards)]
+    acc = 0.0
+    for root in roots:
+        index = min(int(acc / total * shards), shards - 1) if total else 0
+        groups[index].append(root)
+        acc += root.weight
+    return [group for group in groups if group]
+
+
+class _Shard:
+    """一个扫描进程及其通信管道和已收到的结果"""
+
+    def __init__(self, process, events_conn, control_conn, weight: float):
+        self.process = process
+        self.events_conn = events_conn
+        self.control_conn = control_conn
+        self.weight = weight
+        self.progress = 0.0
+        self.found: Dict[str, List[Installation]] = {}
+        self.results: Optional[Dict[str, List[Installation]]] = None
+        self.profile: Optional[Dict] = None
+        self.watch_dirs: Optional[Tuple[str, Dict]] = None  # (计划标识, 目录 -> 编码后的遍历状态)
+        self.watch_mtimes: Dict[str, int] = {}
+        self.watch_signatures: Dict[str, List] = {}
+        self.cancelled = False
+        self.done = False
+
+
+class ProcessScanner:
+    """在独立进程中运行 EnvScanner 的扫描器
+
+    目录遍历和模式匹配都在子进程中执行，不与界面线程争用 GIL；扫描事件通过管道流式返回，
+    接口与 EnvScanner.scan / iter_scan 相同。根目录可以按权重分到多个进程并行扫描，
+    多进程时每个进程使用各自的扫描索引和版本探测缓存文件。
+
+    完整扫描结束后 watch_dirs、watch_mtimes、watch_signatures 与 EnvScanner 的同名属性相同，
+    可交给主进程的扫描器供变化监视器使用。
+    """
+
+    def __init__(self, shards: int = 1, scanner_options: Optional[Dict] = None):
+        """
+        Args:
+            shards: 扫描进程数
+            scanner_options: 传给子进程中 EnvScanner 的参数
+        """
+        self.logger = logging.getLogger('ProcessScanner')
+        self.shards = max(1, shards)
+        self.scanner_options = dict(scanner_options or {})
+        # 使用 spawn 启动子进程，避免在带界面和线程的进程中 fork
+        self._context = multiprocessing.get_context('spawn')
+        self.watch_dirs: Dict[str, List] = {}
+        self.watch_mtimes: Dict[str, int] = {}
+        self.watch_signatures: Dict[str, List] = {}
+
+    def scan(self, roots: RootsSpec = None, cancel_token: Optional[ScanCancelToken] = None,
+             deadline: Optional[float] = None) -> Dict[str, List[Installation]]:
+        """扫描系统中已安装的开发工具，参数与 EnvScanner.scan 相同"""
+        results = {}
+        for event in self.iter_scan(roots, cancel_token, deadline):
+            if event.kind == ScanEvent.DONE:
+                results = event.results
+        return results
+
+    def scan_profiled(self, roots: RootsSpec = None, cancel_token: Optional[ScanCancelToken] = None,
+                      deadline: Optional[float] = None) -> Tuple[Dict[str, List[Installation]], Dict]:
+        """扫描并收集性能计数，各进程的报告合并后返回，与 EnvScanner.scan_profiled 相同"""
+        results, report = {}, {}
+        for event in self.iter_scan(roots, cancel_token, deadline, profile=True):
+            if event.kind == ScanEvent.DONE:
+                results, report = event.results, event.profile
+        return results, report
+
+    def _shard_options(self, index: int, count: int) -> Dict:
+        options = dict(self.scanner_options)
+        if count > 1:
+            # 多个进程同时保存同一个索引文件会互相覆盖
+            index_path = Path(options.get('index_path') or default_index_path())
+            cache_path = Path(options.get('probe_cache_path') or default_probe_cache_path())
+            options['index_path'] = index_path.with_name(f"{index_path.stem}.{index}{index_path.suffix}")
+            options['probe_cache_path'] = cache_path.with_name(f"{cache_path.stem}.{index}{cache_path.suffix}")
+        return options
+
+    def _start_shards(self, groups: List[List[ScanRoot]], deadline: Optional[float],
+                      profile: bool) -> List[_Shard]:
+        shards = []
+        for index, group in enumerate(groups):
+            events_recv, events_send = self._context.Pipe(duplex=False)
+            control_recv, control_send = self._context.Pipe(duplex=False)
+            process = self._context.Process(
+                target=_worker_main,
+                args=(events_send, control_recv, group, self._shard_options(index, len(groups)),
+                      deadline, profile),
+                name=f'scan-worker-{index}',
+                daemon=True
+            )
+            process.start()
+            # 子进程持有的一端在主进程中关闭，子进程退出时主进程才能收到 EOF
+            events_send.close()
+            control_recv.close()
+            shards.append(_Shard(process, events_recv, control_send, sum(root.weight for root in group)))
+        return shards
+
+    def iter_scan(self, roots: RootsSpec = None, cancel_token: Optional[ScanCancelToken] = None,
+                  deadline: Optional[float] = None, profile: bool = False) -> Iterator[ScanEvent]:
+        """流式扫描，事件与 EnvScanner.iter_scan 相同
+
+        多个进程的进度按各自根目录的权重合并；done 事件的结果按根目录顺序合并，性能报告的计数相加。
+        """
+        token = cancel_token or ScanCancelToken()
+        if deadline is not None:
+            token.set_deadline(deadline)
+
+        roots = resolve_roots(roots)
+        groups = _split_roots(roots, self.shards)
+        if not groups:
+            yield ScanEvent(ScanEvent.DONE, progress=100, results={}, cancelled=token.cancelled,
+                            profile=merge_reports([]) if profile else None)
+            return
+
+        self.logger.debug(f"使用 {len(groups)} 个进程扫描 {len(roots)} 个根目录")
+        shards = self._start_shards(groups, token.deadline, profile)
+        total_weight = sum(shard.weight for shard in shards)
+        last_progress = -1
+        cancel_sent = False
+
+        try:
+            while not all(shard.done for shard in shards):
+                if token.cancelled and not cancel_sent:
+                    cancel_sent = True
+                    for shard in shards:
+                        self._send_cancel(shard)
+
+                pending = {shard.events_conn: shard for shard in shards if not shard.done}
+                for conn in wait_connections(list(pending), timeout=0.1):
+                    shard = pending[conn]
+                    try:
+                        message = conn.recv()
+                    except (EOFError, OSError):
+                        # 子进程异常退出，保留已收到的部分结果
+                        self.logger.error(f"扫描进程异常退出: {shard.process.name} (exitcode={shard.process.exitcode})")
+                        shard.done = True
+                        shard.cancelled = True
+                        continue
+
+                    if not isinstance(message, ScanEvent):
+                        _, fingerprint, watch_dirs, shard.watch_mtimes, shard.watch_signatures = message
+                        shard.watch_dirs = (fingerprint, watch_dirs)
+                    elif message.kind == ScanEvent.PROGRESS:
+                        shard.progress = message.progress
+                        merged = int(sum(s.progress * s.weight for s in shards) / total_weight)
+                        if merged > last_progress:
+                            last_progress = merged
+                            yield ScanEvent(ScanEvent.PROGRESS, progress=min(merged, 99))
+                    elif message.kind == ScanEvent.INSTALLATION:
+                        shard.found.setdefault(message.tool_name, []).append(message.installation)
+                        yield message
+                    elif message.kind == ScanEvent.DONE:
+                        shard.results = message.results
+                        shard.profile = message.profile
+                        shard.cancelled = message.cancelled
+                        shard.done = True
+        finally:
+            # 调用方提前停止迭代时取消所有子进程
+            if not all(shard.done for shard in shards):
+                token.cancel()
+                for shard in shards:
+                    self._send_cancel(shard)
+            for shard in shards:
+                shard.process.join(timeout=10)
+                if shard.process.is_alive():
+                    self.logger.warning(f"扫描进程未能及时退出，强制结束: {shard.process.name}")
+                    shard.process.terminate()
+                    shard.process.join()
+                shard.events_conn.close()
+                shard.control_conn.close()
+
+        cancelled = token.cancelled or any(shard.cancelled for shard in shards)
+        if not cancelled:
+            self.watch_dirs = self._merge_watch_dirs(shards)
+            self.watch_mtimes = {}
+            self.watch_signatures = {}
+            if self.watch_dirs:
+                for shard in shards:
+                    self.watch_mtimes.update(shard.watch_mtimes)
+                    self.watch_signatures.update(shard.watch_signatures)
+        report = merge_reports([shard.profile for shard in shards if shard.profile]) if profile else None
+        yield ScanEvent(ScanEvent.DONE, progress=100, results=self._merge(shards), cancelled=cancelled,
+                        profile=report)
+
+    def _send_cancel(self, shard: _Shard):
+        try:
+            shard.control_conn.send('cancel')
+        except (OSError, ValueError):
+            pass
+
+    def _merge_watch_dirs(self, shards: List[_Shard]) -> Dict[str, List]:
+        """还原各进程展开过的目录及遍历状态，配置在扫描期间被修改时放弃"""
+        plan = load_scan_plan()
+        fingerprint = plan.fingerprint()
+        watch_dirs = {}
+        for shard in shards:
+            if shard.watch_dirs is None:
+                continue
+            shard_fingerprint, encoded_dirs = shard.watch_dirs
+            if shard_fingerprint != fingerprint:
+                self.logger.warning("扫描期间配置文件已修改，本次扫描的目录不做变化监视")
+                return {}
+            try:
+                for path, encoded in encoded_dirs.items():
+                    watch_dirs[path] = plan.decode_states(encoded)
+            except ValueError as e:
+                self.logger.error(f"还原监视目录失败: {str(e)}")
+                return {}
+        return watch_dirs
+
+    def _merge(self, shards: List[_Shard]) -> Dict[str, List[Installation]]:
+        """按根目录顺序合并各进程的结果，保持配置文件中的工具顺序
+
+        各进程分别去重，同一物理目录从不同进程的根目录到达时，只保留排在前面的进程的结果，
+        与进程内保留排序键最小的安装一致。
+        """
+        merged: Dict[str, List[Installation]] = {}
+        tool_order: List[str] = []
+        seen = set()
+        for shard in shards:
+            results = shard.results if shard.results is not None else shard.found
+            shard_identities = []
+            for tool_name, installations in results.items():
+                for installation in installations:
+                    identity = path_identity(installation['install_path']) or installation['install_path']
+                    if identity in seen:
+                        continue
+                    shard_identities.append(identity)
+                    if tool_name not in merged:
+                        merged[tool_name] = []
+                        tool_order.append(tool_name)
+                    merged[tool_name].append(installation)
+            seen.update(shard_identities)
+
+        ordered = [name for name in load_scan_plan().config if name in merged]
+        ordered += [name for name in tool_order if name not in ordered]
+        return {name: merged[name] for name in ordered}
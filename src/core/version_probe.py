@@ -0,0 +1,417 @@
+import os
+import re
+import sys
+import json
+import signal
+import struct
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.core.scan_profile import count_fs
+
+logger = logging.getLogger('VersionProbe')
+
+# 指纹文件最多读取的字节数，版本信息通常位于文件开头
+FINGERPRINT_READ_LIMIT = 64 * 1024
+
+
+def _split_rel(rel_path: str) -> List[str]:
+    """按 Windows 或 POSIX 分隔符拆分相对路径"""
+    return [part for part in re.split(r'[\\/]+', rel_path) if part]
+
+
+def _format_match(match: 're.Match', fingerprint: Dict) -> str:
+    """按指纹配置的格式输出匹配到的版本号"""
+    fmt = fingerprint.get('format')
+    if fmt:
+        return fmt.format(*match.groups())
+    return match.group(1)
+
+
+# PE 文件中版本信息资源的类型编号 (RT_VERSION)
+_RT_VERSION = 16
+
+
+def read_version_resource(file_path: Path, name: str = 'FileVersion') -> Optional[str]:
+    """读取 Windows 可执行文件或 DLL 版本信息资源中的字符串，例如 FileVersion
+
+    只解析 PE 头、节表和资源目录，按需读取少量字节，不加载整个文件。
+    不是 PE 文件、没有版本信息或找不到该字符串时返回None。
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            def read(offset: int, size: int) -> bytes:
+                f.seek(offset)
+                data = f.read(size)
+                if len(data) != size:
+                    raise ValueError("文件不完整")
+                return data
+
+            if read(0, 2) != b'MZ':
+                return None
+            pe_offset = struct.unpack('<I', read(0x3C, 4))[0]
+            if read(pe_offset, 4) != b'PE\0\0':
+                return None
+            section_count, optional_size = struct.unpack('<H12xH', read(pe_offset + 6, 16))
+            optional_offset = pe_offset + 24
+            magic = struct.unpack('<H', read(optional_offset, 2))[0]
+            directories = {0x10b: 96, 0x20b: 112}.get(magic)
+            if directories is None:
+                return None
+            # 数据目录第 2 项为资源表
+            resource_rva, resource_size = struct.unpack('<II', read(optional_offset + directories + 16, 8))
+            if not resource_rva:
+                return None
+
+            sections = []
+            table = read(optional_offset + optional_size, 40 * section_count)
+            for i in range(section_count):
+                virtual_size, virtual_address, raw_size, raw_offset = struct.unpack_from('<IIII', table, 40 * i + 8)
+                sections.append((virtual_address, max(virtual_size, raw_size), raw_offset))
+
+            def rva_offset(rva: int) -> int:
+                for virtual_address, size, raw_offset in sections:
+                    if virtual_address <= rva < virtual_address + size:
+                        return rva - virtual_address + raw_offset
+                raise ValueError(f"无效的RVA: {rva:#x}")
+
+            resource_base = rva_offset(resource_rva)
+
+            def entries(offset: int) -> List[tuple]:
+                named, ids = struct.unpack('<HH', read(resource_base + offset + 12, 4))
+                data = read(resource_base + offset + 16, 8 * (named + ids))
+                return [struct.unpack_from('<II', data, 8 * i) for i in range(named + ids)]
+
+            # 资源目录共三层：类型 -> 资源名 -> 语言，版本信息取第一个资源的第一种语言
+            entry = next((target for ident, target in entries(0) if ident == _RT_VERSION), None)
+            for _ in range(2):
+                if entry is None or not entry & 0x80000000:
+                    return None
+                children = entries(entry & 0x7FFFFFFF)
+                entry = children[0][1] if children else None
+            if entry is None or entry & 0x80000000:
+                return None
+            data_rva, data_size = struct.unpack('<II', read(resource_base + entry, 8))
+            blob = read(rva_offset(data_rva), min(data_size, FINGERPRINT_READ_LIMIT))
+    except (OSError, ValueError, struct.error) as e:
+        logger.debug(f"读取版本信息资源失败 {file_path}: {str(e)}")
+        return None
+
+    # 版本信息中的字符串为 UTF-16，键和值之间以空字符和对齐填充分隔
+    match = re.search(re.escape(name) + r'\x00+([^\x00]+)', blob.decode('utf-16-le', errors='ignore'))
+    return match.group(1).strip() if match else None
+
+
+def read_fingerprint(install_path: Path, fingerprints: List[Dict]) -> Optional[str]:
+    """从安装目录中已有的文件读取版本号，不启动任何进程
+
+    每条指纹规则支持以下形式:
+        {"file": "release", "pattern": "JAVA_VERSION=\"([^\"]+)\""}
+            读取文件内容并用正则匹配
+        {"glob": "lib\\maven-core-*.jar", "pattern": "^maven-core-(\\d+\\.\\d+\\.\\d+)\\.jar$"}
+            用正则匹配符合通配符的文件名
+        {"glob": "python3*.dll", "resource": "FileVersion", "pattern": "^(\\d+\\.\\d+\\.\\d+)"}
+            用正则匹配符合通配符的 PE 文件版本信息资源中的字符串
+
+    规则按顺序尝试，返回第一个匹配到的版本号；都不匹配时返回None。
+
+    Args:
+        install_path: 工具安装目录
+        fingerprints: 工具配置中的 fingerprints 列表
+    """
+    for fingerprint in fingerprints:
+        try:
+            regex = re.compile(fingerprint['pattern'], re.MULTILINE)
+
+            if 'file' in fingerprint:
+                file_path = install_path.joinpath(*_split_rel(fingerprint['file']))
+                count_fs('stat_calls')
+                if not file_path.is_file():
+                    continue
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read(FINGERPRINT_READ_LIMIT)
+                match = regex.search(content)
+                if match:
+                    return _format_match(match, fingerprint)
+
+            elif 'glob' in fingerprint:
+                parts = _split_rel(fingerprint['glob'])
+                search_dir = install_path.joinpath(*parts[:-1])
+                count_fs('stat_calls')
+                if not search_dir.is_dir():
+                    continue
+                count_fs('dirs_listed')
+                for file_path in sorted(search_dir.glob(parts[-1])):
+                    if 'resource' in fingerprint:
+                        match = regex.search(read_version_resource(file_path, fingerprint['resource']) or '')
+                    else:
+                        match = regex.search(file_path.name.lower())
+                    if match:
+                        return _format_match(match, fingerprint)
+
+        except Exception as e:
+            logger.debug(f"读取版本指纹失败 {install_path}: {str(e)}")
+
+    return None
+
+
+def default_probe_cache_path() -> Path:
+    """默认的版本探测缓存文件路径"""
+    return Path.home() / '.env_manager' / 'probe_cache.json'
+
+
+def resolve_executable(bin_path: Path, name: str) -> Optional[Path]:
+    """在bin目录中查找可执行文件，按 PATHEXT 补全扩展名
+
+    Returns:
+        解析后的真实路径，未找到时返回None
+    """
+    candidates = [name]
+    if not os.path.splitext(name)[1]:
+        pathext = os.environ.get('PATHEXT', '.COM;.EXE;.BAT;.CMD')
+        candidates += [name + ext.lower() for ext in pathext.split(';') if ext]
+
+    for candidate in candidates:
+        path = bin_path / candidate
+        count_fs('stat_calls')
+        if path.is_file():
+            return path.resolve()
+    return None
+
+
+class ProbeCache:
+    """持久化的版本探测缓存
+
+    以 (可执行文件真实路径, 文件大小, 修改时间) 作为键缓存解析后的版本号，
+    可执行文件未变化时不再重复执行版本命令。超过容量时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None, max_entries: int = 512):
+        self.logger = logging.getLogger('ProbeCache')
+        self.cache_path = Path(cache_path) if cache_path else default_probe_cache_path()
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = threading.Lock()
+        # 本进程在上次保存之后查询或写入过的条目
+        self._used = set()
+        self._loaded_stamp: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    @staticmethod
+    def make_key(executable: Path) -> Optional[str]:
+        """根据可执行文件的身份生成缓存键"""
+        try:
+            st = os.stat(executable)
+        except OSError:
+            return None
+        return f"{executable}|{st.st_size}|{st.st_mtime_ns}"
+
+    def get(self, key: str) -> Optional[str]:
+        """查询缓存，命中时将条目移到最近使用的位置"""
+        with self._lock:
+            version = self._entries.get(key)
+            if version is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._used.add(key)
+            self.hits += 1
+            return version
+
+    def put(self, key: str, version: str):
+        """写入缓存，超过容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._entries[key] = version
+            self._entries.move_to_end(key)
+            self._used.add(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def reset_stats(self):
+        """重置命中统计"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def hit_rate(self) -> float:
+        """缓存命中率，没有查询时返回0"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _file_stamp(self) -> Optional[int]:
+        try:
+            return os.stat(self.cache_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read_file(self) -> List:
+        """读取磁盘上的缓存条目，按使用顺序排列"""
+        try:
+            if not self.cache_path.exists():
+                return []
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return [(key, version) for key, version in json.load(f)]
+        except Exception as e:
+            self.logger.error(f"加载版本探测缓存失败: {str(e)}")
+            return []
+
+    def load(self):
+        """从磁盘加载缓存，文件中的顺序即为使用顺序"""
+        stamp = self._file_stamp()
+        entries = self._read_file()
+        with self._lock:
+            self._entries = OrderedDict(entries[-self.max_entries:])
+            self._used = set()
+            self._loaded_stamp = stamp
+
+    def refresh(self):
+        """缓存文件已被其他进程改写时重新加载"""
+        if self._file_stamp() != self._loaded_stamp:
+            self.load()
+
+    def save(self):
+        """保存缓存到磁盘
+
+        缓存文件在加载之后被其他进程改写时，以磁盘上的条目为基础，再合并本进程使用过的条目。
+        """
+        try:
+            disk = self._read_file() if self._file_stamp() != self._loaded_stamp else None
+            with self._lock:
+                if disk is not None:
+                    merged = OrderedDict(disk)
+                    for key, version in self._entries.items():
+                        if key in self._used or key not in merged:
+                            merged[key] = version
+                            if key in self._used:
+                                merged.move_to_end(key)
+                    while len(merged) > self.max_entries:
+                        merged.popitem(last=False)
+                    self._entries = merged
+                self._used = set()
+                entries = list(self._entries.items())
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+            self._loaded_stamp = self._file_stamp()
+        except Exception as e:
+            self.logger.error(f"保存版本探测缓存失败: {str(e)}")
+
+
+class ProbeResult:
+    """版本命令的执行结果"""
+
+    def __init__(self, returncode: Optional[int], stdout: str, stderr: str,
+                 timed_out: bool = False, aborted: bool = False):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+        self.aborted = aborted  # 被 kill_all 中止
+
+
+def kill_process_tree(proc: subprocess.Popen):
+    """结束进程及其所有子进程"""
+    try:
+        if sys.platform.startswith('win'):
+            subprocess.run(
+                ['taskkill', '/F', '/T', '/PID', str(proc.pid)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0),
+                timeout=5
+            )
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except Exception as e:
+        logger.debug(f"结束进程树失败 {proc.pid}: {str(e)}")
+    finally:
+        # 兜底：至少保证直接子进程被结束
+        if proc.poll() is None:
+            try:
+                proc.kill()
+            except OSError:
+                pass
+
+
+class VersionProber:
+    """有界的版本探测线程池
+
+    每个探测直接启动可执行文件（不经过 cmd.exe），超时后结束整个进程树。
+    探测任务并发执行，调用方通过 Future 按完成顺序获取结果。
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: float = 10.0):
+        self.logger = logging.getLogger('VersionProber')
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='probe')
+        self._running = set()
+        self._killed = set()
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """提交一个探测任务"""
+        return self._pool.submit(fn, *args)
+
+    def run(self, argv: List[str], timeout: Optional[float] = None) -> ProbeResult:
+        """在当前线程中执行一次版本命令
+
+        Args:
+            argv: 命令及参数，argv[0] 应为可执行文件的完整路径
+            timeout: 超时时间（秒），默认使用探测池的超时设置
+        """
+        timeout = self.timeout if timeout is None else timeout
+        kwargs = {}
+        if sys.platform.startswith('win'):
+            kwargs['creationflags'] = (getattr(subprocess, 'CREATE_NO_WINDOW', 0) |
+                                       getattr(subprocess, 'CREATE_NEW_PROCESS_GROUP', 0))
+        else:
+            kwargs['start_new_session'] = True  # 独立进程组，便于结束整个进程树
+
+        proc = subprocess.Popen(
+            argv,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='ignore',
+            **kwargs
+        )
+        with self._lock:
+            self._running.add(proc)
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+            with self._lock:
+                aborted = proc in self._killed
+            return ProbeResult(proc.returncode, stdout, stderr, aborted=aborted)
+        except subprocess.TimeoutExpired:
+            self.logger.warning(f"版本命令超时，结束进程树: {' '.join(argv)}")
+            kill_process_tree(proc)
+            stdout, stderr = proc.communicate()
+            return ProbeResult(None, stdout, stderr, timed_out=True)
+        finally:
+            with self._lock:
+                self._running.discard(proc)
+                self._killed.discard(proc)
+
+    def kill_all(self):
+        """结束所有正在执行的版本命令"""
+        with self._lock:
+            running = list(self._running)
+            self._killed.update(running)
+        for proc in running:
+            kill_process_tree(proc)
+
+    def shutdown(self):
+        """结束正在执行的命令并关闭线程池"""
+        self.kill_all()
+        self._pool.shutdown(wait=False)
@@ -4,16 +4,23 @@ from tkinter import ttk, messagebox
 import logging
 from typing import Optional, Dict, List
 from src.core.env_backup import EnvBackup
-from src.core.env_scanner import EnvScanner
+from src.core.env_scanner import EnvScanner, ScanEvent, ScanCancelToken
+from src.core.scan_roots import ConfigRootProvider, DriveRootProvider
+from src.core.scan_watcher import ScanWatcher, ScanChange
+from src.core.scan_worker import ProcessScanner
 from src.utils.config import Config
 from src.utils.admin import ensure_admin
 from src.core.env_manager import EnvManager
 from pathlib import Path
 import os
+import json
 import subprocess
 from PIL import Image, ImageTk
 import threading
 
+# 界面中的扫描由用户主动发起，否定缓存每次都确认目录修改时间，刚安装的工具不会因信任时间被跳过
+SCANNER_OPTIONS = {'negative_ttl': 0}
+
 class EnvPanel(ttk.Frame):
     def __init__(self, parent: ttk.Frame, config: Config):
         """初始化环境管理面板
@@ -29,13 +36,24 @@ class EnvPanel(ttk.Frame):
         
         # 初始化组件
         self.env_backup = EnvBackup(config)
-        self.env_scanner = EnvScanner()
+        self.env_scanner = EnvScanner(**SCANNER_OPTIONS)
         self.env_manager = EnvManager()
         
         # 初始化 backups 列表
         self.backups = []
         self.restore_thread = None
         
+        # 扫描过程中已发现的安装
+        self._partial_results = None
+        self._render_pending = False
+        # 当前扫描的取消令牌，为None表示没有正在进行的扫描
+        self._scan_token = None
+        # 最近一次完整扫描的结果，以及在此基础上增量更新的安装监视器
+        self._scan_results = None
+        self.scan_watcher = None
+        # 已提示过配置错误的扫描计划
+        self._reported_plan = None
+        
         # 配置网格权重
         self.grid_columnconfigure(0, weight=1)
         self.grid_columnconfigure(1, weight=1)
@@ -108,7 +126,11 @@ class EnvPanel(ttk.Frame):
         scan_control_frame = ttk.Frame(right_frame)
         scan_control_frame.pack(fill=tk.X, pady=(0, 5))
         
-        ttk.Button(scan_control_frame, text="开始扫描", command=self.start_full_scan).pack(side=tk.LEFT, padx=5)
+        # 快速扫描只检查 PATH 和环境变量指向的安装，作为默认的扫描方式
+        ttk.Button(scan_control_frame, text="快速扫描", command=self.start_quick_scan, default='active').pack(side=tk.LEFT, padx=5)
+        ttk.Button(scan_control_frame, text="全盘扫描", command=self.start_full_scan).pack(side=tk.LEFT, padx=5)
+        self.cancel_scan_button = ttk.Button(scan_control_frame, text="取消扫描", command=self.cancel_scan, state='disabled')
+        self.cancel_scan_button.pack(side=tk.LEFT, padx=5)
         self.scan_progress = ttk.Progressbar(scan_control_frame, length=200, mode='determinate')
         self.scan_progress.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
         
@@ -247,7 +269,7 @@ class EnvPanel(ttk.Frame):
                     self.hide_restore_progress()
                     
                     if success:
-                        messagebox.showinfo("成功", "恢复成功！\n如果环境仍未生效，建议重启后验证，如仍然未生效，可以点击右侧开始扫描，根据建议手动添加环境变量。")
+                        messagebox.showinfo("成功", "恢复成功！\n如果环境仍未生效，建议重启后验证，如仍然未生效，可以点击右侧快速扫描，根据建议手动添加环境变量。")
                     else:
                         error_msg = f"恢复备份失败！\n{error_message if error_message else ''}"
                         messagebox.showerror("错误", error_msg)
@@ -306,35 +328,210 @@ class EnvPanel(ttk.Frame):
             self.logger.error(f"更新备份列表失败: {str(e)}")
             self.backup_listbox.insert(tk.END, "加载备份列表失败")
 
+    def start_quick_scan(self):
+        """开始快速扫描，只分析 PATH 和 *_HOME 环境变量指向的安装"""
+        self._start_scan(quick=True)
+
     def start_full_scan(self):
         """开始全盘扫描"""
+        self._start_scan(quick=False)
+
+    def _start_scan(self, quick: bool):
         try:
+            # 扫描进行中时重复点击合并到当前扫描
+            if self._scan_token is not None:
+                self.logger.debug("扫描正在进行中，忽略重复的扫描请求")
+                return
+                
+            self._report_config_problems()
             self.scan_result.delete(1.0, tk.END)
             self.scan_progress['value'] = 0
+            self._partial_results = {}
+            self._render_pending = False
             
-            def update_progress(value):
-                self.scan_progress['value'] = value
-                
-            self.env_scanner.set_progress_callback(update_progress)
+            token = ScanCancelToken()
+            self._scan_token = token
+            if self.scan_watcher:
+                self.scan_watcher.pause()
+            self.cancel_scan_button.configure(state='normal')
+            if quick:
+                scanner = self.env_scanner
+                events = scanner.iter_quick_scan(cancel_token=token)
+            else:
+                scanner = self._get_scan_source()
+                profile = getattr(self.config, 'profile_scan', False)
+                events = scanner.iter_scan(self._get_scan_roots(), cancel_token=token, profile=profile)
             
             def scan_thread():
-                error = None
                 try:
-                    results = self.env_scanner.scan()
-                    self.after(0, lambda: self.update_scan_result(results))
+                    # 流式扫描：发现安装即推送到界面，进度按实际工作量更新
+                    for event in events:
+                        if event.kind == ScanEvent.PROGRESS:
+                            self.after(0, lambda v=event.progress: self.scan_progress.configure(value=v))
+                        elif event.kind == ScanEvent.INSTALLATION:
+                            self.after(0, lambda e=event: self.add_scan_installation(e.tool_name, e.installation))
+                        elif event.kind == ScanEvent.DONE:
+                            if scanner is not self.env_scanner and not event.cancelled:
+                                self.env_scanner.watch_dirs = scanner.watch_dirs
+                                self.env_scanner.watch_mtimes = scanner.watch_mtimes
+                                self.env_scanner.watch_signatures = scanner.watch_signatures
+                            if event.profile:
+                                self._save_scan_profile(event.profile)
+                            self.after(0, lambda r=event.results, c=event.cancelled: self.finish_scan(r, c, quick))
                 except Exception as scan_error:
-                    error = scan_error
                     self.logger.error(f"扫描失败: {str(scan_error)}")
                     self.after(0, lambda: messagebox.showerror("错误", f"扫描失败: {str(scan_error)}"))
                 finally:
-                    self.after(0, lambda: self.scan_progress.configure(value=100))
+                    self.after(0, self._scan_finished)
             
-            import threading
             threading.Thread(target=scan_thread, daemon=True).start()
             
         except Exception as e:
             self.logger.error(f"启动扫描失败: {str(e)}")
             messagebox.showerror("错误", f"启动扫描失败: {str(e)}")
+            self._scan_finished()
+
+    def _report_config_problems(self):
+        """扫描配置有无效条目时提示一次，这些工具不会被扫描"""
+        plan = self.env_scanner.plan
+        if plan is self._reported_plan:
+            return
+        self._reported_plan = plan
+        if plan.errors:
+            details = '\n'.join(plan.errors[:10])
+            more = f"\n……共 {len(plan.errors)} 项" if len(plan.errors) > 10 else ''
+            messagebox.showwarning("扫描配置错误", f"以下配置无效，相应工具不会被扫描:\n{details}{more}")
+
+    def _save_scan_profile(self, report: Dict):
+        """把扫描性能报告写入数据目录下的 scan_profile.json"""
+        try:
+            profile_path = self.config.app_data_dir / 'scan_profile.json'
+            with open(profile_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.logger.info(f"扫描性能报告已保存: {profile_path}")
+        except Exception as e:
+            self.logger.error(f"保存扫描性能报告失败: {str(e)}")
+
+    def _get_scan_source(self):
+        """按配置选择在独立进程中扫描还是在界面进程的后台线程中扫描
+        
+        独立进程中的目录遍历不占用界面进程的 GIL，扫描期间界面保持流畅；
+        scan_processes 大于1时根目录分到多个进程并行扫描。
+        """
+        processes = getattr(self.config, 'scan_processes', 1)
+        if processes and processes > 0:
+            return ProcessScanner(shards=processes, scanner_options=SCANNER_OPTIONS)
+        return self.env_scanner
+
+    def _get_scan_roots(self):
+        """配置了扫描根目录时使用配置，否则扫描所有磁盘驱动器
+        
+        默认跳过可移动磁盘和网络驱动器，可在配置中打开。
+        """
+        drives = DriveRootProvider(
+            include_removable=getattr(self.config, 'scan_removable_drives', False),
+            include_network=getattr(self.config, 'scan_network_drives', False)
+        )
+        scan_roots = getattr(self.config, 'scan_roots', None)
+        return ConfigRootProvider(scan_roots, drives) if scan_roots else drives
+
+    def cancel_scan(self):
+        """取消正在进行的扫描，已发现的结果会保留"""
+        if self._scan_token is not None:
+            self.logger.info("用户取消扫描")
+            self._scan_token.cancel()
+            self.cancel_scan_button.configure(state='disabled')
+
+    def _scan_finished(self):
+        """扫描线程结束后恢复界面状态"""
+        self._scan_token = None
+        self.scan_progress.configure(value=100)
+        self.cancel_scan_button.configure(state='disabled')
+
+    def add_scan_installation(self, tool_name: str, installation: Dict):
+        """扫描过程中收到新的安装，合并刷新界面"""
+        self._partial_results.setdefault(tool_name, []).append(installation)
+        if not self._render_pending:
+            self._render_pending = True
+            self.after(200, self._render_partial_results)
+
+    def _render_partial_results(self):
+        """按配置顺序渲染目前已发现的安装"""
+        self._render_pending = False
+        if self._partial_results is None:
+            return
+        order = list(self.env_scanner.scan_config)
+        results = {tool: self._partial_results[tool]
+                   for tool in sorted(self._partial_results, key=lambda t: order.index(t) if t in order else len(order))}
+        self.update_scan_result(results)
+
+    def finish_scan(self, results: Dict[str, List[Dict]], cancelled: bool = False, quick: bool = False):
+        """扫描结束，用最终结果替换增量结果"""
+        self._partial_results = None
+        self.update_scan_result(results)
+        if quick:
+            # 快速扫描的结果不完整，安装监视保持暂停，直到下一次全盘扫描
+            self._scan_results = None
+            self.scan_result.insert("1.0", "快速扫描：以下为 PATH 和 *_HOME 环境变量指向的安装，全盘扫描可查找磁盘上的所有安装\n", "heading")
+            if cancelled:
+                self.scan_result.insert("1.0", "扫描已取消，以下为部分结果\n", "heading")
+        elif cancelled:
+            self.scan_result.insert("1.0", "扫描已取消，以下为部分结果\n", "heading")
+            if self.scan_watcher:
+                self.scan_watcher.resume()
+        else:
+            self._scan_results = results
+            self._start_watcher(results)
+
+    def _start_watcher(self, results: Dict[str, List[Dict]]):
+        """完整扫描结束后开始监视安装目录的变化（需在配置中开启）"""
+        if not getattr(self.config, 'watch_installations', False):
+            return
+        try:
+            if self.scan_watcher is None:
+                self.scan_watcher = ScanWatcher(
+                    self.env_scanner,
+                    lambda changes: self.after(0, lambda c=changes: self.apply_watch_changes(c)),
+                    interval=getattr(self.config, 'watch_interval', 10.0)
+                )
+            self.scan_watcher.reset(results)
+            self.scan_watcher.start()
+        except Exception as e:
+            self.logger.error(f"启动安装监视失败: {str(e)}")
+
+    def apply_watch_changes(self, changes: List[ScanChange]):
+        """把监视器发现的变化合并到扫描结果并刷新显示"""
+        if self._scan_results is None or self._scan_token is not None:
+            return
+        try:
+            for change in changes:
+                path = change.installation['install_path']
+                installations = self._scan_results.get(change.tool_name, [])
+                index = next((i for i, inst in enumerate(installations) if inst['install_path'] == path), None)
+                if change.kind == ScanChange.REMOVED:
+                    if index is not None:
+                        del installations[index]
+                elif index is not None:
+                    installations[index] = change.installation
+                else:
+                    installations.append(change.installation)
+                self._scan_results[change.tool_name] = installations
+                self.logger.info(f"安装变化: {change.kind} {change.tool_name} {path}")
+            
+            # 保持与配置文件一致的工具顺序
+            order = list(self.env_scanner.scan_config)
+            self._scan_results = {
+                tool: self._scan_results[tool] for tool in order if self._scan_results.get(tool)
+            }
+            self.update_scan_result(self._scan_results)
+        except Exception as e:
+            self.logger.error(f"更新安装变化失败: {str(e)}")
+
+    def stop_watcher(self):
+        """停止安装监视"""
+        if self.scan_watcher:
+            self.scan_watcher.stop()
+            self.scan_watcher = None
 
     def update_scan_result(self, results: Dict[str, List[Dict]]):
         try:
@@ -377,17 +574,14 @@ class EnvPanel(ttk.Frame):
                 self.scan_result.insert(tk.END, "\n使用建议：\n", "recommendation_header")
                 if active_version:
                     self.scan_result.insert(tk.END, f"系统已正确配置 {tool} {active_version}，可以正常使用。\n", "normal")
-                # 添加优化建议
-                if installations and 'recommendations' in installations[0]:
-                    optimization_recommendations = [r for r in installations[0]['recommendations'] if not any(env in r for env in installations[0]['env_status'].keys())]
+                # 添加优化建议，建议在显示时才生成
+                if installations:
+                    recommendations = self.env_scanner.get_recommendations(installations[0])
+                    optimization_recommendations = [r for r in recommendations if not any(env in r for env in installations[0]['env_status'].keys())]
                     if optimization_recommendations:
                         self.scan_result.insert(tk.END, "\n优化建议：\n", "recommendation_header")
                         for recommendation in optimization_recommendations:
                             self.scan_result.insert(tk.END, f"{recommendation}\n", "normal")
-                else:
-                    if installations and 'recommendations' in installations[0]:
-                        for recommendation in installations[0]['recommendations']:
-                            self.scan_result.insert(tk.END, f"{recommendation}\n", "normal")
                 
                 self.scan_result.insert(tk.END, "\n" + "="*50 + "\n")
                 
@@ -486,9 +680,8 @@ class EnvPanel(ttk.Frame):
     def scan_environments(self):
         """扫描环境"""
         try:
-            # 开始扫描
-            scanner = EnvScanner()
-            results = scanner.scan()
+            # 开始扫描，复用面板的扫描器及其已加载的扫描计划
+            results = self.env_scanner.scan()
             
             # 更新扫描结果显示
             self.update_scan_result(results)
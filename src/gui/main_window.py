@@ -343,6 +343,7 @@ class MainWindow:
         try:
             # 清理扫描器资源
             if hasattr(self, 'env_panel'):
+                self.env_panel.stop_watcher()
                 self.env_panel.env_scanner._clean_resources()
             
             # 保存配置
@@ -11,6 +11,7 @@ import sys
 import time
 import ctypes
 import logging
+import multiprocessing
 from pathlib import Path
 from datetime import datetime
 import tkinter.messagebox as messagebox
@@ -105,6 +106,8 @@ class Application:
         try:
             from src.utils.config import Config
             self.config = Config()
+            # 命令行开关，不写入配置文件
+            self.config.profile_scan = '--profile-scan' in sys.argv
             return True
         except Exception as e:
             self._handle_error("配置加载失败", e)
@@ -151,4 +154,6 @@ def main():
     return 1
 
 if __name__ == "__main__":
+    # 打包后的程序以扫描进程身份启动时直接执行扫描，不进入界面
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命令行扫描工具
+不启动图形界面，扫描指定的根目录（挂载的虚拟磁盘、解压出的系统镜像等）并把结果写入 JSON，
+可在 Linux 构建机上离线预扫描镜像
+
+用法:
+    python src/scan_cli.py --root /mnt/image1 --root /mnt/image2 --output result.json
+    python src/scan_cli.py --roots-file roots.json --split
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from pathlib import Path
+
+# 基础路径设置
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.append(str(BASE_DIR))
+
+from src.core.env_scanner import EnvScanner
+from src.core.installation import Installation
+from src.core.scan_worker import ProcessScanner
+from src.core.scan_plan import load_scan_plan
+from src.core.registry_source import MemoryRegistryReader, parse_drive_mapping
+from src.core.scan_roots import ConfigRootProvider, DirectoryRootProvider, DriveRootProvider, resolve_roots
+
+
+def _to_json(obj):
+    """安装记录按普通字典写入 JSON"""
+    if isinstance(obj, Installation):
+        return obj.to_dict()
+    raise TypeError(f"无法序列化的对象: {type(obj).__name__}")
+
+
+def add_recommendations(scanner, results):
+    """为导出的每个安装计算配置建议，建议只在显示或导出时生成"""
+    for installations in results.values():
+        for installation in installations:
+            scanner.get_recommendations(installation)
+
+
+def run_scan(scanner, roots, deadline, profile):
+    """执行扫描，需要性能报告时才开启性能计数"""
+    if profile:
+        return scanner.scan_profiled(roots, deadline=deadline)
+    return scanner.scan(roots, deadline=deadline), None
+
+
+def write_profile(path, report):
+    """把性能报告写入 JSON，各节按开销从高到低排列"""
+    ordered = dict(report)
+    for section, field in (('roots', 'busy_time'), ('tools', 'probe_time'), ('patterns', 'dirs_listed')):
+        ordered[section] = dict(sorted(report.get(section, {}).items(),
+                                       key=lambda item: -item[1].get(field, 0)))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(ordered, f, ensure_ascii=False, indent=2)
+
+
+def split_by_root(results, roots):
+    """把扫描结果按所属根目录分组"""
+    prefixes = sorted(
+        ((os.path.normcase(str(root.path)).rstrip('\\/'), root.label) for root in roots),
+        key=lambda item: -len(item[0])
+    )
+    grouped = {root.label: {} for root in roots}
+    for tool_name, installations in results.items():
+        for installation in installations:
+            path = os.path.normcase(installation['install_path'])
+            label = next((label for prefix, label in prefixes
+                          if path == prefix or path.startswith(prefix + os.sep)), None)
+            if label is not None:
+                grouped[label].setdefault(tool_name, []).append(installation)
+    return grouped
+
+
+def main():
+    parser = argparse.ArgumentParser(description="扫描开发工具安装并输出 JSON")
+    parser.add_argument('--root', action='append', default=[], help="扫描根目录，可重复指定")
+    parser.add_argument('--roots-file', help="根目录配置文件（JSON 列表，支持 path/weight）")
+    parser.add_argument('--include-removable', action='store_true', help="扫描磁盘驱动器时包含可移动磁盘")
+    parser.add_argument('--include-network', action='store_true', help="扫描磁盘驱动器时包含网络驱动器")
+    parser.add_argument('--output', help="结果 JSON 文件，默认输出到标准输出")
+    parser.add_argument('--split', action='store_true', help="按根目录分组输出结果")
+    parser.add_argument('--quick', action='store_true', help="快速扫描，只分析 PATH 和 *_HOME 环境变量指向的安装，忽略根目录参数")
+    parser.add_argument('--workers', type=int, default=8, help="扫描线程数")
+    parser.add_argument('--processes', type=int, default=0, help="扫描进程数，根目录按权重分到各进程，默认在当前进程中扫描")
+    parser.add_argument('--deadline', type=float, help="最长扫描时间（秒），超时返回部分结果")
+    parser.add_argument('--no-index', action='store_true', help="不使用持久化扫描索引")
+    parser.add_argument('--registry', metavar='PATH',
+                        help="从 JSON 文件读取注册表（{键路径: {值名: 值}}），代替本机注册表，例如扫描系统镜像时")
+    parser.add_argument('--registry-drive', action='append', default=[], metavar='C=PATH',
+                        help="把注册表中登记在该盘符下的路径映射到本地目录，可重复指定，例如 C=/mnt/image1")
+    parser.add_argument('--no-registry', action='store_true', help="不分析注册表中登记的安装")
+    parser.add_argument('--profile-scan', metavar='PATH', help="收集按根目录、工具和路径模式统计的性能计数并写入 JSON 文件")
+    parser.add_argument('--check-config', action='store_true', help="只校验 scan_config.json，有错误时返回非零")
+    parser.add_argument('--debug', action='store_true', help="输出调试日志")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.check_config:
+        return check_config()
+
+    deadline = time.time() + args.deadline if args.deadline else None
+    options = {'use_index': not args.no_index, 'use_registry': not args.no_registry}
+    if args.registry:
+        try:
+            options['registry_reader'] = MemoryRegistryReader.from_file(args.registry)
+        except (OSError, ValueError) as e:
+            print(f"无法读取注册表文件 {args.registry}: {str(e)}", file=sys.stderr)
+            return 1
+    try:
+        options['registry_drives'] = parse_drive_mapping(args.registry_drive)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    if args.quick:
+        scanner = EnvScanner(**options)
+        try:
+            results = scanner.quick_scan(deadline=deadline)
+        finally:
+            scanner._clean_resources()
+        add_recommendations(scanner, results)
+        return write_output(args.output, {'results': results})
+
+    drives = DriveRootProvider(include_removable=args.include_removable, include_network=args.include_network)
+    roots = DirectoryRootProvider(args.root).roots()
+    if args.roots_file:
+        roots += ConfigRootProvider.from_file(args.roots_file, drives).roots()
+    roots = resolve_roots(roots if (args.root or args.roots_file) else drives)
+    if not roots:
+        print("没有可扫描的根目录", file=sys.stderr)
+        return 1
+
+    if args.processes > 0:
+        scanner = ProcessScanner(args.processes, dict(options, max_workers=args.workers))
+        results, report = run_scan(scanner, roots, deadline, args.profile_scan)
+        # 扫描在子进程中完成，建议由当前进程按本机环境变量计算
+        add_recommendations(EnvScanner(use_index=False, use_probe_cache=False), results)
+    else:
+        scanner = EnvScanner(max_workers=args.workers, **options)
+        try:
+            results, report = run_scan(scanner, roots, deadline, args.profile_scan)
+        finally:
+            scanner._clean_resources()
+        add_recommendations(scanner, results)
+
+    if args.profile_scan:
+        write_profile(args.profile_scan, report)
+
+    data = {
+        'roots': [{'path': str(root.path), 'weight': root.weight} for root in roots],
+        'results': split_by_root(results, roots) if args.split else results,
+    }
+    return write_output(args.output, data)
+
+
+def check_config():
+    """输出扫描配置的错误和警告，有错误时返回1"""
+    plan = load_scan_plan()
+    for error in plan.errors:
+        print(f"错误: {error}", file=sys.stderr)
+    for warning in plan.warnings:
+        print(f"警告: {warning}", file=sys.stderr)
+    print(f"{len(plan.tools)} 个工具配置有效，{len(plan.errors)} 个错误，{len(plan.warnings)} 个警告", file=sys.stderr)
+    return 1 if plan.errors else 0
+
+
+def write_output(output, data):
+    """把结果写入文件，未指定文件时输出到标准输出"""
+    text = json.dumps(data, ensure_ascii=False, indent=2, default=_to_json)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
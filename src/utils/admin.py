@@ -35,6 +35,9 @@ def run_as_admin():
             ]
         else:
             args = [str(script_path), '--admin', '--debug']
+        # 保留性能计数开关
+        if '--profile-scan' in sys.argv:
+            args.append('--profile-scan')
         
         # 记录启动信息
         log_dir = Path.home() / '.env_manager' / 'logs'
@@ -10,6 +10,18 @@ class Config:
         self.font_size = 9
         self.font_family = "微软雅黑"
         self.window_size = (800, 600)
+        # 扫描根目录，为空时扫描所有磁盘驱动器；格式见 ConfigRootProvider
+        self.scan_roots = []
+        # 扫描所有磁盘驱动器时是否包含可移动磁盘和网络驱动器
+        self.scan_removable_drives = False
+        self.scan_network_drives = False
+        # 扫描完成后在后台监视安装目录的变化，及轮询间隔（秒）
+        self.watch_installations = False
+        self.watch_interval = 10.0
+        # 扫描进程数，为0时在界面进程的后台线程中扫描
+        self.scan_processes = 1
+        # 扫描时收集性能计数并写入 scan_profile.json，由命令行 --profile-scan 打开，不保存
+        self.profile_scan = False
         self.app_data_dir = Path.home() / '.env_manager'
         self.app_data_dir.mkdir(parents=True, exist_ok=True)
         
@@ -29,6 +41,12 @@ class Config:
                     self.font_size = data.get('font_size', 9)
                     self.font_family = data.get('font_family', "微软雅黑")
                     self.window_size = data.get('window_size', (800, 600))
+                    self.scan_roots = data.get('scan_roots', [])
+                    self.scan_removable_drives = data.get('scan_removable_drives', False)
+                    self.scan_network_drives = data.get('scan_network_drives', False)
+                    self.watch_installations = data.get('watch_installations', False)
+                    self.watch_interval = data.get('watch_interval', 10.0)
+                    self.scan_processes = data.get('scan_processes', 1)
         except Exception as e:
             logging.error(f"加载配置失败: {str(e)}")
     
@@ -39,7 +57,13 @@ class Config:
             data = {
                 'font_size': self.font_size,
                 'font_family': self.font_family,
-                'window_size': self.window_size
+                'window_size': self.window_size,
+                'scan_roots': self.scan_roots,
+                'scan_removable_drives': self.scan_removable_drives,
+                'scan_network_drives': self.scan_network_drives,
+                'watch_installations': self.watch_installations,
+                'watch_interval': self.watch_interval,
+                'scan_processes': self.scan_processes
             }
             with open(config_path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=4, ensure_ascii=False)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 测试直接以 src.* 导入项目模块
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
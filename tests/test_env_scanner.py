@@ -0,0 +1,109 @@
+import os
+import time
+import threading
+
+import pytest
+
+from src.core.env_scanner import EnvScanner
+from src.core.scan_plan import ScanPlan
+
+
+def make_dir(base, rel):
+    path = base.joinpath(*rel.split('/'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@pytest.fixture
+def scanner(tmp_path):
+    scanner = EnvScanner(index_path=tmp_path / 'scan_index.json', use_probe_cache=False, use_registry=False)
+    scanner._get_version = lambda tool_name, bin_path, tool_config: '1.0'
+    return scanner
+
+
+def found(results, root):
+    return {name: sorted(os.path.relpath(inst['install_path'], str(root)) for inst in insts)
+            for name, insts in results.items()}
+
+
+@pytest.mark.parametrize('root_name', ['img', 'test-image', 'golden-tools-1', 'demo/examples'])
+def test_excludes_ignore_the_root_location(tmp_path, scanner, root_name):
+    root = make_dir(tmp_path, root_name)
+    make_dir(root, 'Java/bin')
+    make_dir(root, 'Python311/Scripts')
+    make_dir(root, 'Python-tests/Scripts')
+
+    results = found(scanner.scan([str(root)]), root)
+    assert results['Java'] == ['Java']
+    # 根目录以下命中排除规则的目录仍被排除
+    assert results['Python'] == ['Python311']
+
+
+class ProbeCounter:
+    """代替版本命令，记录每个bin目录被探测的次数"""
+
+    def __init__(self, delay: float = 0.005):
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, tool_name, bin_path, tool_config):
+        with self._lock:
+            self.calls.append(bin_path)
+        time.sleep(self.delay)
+        return '1.0'
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason='需要符号链接')
+def test_aliases_are_probed_once_and_reported_deterministically(tmp_path):
+    make_dir(tmp_path, 'b/Python39/Scripts')
+    make_dir(tmp_path, 'a')
+    os.symlink(str(tmp_path / 'b' / 'Python39'), str(tmp_path / 'a' / 'Python311'), target_is_directory=True)
+    for i in range(8):
+        make_dir(tmp_path, f'a/Users/u{i}/AppData/Local/Programs')
+
+    reported = set()
+    for run in range(10):
+        scanner = EnvScanner(use_index=False, use_probe_cache=False, use_registry=False,
+                             max_workers=8, discover=False)
+        probes = scanner._get_version = ProbeCounter()
+        results = scanner.scan([str(tmp_path / 'a'), str(tmp_path / 'b')])
+        assert len(probes.calls) == 1
+        reported.add(tuple(found(results, tmp_path)['Python']))
+    # 同一安装只报告一次，路径取排序键最小的根目录下的别名
+    assert reported == {(os.path.join('a', 'Python311'),)}
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason='需要符号链接')
+def test_walker_terminates_on_symlink_loops(tmp_path, monkeypatch):
+    plan = ScanPlan({'Deep': {'paths': ['**\\deep*'], 'bin_paths': ['bin'], 'version_cmd': 'deep --version',
+                              'max_depth': 8}})
+    monkeypatch.setattr('src.core.env_scanner.load_scan_plan', lambda: plan)
+    make_dir(tmp_path, 'root/x/deep1/bin')
+    os.symlink(str(tmp_path / 'root'), str(tmp_path / 'root' / 'x' / 'loop'), target_is_directory=True)
+
+    scanner = EnvScanner(use_index=False, use_probe_cache=False, use_registry=False, discover=False)
+    probes = scanner._get_version = ProbeCounter(delay=0)
+    results = scanner.scan([str(tmp_path / 'root')])
+    assert found(results, tmp_path / 'root') == {'Deep': [os.path.join('x', 'deep1')]}
+    assert len(probes.calls) == 1
+
+
+def test_root_is_listed_once_without_index(tmp_path, monkeypatch):
+    make_dir(tmp_path, 'root/Go/bin')
+    (make_dir(tmp_path, 'root/tools/jdk-17/bin') / 'java').touch(mode=0o755)
+    root = str(tmp_path / 'root')
+    listed = []
+    scandir = os.scandir
+
+    def counting_scandir(path='.'):
+        listed.append(os.fspath(path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, 'scandir', counting_scandir)
+    scanner = EnvScanner(use_index=False, use_probe_cache=False, use_registry=False)
+    scanner._get_version = lambda tool_name, bin_path, tool_config: '1.0'
+    results = scanner.scan([root])
+    assert 'Java' in found(results, tmp_path / 'root')
+    assert listed.count(root) == 1
+    assert scanner._root_listings is None
@@ -0,0 +1,62 @@
+import ntpath
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import path_index
+from src.core.path_index import EnvSnapshot, PathIndex, normalize_path_entry
+
+
+@pytest.fixture
+def windows_paths(monkeypatch):
+    # 按 Windows 的路径规则规范化，与运行测试的平台无关
+    monkeypatch.setattr(path_index, 'os', SimpleNamespace(path=ntpath, pathsep=';'))
+
+
+def test_case_is_ignored(windows_paths):
+    index = PathIndex(['C:\\Program Files\\Go\\bin'])
+    assert 'c:\\PROGRAM FILES\\go\\BIN' in index
+    assert index.position('C:\\PROGRAM FILES\\GO\\BIN') == 0
+
+
+def test_separators_are_unified(windows_paths):
+    index = PathIndex(['C:/Tools//jdk-17/bin'])
+    assert 'C:\\Tools\\jdk-17\\bin' in index
+    assert 'C:\\Tools\\jdk-17\\lib\\..\\bin' in index
+
+
+def test_trailing_separators_and_quotes_are_ignored(windows_paths):
+    index = PathIndex(['"C:\\Python311\\Scripts\\"', 'C:\\Go\\bin/'])
+    assert 'C:\\Python311\\Scripts' in index
+    assert 'C:\\Go\\bin' in index
+    assert index.directories == ['C:\\Python311\\Scripts', 'C:\\Go\\bin']
+
+
+def test_drive_root_keeps_its_separator(windows_paths):
+    assert normalize_path_entry('C:\\') == 'c:\\'
+    assert normalize_path_entry('C:/') == 'c:\\'
+    assert normalize_path_entry('C:') == 'c:'
+
+
+def test_first_occurrence_wins_after_normalization(windows_paths):
+    index = PathIndex(['C:\\Go\\bin', 'D:\\bin', 'c:/go/BIN/'])
+    assert len(index) == 2
+    assert index.position('C:\\Go\\bin') == 0
+    assert index.directories == ['C:\\Go\\bin', 'D:\\bin']
+
+
+def test_variables_are_expanded_before_normalization(windows_paths):
+    snapshot = EnvSnapshot({'Path': '%JAVA_HOME%\\bin\\;C:\\Windows', 'JAVA_HOME': 'C:\\jdk-17'},
+                           {'PATH': '%USERPROFILE%\\go\\bin'},
+                           fallback_env={'USERPROFILE': 'C:\\Users\\dev'})
+    index = PathIndex.from_snapshot(snapshot)
+    assert index.position('c:/JDK-17/bin') == 0
+    assert index.position('C:\\Users\\Dev\\Go\\Bin') == 2
+    assert index.directories == ['C:\\jdk-17\\bin', 'C:\\Windows', 'C:\\Users\\dev\\go\\bin']
+
+
+def test_blank_entries_are_skipped(windows_paths):
+    index = PathIndex(['', '  ', '""', 'C:\\Go\\bin'])
+    assert len(index) == 1
+    assert index.position('C:\\Go\\bin') == 3
+    assert '' not in index
@@ -0,0 +1,57 @@
+import os
+
+from src.core.version_probe import ProbeCache
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ProbeCache(tmp_path / 'probe_cache.json', max_entries=3)
+    for key in ['a', 'b', 'c']:
+        cache.put(key, key.upper())
+    assert cache.get('a') == 'A'
+    cache.put('d', 'D')
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in ['a', 'c', 'd']] == ['A', 'C', 'D']
+    assert (cache.hits, cache.misses) == (4, 1)
+
+
+def test_reload_keeps_entries_and_usage_order(tmp_path):
+    path = tmp_path / 'probe_cache.json'
+    cache = ProbeCache(path, max_entries=3)
+    for key in ['a', 'b', 'c']:
+        cache.put(key, key.upper())
+    cache.get('a')
+    cache.save()
+
+    reloaded = ProbeCache(path, max_entries=3)
+    reloaded.put('d', 'D')
+    # 重新加载后 b 仍是最久未使用的条目
+    assert reloaded.get('b') is None
+    assert [reloaded.get(key) for key in ['a', 'c', 'd']] == ['A', 'C', 'D']
+
+
+def test_save_merges_entries_written_by_another_process(tmp_path):
+    path = tmp_path / 'probe_cache.json'
+    first = ProbeCache(path)
+    second = ProbeCache(path)
+    first.put('a', 'A')
+    first.save()
+    second.put('b', 'B')
+    second.save()
+
+    assert ProbeCache(path).get('a') == 'A'
+    assert ProbeCache(path).get('b') == 'B'
+    # 文件时间精度较粗时两次保存的修改时间可能相同
+    stamp = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(path, ns=(stamp, stamp))
+    first.refresh()
+    assert first.get('b') == 'B'
+
+
+def test_key_changes_when_executable_changes(tmp_path):
+    executable = tmp_path / 'go'
+    executable.write_bytes(b'v1')
+    key = ProbeCache.make_key(executable)
+    executable.write_bytes(b'v1.1')
+    assert ProbeCache.make_key(executable) != key
+    os.remove(executable)
+    assert ProbeCache.make_key(executable) is None
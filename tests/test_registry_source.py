@@ -0,0 +1,131 @@
+import os
+import json
+from pathlib import Path
+
+import pytest
+
+from src.core.env_scanner import EnvScanner
+from src.core.registry_source import (MemoryRegistryReader, RegistrySource, map_registry_path,
+                                      parse_drive_mapping)
+
+UNINSTALL = r'HKEY_LOCAL_MACHINE\SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall'
+APP_PATHS = r'HKEY_CURRENT_USER\SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths'
+
+
+def make_dir(base, rel, executable=None):
+    path = base.joinpath(*rel.split('/'))
+    path.mkdir(parents=True, exist_ok=True)
+    if executable:
+        exe = path / executable
+        exe.write_text('')
+        exe.chmod(0o755)
+    return path
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / 'image'
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def registry():
+    return {
+        r'HKEY_LOCAL_MACHINE\SOFTWARE\JavaSoft\JDK\17': {'JavaHome': r'C:\vendor\jdk17'},
+        r'HKEY_CURRENT_USER\SOFTWARE\Python\PythonCore\3.12\InstallPath': {'': r'"C:\Py\Python312"'},
+        r'HKEY_LOCAL_MACHINE\SOFTWARE\GitForWindows': {'InstallPath': r'C:\VCS\Git'},
+        UNINSTALL + r'\{go}': {'DisplayName': 'Go Programming Language amd64', 'InstallLocation': r'C:\sdk\golang'},
+        UNINSTALL + r'\{chrome}': {'DisplayName': 'Google Chrome', 'InstallLocation': r'C:\Apps\Chrome'},
+        UNINSTALL + r'\{no-name}': {'InstallLocation': r'C:\Apps\Unnamed'},
+        APP_PATHS + r'\node.exe': {'': r'C:\tools\nodejs\node,0'},
+    }
+
+
+def test_memory_reader_keys_are_case_insensitive(registry):
+    reader = MemoryRegistryReader(registry)
+    assert reader.subkeys(r'hkey_local_machine\software\javasoft\jdk') == ['17']
+    assert reader.values(r'HKEY_LOCAL_MACHINE\SOFTWARE\JAVASOFT\JDK\17') == {'JavaHome': r'C:\vendor\jdk17'}
+    assert reader.subkeys(r'HKEY_LOCAL_MACHINE\SOFTWARE\Missing') == []
+    assert reader.values(r'HKEY_LOCAL_MACHINE\SOFTWARE\Missing') == {}
+
+
+def test_memory_reader_from_file(tmp_path, registry):
+    path = tmp_path / 'registry.json'
+    path.write_text(json.dumps(registry), encoding='utf-8')
+    reader = MemoryRegistryReader.from_file(path)
+    assert sorted(reader.subkeys(UNINSTALL)) == ['{chrome}', '{go}', '{no-name}']
+
+
+def test_collect_reads_vendor_uninstall_and_app_paths(registry):
+    findings = RegistrySource(MemoryRegistryReader(registry)).collect()
+    assert findings.installs == [
+        (r'C:\vendor\jdk17', 'Java'),
+        (r'C:\Py\Python312', 'Python'),
+        (r'C:\VCS\Git', 'Git'),
+    ]
+    assert sorted(findings.products) == [
+        (r'C:\Apps\Chrome', 'Google Chrome'),
+        (r'C:\sdk\golang', 'Go Programming Language amd64'),
+    ]
+    assert findings.executables == [r'C:\tools\nodejs\node']
+    assert len(findings) == 6
+
+
+def test_map_registry_path():
+    drives = parse_drive_mapping(['C=/mnt/image', 'd:=/mnt/data'])
+    assert drives == {'C': '/mnt/image', 'D': '/mnt/data'}
+    assert map_registry_path(r'C:\Program Files\Java', drives) == os.path.join('/mnt/image', 'Program Files', 'Java')
+    assert map_registry_path('d:/x', drives) == os.path.join('/mnt/data', 'x')
+    assert map_registry_path(r'E:\x', drives) == r'E:\x'
+    with pytest.raises(ValueError):
+        parse_drive_mapping(['C'])
+
+
+def test_scan_maps_registry_onto_image(image, registry):
+    make_dir(image, 'vendor/jdk17/bin', 'java')
+    make_dir(image, 'Py/Python312', 'python')
+    make_dir(image, 'VCS/Git/cmd', 'git')
+    make_dir(image, 'sdk/golang/bin', 'go')
+    make_dir(image, 'Apps/Chrome')
+    make_dir(image, 'tools/nodejs', 'node')
+
+    scanner = EnvScanner(use_index=False, use_probe_cache=False, discover=False,
+                         registry_reader=MemoryRegistryReader(registry),
+                         registry_drives={'C': str(image)})
+    scanner._get_version = lambda tool_name, bin_path, tool_config: '1.0'
+    results = scanner.scan([image])
+
+    found = {name: [os.path.relpath(inst['install_path'], image) for inst in insts]
+             for name, insts in results.items()}
+    assert found['Java'] == [os.path.join('vendor', 'jdk17')]
+    assert found['Python'] == [os.path.join('Py', 'Python312')]
+    assert found['Git'] == [os.path.join('VCS', 'Git')]
+    assert found['Go'] == [os.path.join('sdk', 'golang')]
+    assert found['Node.js'] == [os.path.join('tools', 'nodejs')]
+    # Chrome 按关键字对应到 Go，但目录中没有 go 可执行文件
+    assert not any('Chrome' in path for paths in found.values() for path in paths)
+
+
+def test_scan_ignores_registry_outside_roots(image, registry):
+    make_dir(image, 'vendor/jdk17/bin', 'java')
+    root = make_dir(image, 'other')
+    scanner = EnvScanner(use_index=False, use_probe_cache=False, discover=False,
+                         registry_reader=MemoryRegistryReader(registry),
+                         registry_drives={'C': str(image)})
+    scanner._get_version = lambda tool_name, bin_path, tool_config: '1.0'
+    assert scanner.scan([root]) == {}
+
+
+def test_stale_registry_entry_does_not_hide_path_match(image):
+    # 登记的目录中只剩 Scripts，没有 python 可执行文件；路径模式 Python* 仍能找到该安装
+    make_dir(image, 'Python311/Scripts', 'pip')
+    registry = {r'HKEY_LOCAL_MACHINE\SOFTWARE\Python\PythonCore\3.11\InstallPath': {'': r'C:\Python311'}}
+
+    for _ in range(10):
+        scanner = EnvScanner(use_index=False, use_probe_cache=False, discover=False, max_workers=8,
+                             registry_reader=MemoryRegistryReader(registry),
+                             registry_drives={'C': str(image)})
+        scanner._get_version = lambda tool_name, bin_path, tool_config: '1.0'
+        results = scanner.scan([image])
+        assert {name: len(insts) for name, insts in results.items()} == {'Python': 1}
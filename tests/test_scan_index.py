@@ -0,0 +1,109 @@
+import os
+import time
+
+import pytest
+
+from src.core.env_scanner import EnvScanner
+from src.core.scan_index import ScanIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = ScanIndex(tmp_path / 'scan_index.json')
+    index.begin_scan()
+    index.set_plan('plan-1')
+    return index
+
+
+@pytest.fixture
+def dead_dir(tmp_path):
+    path = tmp_path / 'Program Files (x86)'
+    path.mkdir()
+    os.utime(str(path), ns=(10 ** 18, 10 ** 18))
+    return str(path)
+
+
+def touch_dir(path):
+    stamp = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(path, ns=(stamp, stamp))
+
+
+_clock = time.time
+
+
+def later(monkeypatch, seconds):
+    now = _clock() + seconds
+    monkeypatch.setattr(time, 'time', lambda: now)
+
+
+def test_negative_entry_matches_only_its_key(index, dead_dir):
+    index.put_negative(dead_dir, '3:0')
+    assert index.is_negative(dead_dir, '3:0', ttl=300)
+    assert not index.is_negative(dead_dir, '4:0', ttl=300)
+    assert index.stats['negative_hits'] == 1
+
+
+def test_entry_is_trusted_within_ttl_even_if_the_dir_changed(index, dead_dir):
+    index.put_negative(dead_dir, '3:0')
+    touch_dir(dead_dir)
+    # 信任时间内不访问文件系统，目录的变化要等到超时后才会发现
+    assert index.is_negative(dead_dir, '3:0', ttl=300)
+    assert not index.is_negative(dead_dir, '3:0', ttl=0)
+    assert not index.is_negative(dead_dir, '3:0', ttl=300)
+
+
+def test_expired_entry_is_renewed_when_mtime_is_unchanged(index, dead_dir, monkeypatch):
+    index.put_negative(dead_dir, '3:0')
+    later(monkeypatch, 301)
+    assert index.is_negative(dead_dir, '3:0', ttl=300)
+    # 续期后在新的信任时间内直接命中
+    touch_dir(dead_dir)
+    later(monkeypatch, 302)
+    assert index.is_negative(dead_dir, '3:0', ttl=300)
+
+
+def test_expired_entry_is_dropped_when_mtime_changed(index, dead_dir, monkeypatch):
+    index.put_negative(dead_dir, '3:0')
+    index.put_negative(dead_dir, '4:0')
+    touch_dir(dead_dir)
+    later(monkeypatch, 301)
+    assert not index.is_negative(dead_dir, '3:0', ttl=300)
+    # 目录的全部否定记录一起丢弃
+    assert not index.is_negative(dead_dir, '4:0', ttl=0)
+
+
+def test_removed_dir_is_not_negative(index, dead_dir):
+    index.put_negative(dead_dir, '3:0')
+    os.rmdir(dead_dir)
+    assert not index.is_negative(dead_dir, '3:0', ttl=0)
+
+
+def test_plan_change_resets_negatives(tmp_path, index, dead_dir):
+    index.put_negative(dead_dir, '3:0')
+    index.set_plan('plan-1')
+    assert index.is_negative(dead_dir, '3:0', ttl=300)
+    index.save()
+
+    reloaded = ScanIndex(tmp_path / 'scan_index.json')
+    reloaded.begin_scan()
+    reloaded.set_plan('plan-1')
+    assert reloaded.is_negative(dead_dir, '3:0', ttl=300)
+    reloaded.set_plan('plan-2')
+    assert not reloaded.is_negative(dead_dir, '3:0', ttl=0)
+
+
+@pytest.mark.parametrize('negative_ttl, expected', [(0, ['Go']), (300, [])])
+def test_rescan_sees_new_install_only_without_trust_window(tmp_path, negative_ttl, expected):
+    root = tmp_path / 'root'
+    root.mkdir()
+    options = {'index_path': tmp_path / 'scan_index.json', 'use_probe_cache': False, 'use_registry': False,
+               'discover': False, 'negative_ttl': negative_ttl}
+    scanner = EnvScanner(**options)
+    scanner._get_version = lambda tool_name, bin_path, tool_config: '1.0'
+    assert scanner.scan([str(root)]) == {}
+
+    (root / 'Go' / 'bin').mkdir(parents=True)
+    touch_dir(str(root))
+    rescanner = EnvScanner(**options)
+    rescanner._get_version = scanner._get_version
+    assert sorted(rescanner.scan([str(root)])) == expected
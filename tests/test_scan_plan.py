@@ -0,0 +1,123 @@
+import fnmatch
+import os
+
+import pytest
+
+from src.core import scan_plan
+from src.core.env_scanner import EnvScanner
+from src.core.scan_plan import ScanPlan, _may_overlap, compile_glob
+
+
+TOOL = {'bin_paths': ['bin'], 'version_cmd': 'deep --version'}
+
+
+def tool(**fields):
+    return dict(TOOL, **fields)
+
+
+@pytest.mark.parametrize('pattern', [
+    'jdk', 'jdk*', '*jdk', '*jdk*', 'jdk-?', 'python3[0-9]', 'go[!0-9]*',
+    '[', '[]', '[!]', '[]]', '[!]]x', '[z-a]', '[a-c-e]', 'a[\\]', 'x[^a]', 'x[&&]',
+])
+def test_compile_glob_matches_fnmatch(pattern):
+    match = compile_glob(pattern)
+    for name in ['jdk', 'jdk-1', 'xjdk', 'python39', 'gox', 'go1', '[', '[]', '[!]', ']', ']x', '!x',
+                 'z', 'b', '-', 'e', 'a\\', 'x^', 'xa', 'x&', '']:
+        assert match(name) == fnmatch.fnmatchcase(name, pattern), (pattern, name)
+
+
+@pytest.mark.parametrize('a, b, expected', [
+    ('jdk*', 'jdk-*', True),
+    ('*jdk', 'open*', True),
+    ('python3*', 'python2*', False),
+    ('*-x64', '*-arm64', False),
+    ('go[0-9]', 'go1*', True),
+    ('a*b', 'a*c', False),
+])
+def test_may_overlap(a, b, expected):
+    assert _may_overlap(a, b) == expected
+    assert _may_overlap(b, a) == expected
+
+
+def test_unusual_brackets_do_not_reject_the_tool():
+    plan = ScanPlan({'Odd': tool(paths=['C:\\[!]\\tool[]]'], exclude_patterns=['[!]*', '[z-a]'])})
+    assert plan.errors == []
+    assert 'Odd' in plan.tools
+
+
+def test_bad_pattern_is_reported_per_tool(monkeypatch):
+    glob_to_regex = scan_plan.glob_to_regex
+    monkeypatch.setattr(scan_plan, 'glob_to_regex', lambda p: '(' if p == 'bad' else glob_to_regex(p))
+    plan = ScanPlan({
+        'BadPath': tool(paths=['C:\\tools\\bad']),
+        'BadExclude': tool(paths=['C:\\tools\\x'], exclude_patterns=['bad']),
+        'Good': tool(paths=['C:\\tools\\good*']),
+    })
+    assert list(plan.tools) == ['Good']
+    assert len(plan.errors) == 2
+    assert plan.errors[0].startswith('BadPath: paths ')
+    assert plan.errors[1].startswith('BadExclude: exclude_patterns ')
+
+
+def scan_with_plan(monkeypatch, tmp_path, plan, dirs):
+    monkeypatch.setattr('src.core.env_scanner.load_scan_plan', lambda: plan)
+    root = tmp_path / 'root'
+    for rel in dirs:
+        root.joinpath(*rel.split('/')).mkdir(parents=True)
+    scanner = EnvScanner(use_index=False, use_probe_cache=False, use_registry=False, discover=False)
+    scanner._get_version = lambda tool_name, bin_path, tool_config: '1.0'
+    results = scanner.scan([str(root)])
+    return sorted(os.path.relpath(inst['install_path'], str(root)).replace(os.sep, '/')
+                  for inst in results.get('Deep', []))
+
+
+def test_recursive_segment_respects_max_depth(monkeypatch, tmp_path):
+    plan = ScanPlan({'Deep': tool(paths=['**\\deep*'], max_depth=2)})
+    dirs = ['deep0/bin', 'a/deep1/bin', 'a/b/deep2/bin', 'a/b/c/deep3/bin']
+    assert scan_with_plan(monkeypatch, tmp_path, plan, dirs) == ['a/b/deep2', 'a/deep1', 'deep0']
+
+
+def test_recursive_segment_prunes_default_and_excluded_dirs(monkeypatch, tmp_path):
+    plan = ScanPlan({'Deep': tool(paths=['**\\deep*'], exclude_patterns=['skip*'])})
+    dirs = ['a/deep1/bin', 'node_modules/deep2/bin', '.git/deep3/bin', 'skipped/deep4/bin', 'a/skip/deep5/bin']
+    assert scan_with_plan(monkeypatch, tmp_path, plan, dirs) == ['a/deep1']
+
+
+@pytest.mark.parametrize('fields, error', [
+    ({'paths': 'C:\\Go'}, 'Bad: paths 必须是字符串列表'),
+    ({'paths': ['C:\\Go'], 'bin_paths': [1]}, 'Bad: bin_paths 必须是字符串列表'),
+    ({'paths': ['C:\\Go'], 'version_cmd': ['go', 'version']}, 'Bad: version_cmd 必须是字符串'),
+    ({'paths': ['C:\\Go'], 'max_depth': 0}, 'Bad: max_depth 必须是正整数'),
+    ({'paths': ['C:\\Go'], 'max_depth': -1}, 'Bad: max_depth 必须是正整数'),
+    ({'paths': ['C:\\Go'], 'max_depth': True}, 'Bad: max_depth 必须是正整数'),
+])
+def test_invalid_field_rejects_only_that_tool(fields, error):
+    plan = ScanPlan({'Bad': tool(**fields), 'Good': tool(paths=['C:\\Go'])})
+    assert plan.errors == [error]
+    assert list(plan.tools) == ['Good']
+
+
+def test_missing_required_field_and_non_object_config():
+    plan = ScanPlan({'NoPaths': {'bin_paths': ['bin']}, 'NotObject': ['C:\\Go']})
+    assert plan.errors == ['NoPaths: 缺少 paths', 'NotObject: 配置必须是对象']
+    assert plan.tools == {}
+
+
+def test_unknown_field_is_only_a_warning():
+    plan = ScanPlan({'Go': tool(paths=['C:\\Go'], colour='blue')})
+    assert plan.errors == []
+    assert plan.warnings == ['Go: 未知字段 colour']
+    assert 'Go' in plan.tools
+
+
+def test_config_is_normalized_and_frozen():
+    plan = ScanPlan({'Go': tool(paths=['C:\\Go'])})
+    config = plan.config['Go']
+    assert config['max_depth'] == scan_plan.DEFAULT_MAX_DEPTH
+    assert config['env_vars'] == ()
+    with pytest.raises(TypeError):
+        config['paths'] = ['D:\\Go']
+    with pytest.raises(TypeError):
+        plan.config['Other'] = config
+    with pytest.raises(AttributeError):
+        config['paths'].append('D:\\Go')
@@ -0,0 +1,67 @@
+import os
+import time
+
+import pytest
+
+from src.core.env_scanner import EnvScanner
+from src.core.scan_watcher import ScanChange, ScanWatcher
+from src.core.scan_worker import ProcessScanner
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / 'image'
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def scanner(tmp_path):
+    scanner = EnvScanner(index_path=tmp_path / 'scan_index.json', use_probe_cache=False, use_registry=False)
+    scanner._get_version = lambda tool_name, bin_path, tool_config: '1.0'
+    return scanner
+
+
+def test_changes_before_first_poll_are_reported(image, scanner):
+    for rel in ['Program Files/Java/bin', 'Go/bin']:
+        (image / rel).mkdir(parents=True)
+    results = scanner.scan([str(image)])
+
+    # 扫描结束后、监视器第一次轮询前发生的变化
+    time.sleep(0.01)
+    (image / 'jdk-21' / 'bin').mkdir(parents=True)
+    (image / 'Go' / 'bin' / 'sub').mkdir()
+
+    watcher = ScanWatcher(scanner, lambda changes: None)
+    watcher.reset(results)
+    changes = {(change.kind, os.path.basename(change.installation['install_path']))
+               for change in watcher.poll_once()}
+    assert changes == {(ScanChange.ADDED, 'jdk-21'), (ScanChange.UPDATED, 'Go')}
+    assert watcher.poll_once() == []
+
+
+def test_changes_before_first_poll_are_reported_in_process_mode(tmp_path, image):
+    for rel in ['Program Files/Java/bin', 'Go/bin']:
+        (image / rel).mkdir(parents=True)
+    options = {'index_path': str(tmp_path / 'scan_index.json'), 'use_probe_cache': False, 'use_registry': False}
+    process_scanner = ProcessScanner(shards=1, scanner_options=options)
+    results = process_scanner.scan([str(image)])
+    assert process_scanner.watch_mtimes and process_scanner.watch_signatures
+
+    time.sleep(0.01)
+    (image / 'jdk-21' / 'bin').mkdir(parents=True)
+    (image / 'Go' / 'bin' / 'sub').mkdir()
+
+    # 界面进程中的扫描器没有参与扫描，只拿到子进程交回的监视数据
+    scanner = EnvScanner(use_index=False, use_probe_cache=False, use_registry=False)
+    scanner._get_version = lambda tool_name, bin_path, tool_config: '1.0'
+    scanner.watch_dirs = process_scanner.watch_dirs
+    scanner.watch_mtimes = process_scanner.watch_mtimes
+    scanner.watch_signatures = process_scanner.watch_signatures
+
+    watcher = ScanWatcher(scanner, lambda changes: None)
+    watcher.reset(results)
+    changes = {(change.kind, os.path.basename(change.installation['install_path']))
+               for change in watcher.poll_once()}
+    assert changes == {(ScanChange.ADDED, 'jdk-21'), (ScanChange.UPDATED, 'Go')}
+    assert watcher.poll_once() == []
@@ -0,0 +1,119 @@
+import json
+import struct
+from pathlib import Path
+
+import pytest
+
+from src.core.version_probe import read_fingerprint, read_version_resource
+
+CONFIG_PATH = Path(__file__).resolve().parent.parent / 'data' / 'scan_config.json'
+
+
+def _align(data: bytes) -> bytes:
+    return data + b'\0' * (-len(data) % 4)
+
+
+def _version_node(key: str, value: bytes = b'', children: bytes = b'', text: bool = True) -> bytes:
+    """版本信息中的一个节点: wLength, wValueLength, wType, szKey, 填充, Value, 填充, Children"""
+    body = _align(struct.pack('<HHH', 0, 0, 0) + (key + '\0').encode('utf-16-le'))
+    if value:
+        body = _align(body + value)
+    body += children
+    value_length = len(value) // 2 if text else len(value)
+    return struct.pack('<HHH', len(body), value_length, 1 if text else 0) + body[6:]
+
+
+def make_pe(path: Path, file_version: str):
+    """生成只包含版本信息资源的最小 PE32+ 文件"""
+    fixed = struct.pack('<13I', 0xFEEF04BD, 0x10000, 0x3000B, 0x40000, 0x3000B, 0x40000, 0x3F, 0, 0x40004, 2, 0, 0, 0)
+    string = _version_node('FileVersion', (file_version + '\0').encode('utf-16-le'))
+    table = _version_node('040904b0', children=string)
+    info = _version_node('VS_VERSION_INFO', fixed, _version_node('StringFileInfo', children=table), text=False)
+
+    rva = 0x1000
+    directory = struct.pack('<IIHHHH', 0, 0, 0, 0, 0, 1)
+    resources = (directory + struct.pack('<II', 16, 0x80000018) +
+                 directory + struct.pack('<II', 1, 0x80000030) +
+                 directory + struct.pack('<II', 0x409, 0x48) +
+                 struct.pack('<IIII', rva + 0x58, len(info), 0, 0) + info)
+    assert resources.index(info) == 0x58
+
+    optional = bytearray(240)
+    struct.pack_into('<H', optional, 0, 0x20B)
+    struct.pack_into('<I', optional, 108, 16)
+    struct.pack_into('<II', optional, 112 + 16, rva, len(resources))
+    section = struct.pack('<8sIIII16x', b'.rsrc', len(resources), rva, len(resources), 0x200)
+
+    header = bytearray(0x40)
+    header[:2] = b'MZ'
+    struct.pack_into('<I', header, 0x3C, 0x40)
+    header += b'PE\0\0' + struct.pack('<HHIIIHH', 0x8664, 1, 0, 0, 0, len(optional), 0x2022) + optional + section
+    path.write_bytes(bytes(header) + b'\0' * (0x200 - len(header)) + resources)
+
+
+def _write(base: Path, rel: str, content=''):
+    path = base.joinpath(*rel.split('/'))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if callable(content):
+        content(path)
+    else:
+        path.write_text(content, encoding='utf-8')
+
+
+# (工具名, 规则序号, 安装目录中的文件, 期望的版本号)，每条配置的指纹规则至少一个用例
+CASES = [
+    ('Java', 0, {'release': 'IMPLEMENTOR="Eclipse Adoptium"\nJAVA_VERSION="17.0.8"\n'}, '17.0.8'),
+    ('Python', 0, {'include/patchlevel.h': '#define PY_MINOR_VERSION        11\n'
+                                            '#define PY_VERSION              "3.11.4"\n'}, '3.11.4'),
+    ('Python', 1, {'pyvenv.cfg': 'home = C:\\Python311\ninclude-system-site-packages = false\n'
+                                 'version = 3.11.4\n'}, '3.11.4'),
+    ('Python', 1, {'pyvenv.cfg': 'home = /usr/bin\nversion_info = 3.12.1.final.0\n'}, '3.12.1'),
+    ('Python', 2, {'python311.dll': lambda path: make_pe(path, '3.11.4'), 'python3.dll': ''}, '3.11.4'),
+    ('Node.js', 0, {'include/node/node_version.h': '#define NODE_MAJOR_VERSION 18\n'
+                                                   '#define NODE_MINOR_VERSION 17\n'
+                                                   '#define NODE_PATCH_VERSION 1\n'}, '18.17.1'),
+    ('Maven', 0, {'lib/maven-core-3.9.4.jar': '', 'lib/maven-model-3.9.4.jar': ''}, '3.9.4'),
+    ('Gradle', 0, {'lib/gradle-launcher-8.3.jar': ''}, '8.3'),
+    ('Go', 0, {'VERSION': 'go1.21.0\ntime 2023-08-08T15:49:39Z\n'}, '1.21.0'),
+]
+
+
+@pytest.fixture(scope='module')
+def fingerprints():
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return {name: tool['fingerprints'] for name, tool in config.items() if tool.get('fingerprints')}
+
+
+def test_every_rule_has_a_case(fingerprints):
+    rules = {(name, index) for name, rules in fingerprints.items() for index in range(len(rules))}
+    assert rules == {(name, index) for name, index, _, _ in CASES}
+
+
+@pytest.mark.parametrize('tool_name, index, files, expected', CASES)
+def test_fingerprint_rule(tmp_path, fingerprints, tool_name, index, files, expected):
+    for rel, content in files.items():
+        _write(tmp_path, rel, content)
+    assert read_fingerprint(tmp_path, [fingerprints[tool_name][index]]) == expected
+
+
+def test_python_rules_agree_on_precision(tmp_path, fingerprints):
+    # 只有 DLL 的嵌入式发行版与完整安装得到同样精度的版本号
+    make_pe(tmp_path / 'python311.dll', '3.11.4')
+    assert read_fingerprint(tmp_path, fingerprints['Python']) == '3.11.4'
+    _write(tmp_path, 'include/patchlevel.h', '#define PY_VERSION              "3.11.4"\n')
+    assert read_fingerprint(tmp_path, fingerprints['Python']) == '3.11.4'
+
+
+def test_missing_files_fall_back_to_probe(tmp_path, fingerprints):
+    _write(tmp_path, 'python311.dll', 'not a PE file')
+    for rules in fingerprints.values():
+        assert read_fingerprint(tmp_path, rules) is None
+
+
+def test_read_version_resource(tmp_path):
+    make_pe(tmp_path / 'tool.dll', '2.5.0')
+    assert read_version_resource(tmp_path / 'tool.dll') == '2.5.0'
+    assert read_version_resource(tmp_path / 'tool.dll', 'ProductVersion') is None
+    (tmp_path / 'short.dll').write_bytes(b'MZ')
+    assert read_version_resource(tmp_path / 'short.dll') is None